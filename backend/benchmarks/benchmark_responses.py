@@ -0,0 +1,123 @@
+#benchmark_responses.py
+
+"""
+Benchmark: FastAPI's default JSON path vs FastJSONResponse, and bytes on the wire
+Usage: python benchmarks/benchmark_responses.py [num_creators] [num_posts]
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+from fastapi.encoders import jsonable_encoder
+
+from core.responses import dumps, compress, supported_encodings
+
+WORDS = ["growth", "team", "hiring", "lesson", "founder", "product", "data", "launch",
+         "customers", "mindset", "career", "AI", "marketing", "sales", "story", "today"]
+
+
+def make_directory(rng: random.Random, count: int) -> dict:
+    """Payload shaped like /api/creators/fast"""
+    creators = [{
+        'id': i,
+        'author': f"Creator {i}",
+        'headline': " ".join(rng.choices(WORDS, k=8)),
+        'location': "San Francisco, California",
+        'avatar_url': f"https://media.example.com/avatars/{i}.jpg",
+        'linkedin_url': f"https://www.linkedin.com/in/creator-{i}",
+        'created_at': (datetime(2024, 1, 1) + timedelta(hours=i)).isoformat(),
+        'post_count': rng.randint(10, 2000),
+        'avg_likes': rng.randint(0, 5000),
+        'avg_engagement': rng.randint(0, 6000),
+        'voice_profiles_count': rng.randint(0, 8)
+    } for i in range(count)]
+    return {"success": True, "data": creators, "total": len(creators)}
+
+
+def make_posts(rng: random.Random, count: int, embeddings: bool) -> dict:
+    """Payload shaped like /api/creators/{author}/posts"""
+    posts = []
+    for i in range(count):
+        post = {
+            'id': i,
+            'author': "Creator 1",
+            'post_content': " ".join(rng.choices(WORDS, k=rng.randint(40, 250))),
+            'post_date': "2024-05-01",
+            'post_timestamp': datetime(2024, 5, 1, 10, 0) - timedelta(hours=i),
+            'post_url': f"https://www.linkedin.com/posts/{i}",
+            'imgurl': None,
+            'media_type': None,
+            'like_count': rng.randint(0, 5000),
+            'comment_count': rng.randint(0, 300),
+            'repost_count': rng.randint(0, 100),
+            'cluster_id': rng.randint(0, 3)
+        }
+        if embeddings:
+            post['embedding'] = [rng.uniform(-0.1, 0.1) for _ in range(1536)]
+        posts.append(post)
+    return {"success": True, "data": posts, "total": len(posts), "next_cursor": None}
+
+
+def default_render(payload: dict) -> bytes:
+    """What FastAPI does for a returned dict: jsonable_encoder, then JSONResponse.render"""
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_render(payload: dict) -> bytes:
+    """FastJSONResponse returned directly: orjson, no jsonable_encoder"""
+    return dumps(payload)
+
+
+def timed(fn, payload, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(payload)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    num_creators = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    num_posts = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(42)
+
+    payloads = {
+        f"creator directory ({num_creators})": make_directory(rng, num_creators),
+        f"posts page ({num_posts}, no embeddings)": make_posts(rng, num_posts, embeddings=False),
+        f"posts page ({num_posts}, embeddings)": make_posts(rng, num_posts, embeddings=True),
+    }
+
+    for name, payload in payloads.items():
+        default_time, default_body = timed(default_render, payload, 5)
+        fast_time, fast_body = timed(fast_render, payload, 5)
+
+        if json.loads(default_body) != json.loads(fast_body):
+            print(f"MISMATCH in {name}")
+            sys.exit(1)
+
+        print(f"{name}")
+        print(f"  default JSON path: {default_time * 1000:8.1f} ms  {len(default_body) / 1024:9.1f} KiB")
+        print(f"  FastJSONResponse:  {fast_time * 1000:8.1f} ms  {len(fast_body) / 1024:9.1f} KiB"
+              f"  ({default_time / fast_time:.1f}x faster)")
+        for encoding in supported_encodings():
+            compress_time, compressed = timed(lambda body: compress(body, encoding), fast_body, 3)
+            print(f"  + {encoding:<4}             {compress_time * 1000:8.1f} ms  {len(compressed) / 1024:9.1f} KiB"
+                  f"  ({len(fast_body) / len(compressed):.1f}x smaller)")
+
+    if 'br' not in supported_encodings():
+        print("(brotli not installed - only gzip measured)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#benchmark_stylometry.py
+
+"""
+Benchmark: per-post stylometry loop vs StylometryScanner
+Usage: python benchmarks/benchmark_stylometry.py [num_posts]
+"""
+
+import os
+import re
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.stylometry import StylometryScanner
+
+WORDS = [
+    "growth", "team", "hiring", "lesson", "founder", "product", "data", "launch",
+    "customers", "mindset", "career", "AI", "marketing", "sales", "story", "today"
+]
+PUNCTUATION = [".", ".", ".", "?", "!", "...", " —", " --", "…"]
+EXTRAS = ["#leadership", "#startups", "@Jane", "🚀", "💡", "👉", "✅"]
+
+
+def make_post(rng: random.Random) -> str:
+    """Build a LinkedIn-style post with hooks, paragraphs and punctuation"""
+    paragraphs = []
+    for _ in range(rng.randint(1, 6)):
+        sentences = []
+        for _ in range(rng.randint(1, 4)):
+            words = rng.choices(WORDS, k=rng.randint(3, 18))
+            if rng.random() < 0.2:
+                words.append(rng.choice(EXTRAS))
+            sentences.append(" ".join(words) + rng.choice(PUNCTUATION))
+        paragraphs.append("\n".join(sentences) if rng.random() < 0.5 else " ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def legacy_totals(contents):
+    """The original per-post loop from calculate_all_metrics_vectorized"""
+    sentence_splitter = re.compile(r'[.!?]+(?:\s+|$)')
+    word_splitter = re.compile(r'\s+')
+    totals = dict(words=0, sentences=0, line_breaks=0, em_dashes=0, ellipses=0,
+                  questions=0, exclamations=0, paragraphs=0)
+    for content in contents:
+        if not content:
+            continue
+        totals['words'] += len(word_splitter.split(content))
+        totals['sentences'] += len([s for s in sentence_splitter.split(content) if s.strip()]) or 1
+        totals['line_breaks'] += content.count('\n')
+        totals['em_dashes'] += content.count('—') + content.count('--')
+        totals['ellipses'] += content.count('...') + content.count('…')
+        totals['questions'] += content.count('?')
+        totals['exclamations'] += content.count('!')
+        totals['paragraphs'] += len([p for p in content.split('\n\n') if p.strip()]) or 1
+    return totals
+
+
+def main():
+    num_posts = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    contents = [make_post(rng) for _ in range(num_posts)]
+    print(f"Generated {num_posts} posts ({sum(map(len, contents)) / 1e6:.1f}M chars)")
+
+    start = time.perf_counter()
+    legacy = legacy_totals(contents)
+    legacy_elapsed = time.perf_counter() - start
+
+    scanner = StylometryScanner()
+    start = time.perf_counter()
+    totals = scanner.scan(contents)
+    scanner_elapsed = time.perf_counter() - start
+
+    mismatches = {k: (v, getattr(totals, k)) for k, v in legacy.items() if getattr(totals, k) != v}
+    if mismatches:
+        print(f"MISMATCH: {mismatches}")
+        sys.exit(1)
+
+    print(f"Legacy loop (8 features):      {legacy_elapsed:.2f}s ({num_posts / legacy_elapsed:,.0f} posts/s)")
+    print(f"Scanner     (12 features):     {scanner_elapsed:.2f}s ({num_posts / scanner_elapsed:,.0f} posts/s)")
+    print(f"Speedup: {legacy_elapsed / scanner_elapsed:.1f}x, totals identical on shared features")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,94 +1,91 @@
 #cluster_posts.py
 
-import numpy as np
 from sklearn.cluster import KMeans
-from supabase import create_client
-import os
+import asyncio
 import sys
-import json
 from dotenv import load_dotenv
 
+from core.database import get_repository, close_repository
+from generate_voice_profiles import generate_voice_profiles_for_dirty_clusters
+from services.creator_runs import creator_runs
+from services.creator_snapshot import CreatorSnapshot
+from services.dirty_clusters import align_cluster_labels, dirty_clusters
+
 # Load environment variables
 load_dotenv()
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-
-def fetch_creator_posts(creator):
-    """Fetch all posts with embeddings for the given creator."""
-    response = supabase.table("creator_posts") \
-        .select("id, post_content, embedding") \
-        .eq("author", creator) \
-        .execute()
-    return response.data
 
-def cluster_creator_posts(creator, n_clusters=4):
+async def cluster_creator_posts(creator, n_clusters=4):
     """
     Cluster posts for a given creator into groups based on embedding similarity.
+    Holds the creator's lock like the API's recluster, and regenerates the
+    voice profiles of every cluster whose membership changed.
     
     Args:
         creator: The author name to cluster posts for
         n_clusters: Target number of clusters (default: 4)
     """
-    posts = fetch_creator_posts(creator)
-    if not posts:
+    async with creator_runs.lock(creator):
+        await cluster_creator_posts_locked(creator, n_clusters)
+
+async def cluster_creator_posts_locked(creator, n_clusters=4):
+    repository = get_repository()
+    snapshot = await CreatorSnapshot.load(repository, creator)
+    if not snapshot.post_count:
         print(f"No posts found for {creator}")
         return
     
-    # Filter out posts without embeddings and convert string embeddings to arrays
-    valid_posts = []
-    for p in posts:
-        if p.get('embedding'):
-            try:
-                # Convert string to array if needed
-                if isinstance(p['embedding'], str):
-                    p['embedding'] = json.loads(p['embedding'])
-                valid_posts.append(p)
-            except Exception as e:
-                print(f"Error processing embedding for post {p['id']}: {e}")
-                continue
-    
-    if not valid_posts:
+    # Posts with an embedding, and the cluster each is in now
+    ids, embeddings, previous_cluster_ids = snapshot.embedded_posts()
+    if not ids:
         print(f"No valid embeddings available for {creator}.")
         return
     
     # Adjust n_clusters if we have fewer posts
-    actual_clusters = min(n_clusters, len(valid_posts))
+    actual_clusters = min(n_clusters, len(ids))
     if actual_clusters < n_clusters:
-        print(f"Note: Only {len(valid_posts)} posts available. Adjusting from {n_clusters} to {actual_clusters} clusters.")
+        print(f"Note: Only {len(ids)} posts available. Adjusting from {n_clusters} to {actual_clusters} clusters.")
     
-    embeddings = np.array([p['embedding'] for p in valid_posts])
-    ids = [p['id'] for p in valid_posts]
-    contents = [p['post_content'] for p in valid_posts]
-    
-    print(f"Processing {len(valid_posts)} posts for clustering...")
+    print(f"Processing {len(ids)} posts for clustering...")
     
     # Run KMeans only if we have more than 1 post
-    if len(valid_posts) > 1:
+    if len(ids) > 1:
         kmeans = KMeans(n_clusters=actual_clusters, random_state=42, n_init=10)
         clusters = kmeans.fit_predict(embeddings)
     else:
         # If only 1 post, assign it to cluster 0
         clusters = [0]
     
-    # Update each post's cluster_id in Supabase
-    update_count = 0
-    for post_id, cluster_id in zip(ids, clusters):
-        try:
-            supabase.table("creator_posts") \
-                .update({"cluster_id": int(cluster_id)}) \
-                .eq("id", post_id) \
-                .execute()
-            update_count += 1
-        except Exception as e:
-            print(f"Error updating post {post_id}: {e}")
+    # Keep existing cluster ids stable and record which clusters changed
+    clusters = align_cluster_labels(previous_cluster_ids, clusters)
+    dirty_clusters.mark_assignments(creator, previous_cluster_ids, clusters)
+    snapshot.assign({
+        post_id: cluster_id
+        for post_id, previous, cluster_id in zip(ids, previous_cluster_ids, clusters)
+        if previous is None or int(previous) != cluster_id
+    })
     
-    print(f"\nSuccessfully clustered {update_count} posts for {creator} into {actual_clusters} clusters.")
+    # Write only the posts that moved - one assign_post_clusters RPC per chunk of posts
+    result = await snapshot.commit(repository)
+    for post_id in result.failed_ids:
+        print(f"Error updating post {post_id}")
+    if result.failed_ids:
+        # Profiles built from unsaved labels would disagree with the database
+        print(f"{len(result.failed_ids)} cluster ids were not saved; run again before regenerating profiles")
+        return
+    
+    print(f"\nSuccessfully clustered {len(ids)} posts for {creator} into {actual_clusters} clusters.")
+    print(f"Wrote {result.written} cluster ids in {result.requests} requests ({result.rows_per_second:.0f} posts/s)")
+    
+    profiles = await generate_voice_profiles_for_dirty_clusters(creator, snapshot=snapshot)
+    print(f"Regenerated {profiles} voice profiles")
     
     # Show sample posts by cluster
     print("\nSample posts by cluster:")
-    cluster_samples = {i: [] for i in range(actual_clusters)}
-    for idx, cluster_id in enumerate(clusters):
+    contents = {post['id']: post.get('post_content') or '' for post in snapshot.posts}
+    cluster_samples = {cluster_id: [] for cluster_id in sorted(set(clusters))}
+    for post_id, cluster_id in zip(ids, clusters):
         if len(cluster_samples[cluster_id]) < 2:  # only store 2 examples per cluster
-            snippet = contents[idx][:150].replace("\n", " ") + "..."
+            snippet = contents[post_id][:150].replace("\n", " ") + "..."
             cluster_samples[cluster_id].append(snippet)
     
     for c_id, samples in cluster_samples.items():
@@ -96,21 +93,26 @@ def cluster_creator_posts(creator, n_clusters=4):
         for s in samples:
             print(f"- {s}")
 
-def cluster_all_creators():
+async def cluster_all_creators():
     """Cluster posts for all creators in the database."""
     # Get all unique creators
-    response = supabase.table("creator_posts") \
-        .select("author") \
-        .execute()
-    
-    creators = list(set([p['author'] for p in response.data]))
+    creators = await get_repository().list_authors()
     print(f"Found {len(creators)} creators to process")
     
     for creator in creators:
         print(f"\n{'='*50}")
         print(f"Processing: {creator}")
         print(f"{'='*50}")
-        cluster_creator_posts(creator)
+        await cluster_creator_posts(creator)
+
+async def main(target):
+    try:
+        if target == "--all":
+            await cluster_all_creators()
+        else:
+            await cluster_creator_posts(target)
+    finally:
+        await close_repository()
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -119,8 +121,4 @@ if __name__ == "__main__":
         print("  python cluster_posts.py --all           # Cluster all creators")
         sys.exit(1)
     
-    if sys.argv[1] == "--all":
-        cluster_all_creators()
-    else:
-        creator_name = sys.argv[1]
-        cluster_creator_posts(creator_name)
+    asyncio.run(main(sys.argv[1]))
@@ -17,6 +17,13 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 BATCH_SIZE = 50
 EMBEDDING_BATCH_SIZE = 50
 DB_CHUNK_SIZE = 100
+DB_PAGE_SIZE = 1000  # PostgREST default max-rows
+DB_FILTER_CHUNK_SIZE = 200  # ids per in.(...) filter, keeps URLs short
+DB_MAX_CONNECTIONS = 20
+DB_TIMEOUT = 30.0
+DB_ASSIGN_CHUNK_SIZE = 1000  # (id, cluster_id) pairs per assign_post_clusters call
+DB_RETRY_ATTEMPTS = 3
+DB_RETRY_BACKOFF = 0.5  # seconds, doubled per attempt
 
 # Clustering Settings
 DEFAULT_N_CLUSTERS = 4
@@ -25,8 +32,79 @@ RECLUSTER_THRESHOLD = 0.3
 
 # Processing Settings
 MAX_WORKERS = 4
+CREATOR_CONCURRENCY = 8  # creators processed at once after an upload
+CLUSTER_PROCESSES = 2  # worker processes for KMeans
+PROGRESS_UPDATE_INTERVAL = 2.0  # seconds between uploaded_files progress writes
 POST_CONTENT_PREVIEW_LENGTH = 300
 
+# Upload Pipeline Settings
+PIPELINE_CHUNK_SIZE = DB_CHUNK_SIZE  # rows per chunk flowing through the stages
+PIPELINE_QUEUE_SIZE = 4  # chunks buffered between two stages
+EMBED_WORKERS = 4
+INSERT_WORKERS = 2
+
+# Job Queue Settings
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data"))
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(DATA_DIR, "jobs.sqlite3"))
+UPLOAD_SPOOL_DIR = os.path.join(DATA_DIR, "uploads")  # uploaded files waiting for their job
+JOB_WORKERS = 4
+JOB_TYPE_LIMITS = {
+    'process_file': 2,
+    'recluster': 2,
+    'resume_file': 1,
+    'creator_similarity': 1,
+    'topic_backfill': 1,
+}
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF = 30.0  # seconds, doubled per attempt
+JOB_POLL_INTERVAL = 1.0
+JOB_RETENTION = 7 * 24 * 3600.0  # seconds a done/failed job row is kept
+JOB_PURGE_INTERVAL = 3600.0
+
+# Status Stream Settings
+EVENT_HEARTBEAT_INTERVAL = 15.0  # seconds between keepalives on an idle stream
+EVENT_QUEUE_SIZE = 16  # events buffered per client; older ones are dropped first
+EVENT_SNAPSHOT_RETENTION = 500  # files whose latest status is kept in memory
+
+# Read Cache Settings
+STATS_CACHE_TTL = 30.0  # seconds /stats totals are served from memory
+CREATOR_DIRECTORY_MAX_AGE = 30  # seconds browsers reuse the creator list before revalidating
+POSTS_PAGE_MAX = 200  # largest page /api/creators/{author}/posts returns
+PROFILE_CACHE_SIZE = 256  # creators whose composite profile is kept in memory
+PROFILE_CACHE_TTL = 600.0  # seconds, for changes made by other processes
+PROFILE_POSTS_PAGE_SIZE = 50  # posts included with the composite profile
+
+# Response Settings
+COMPRESSION_MIN_SIZE = 1024  # bytes; smaller responses are sent uncompressed
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # fast enough to compress per request
+
+# Vector Search Settings
+VECTOR_INDEX_DIR = os.path.join(DATA_DIR, "vector_index")  # saved per-creator indexes
+VECTOR_INDEX_MAX_CREATORS = 64  # creator indexes kept in memory
+IVF_MIN_VECTORS = 4096  # smaller creators are searched exactly
+IVF_NPROBE = 8  # lists scanned per query
+IVF_TRAIN_ITERATIONS = 10
+IVF_TRAIN_SAMPLE = 20000  # vectors the list centroids are trained on
+VECTOR_INDEX_TAIL_FRACTION = 0.1  # unsorted new vectors allowed before merging them into lists
+QUERY_EMBEDDING_CACHE_SIZE = 2048  # query texts whose embedding is kept
+SEARCH_MAX_K = 100
+POST_NEIGHBORS_K = 10  # similar posts stored per post
+POST_NEIGHBORS_BLOCK = 1024  # posts scored at once when building the graph
+CREATOR_SIMILARITY_K = 20  # similar creators stored per creator
+CREATOR_SIMILARITY_STYLE_WEIGHT = 0.3  # share of stylometry in creator similarity, the rest is topics
+CREATOR_SIMILARITY_BLOCK = 1024  # creators scored at once
+VOICE_MATCH_TOP_K = 5  # clusters returned per draft by default
+VOICE_MATCH_MAX_DRAFTS = 32  # drafts per request
+VOICE_CENTROIDS_TTL = 600.0  # seconds before every centroid is reloaded, for other processes' writes
+
+# Topic Model Settings
+GLOBAL_TOPIC_COUNT = 64  # topics across every creator's posts
+TOPIC_DIMENSIONS = 256  # embeddings are randomly projected to this many dimensions first
+TOPIC_MODEL_PATH = os.path.join(DATA_DIR, "topic_model.joblib")
+TOPIC_QUEUE_SIZE = 64  # inserted chunks waiting for topics; beyond that the backfill job picks them up
+TOPIC_SAVE_INTERVAL = 60.0  # seconds between saves of the model while it is learning
+
 # Model Settings
 EMBEDDING_MODEL = "text-embedding-3-small"
 CHAT_MODEL = "gpt-3.5-turbo"
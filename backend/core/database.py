@@ -0,0 +1,800 @@
+"""
+Shared async data-access layer.
+Every backend module talks to Supabase (PostgREST + Storage) through one
+pooled HTTP/2 client. Pipeline queries are typed methods on Repository,
+built on a handful of primitives that both the HTTP backend and the
+in-memory fake (core/memory_database.py) implement.
+"""
+import abc
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import httpx
+
+from core.config import (
+    SUPABASE_URL, SUPABASE_KEY, DB_PAGE_SIZE, DB_CHUNK_SIZE,
+    DB_MAX_CONNECTIONS, DB_TIMEOUT, DB_FILTER_CHUNK_SIZE,
+    DB_ASSIGN_CHUNK_SIZE, DB_RETRY_ATTEMPTS, DB_RETRY_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+# Column sets per pipeline stage - embeddings are only pulled where used
+POST_METRIC_COLUMNS = "id, cluster_id, post_content, like_count, comment_count, repost_count"
+POST_EMBEDDING_COLUMNS = "id, embedding"
+# Voice profile columns shown on a creator's profile (no centroid)
+PROFILE_SUMMARY_COLUMNS = (
+    "cluster_id, cluster_name, cluster_description, voice_schema, engagement, performance_rank, top_post_ids"
+)
+# Columns a post listing may ask for; the embedding has to be requested explicitly
+POST_LIST_COLUMNS = (
+    "id, author, post_content, post_date, post_timestamp, post_url, imgurl, media_type, "
+    "like_count, comment_count, repost_count, cluster_id"
+)
+
+# Engagement rollup buckets (sql/engagement_rollups.sql); cluster -1 is the creator total
+ROLLUP_PERIODS = ('week', 'month')
+ROLLUP_ALL_CLUSTERS = -1
+
+# A filter is (column, "operator.value") in PostgREST syntax
+Filter = Tuple[str, str]
+
+
+class DatabaseError(Exception):
+    """Raised when a query fails"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class BulkWriteResult:
+    """Outcome of a chunked bulk write"""
+    written: int = 0
+    requests: int = 0
+    elapsed: float = 0.0
+    failed_ids: List[int] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.written / self.elapsed if self.elapsed > 0 else 0.0
+
+
+# Filter helpers
+def _quote(value: Any) -> str:
+    """Quote a value for use inside a PostgREST in.(...) list"""
+    if isinstance(value, str):
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{escaped}"'
+    return str(value)
+
+
+def eq(column: str, value: Any) -> Filter:
+    return (column, f"eq.{value}")
+
+
+def neq(column: str, value: Any) -> Filter:
+    return (column, f"neq.{value}")
+
+
+def gt(column: str, value: Any) -> Filter:
+    return (column, f"gt.{value}")
+
+
+def lt(column: str, value: Any) -> Filter:
+    return (column, f"lt.{value}")
+
+
+def in_(column: str, values: Iterable[Any]) -> Filter:
+    return (column, f"in.({','.join(_quote(v) for v in values)})")
+
+
+def not_in(column: str, values: Iterable[Any]) -> Filter:
+    return (column, f"not.in.({','.join(_quote(v) for v in values)})")
+
+
+def _condition(condition: Filter) -> str:
+    column, expression = condition
+    # Nested or/and groups are written column(...) instead of column.expression
+    return f"{column}{expression}" if column in ('or', 'and') else f"{column}.{expression}"
+
+
+def or_(*conditions: Filter) -> Filter:
+    return ('or', f"({','.join(_condition(c) for c in conditions)})")
+
+
+def and_(*conditions: Filter) -> Filter:
+    return ('and', f"({','.join(_condition(c) for c in conditions)})")
+
+
+def is_null(column: str) -> Filter:
+    return (column, "is.null")
+
+
+def not_null(column: str) -> Filter:
+    return (column, "not.is.null")
+
+
+def _period_start(timestamp: Any, period: str) -> Optional[date]:
+    """Monday of the week / first day of the month of a timestamp (UTC), like date_trunc"""
+    if not timestamp:
+        return None
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    day = timestamp.date()
+    return day - timedelta(days=day.weekday()) if period == 'week' else day.replace(day=1)
+
+
+def rollup_posts(posts: Iterable[Dict], period: str, cluster_id: int = ROLLUP_ALL_CLUSTERS,
+                 since: Optional[date] = None, until: Optional[date] = None) -> List[Dict]:
+    """Posts summed into period buckets, the rows get_engagement_series returns"""
+    buckets: Dict[date, Dict] = {}
+    for post in posts:
+        if cluster_id != ROLLUP_ALL_CLUSTERS and post.get('cluster_id') != cluster_id:
+            continue
+        start = _period_start(post.get('post_timestamp'), period)
+        if start is None or (since and start < since) or (until and start > until):
+            continue
+        bucket = buckets.setdefault(start, {'post_count': 0, 'likes': 0, 'comments': 0, 'reposts': 0})
+        bucket['post_count'] += 1
+        bucket['likes'] += post.get('like_count') or 0
+        bucket['comments'] += post.get('comment_count') or 0
+        bucket['reposts'] += post.get('repost_count') or 0
+    return [{'period_start': start.isoformat(), **buckets[start]} for start in sorted(buckets)]
+
+
+class Repository(abc.ABC):
+    """
+    Typed queries used by the pipeline and the API.
+    Subclasses implement the primitives (select, count, insert, upsert,
+    update, delete, rpc, upload); everything else is shared.
+    """
+
+    # Flipped off when the database lacks sql/assign_post_clusters.sql
+    _assign_rpc_available = True
+    # Flipped off when the database lacks sql/platform_stats.sql
+    _stats_rpc_available = True
+    # Flipped off when the database lacks sql/get_creator_stats.sql
+    _creator_stats_rpc_available = True
+    # Flipped off when the database lacks sql/engagement_rollups.sql
+    _rollups_rpc_available = True
+    # Flipped off when the database lacks sql/global_topics.sql
+    _topics_rpc_available = True
+    # Flipped off when the database lacks assign_post_topics (sql/global_topics.sql)
+    _assign_topics_rpc_available = True
+
+    # Primitives
+    @abc.abstractmethod
+    async def select(self, table: str, columns: str = "*", filters: Sequence[Filter] = (),
+                     order: Optional[str] = None, limit: Optional[int] = None,
+                     offset: Optional[int] = None) -> List[Dict]:
+        ...
+
+    @abc.abstractmethod
+    async def count(self, table: str, filters: Sequence[Filter] = ()) -> int:
+        ...
+
+    @abc.abstractmethod
+    async def insert(self, table: str, rows: List[Dict]) -> List[Dict]:
+        ...
+
+    @abc.abstractmethod
+    async def upsert(self, table: str, rows: List[Dict], on_conflict: str) -> List[Dict]:
+        ...
+
+    @abc.abstractmethod
+    async def update(self, table: str, values: Dict, filters: Sequence[Filter]) -> List[Dict]:
+        ...
+
+    @abc.abstractmethod
+    async def delete(self, table: str, filters: Sequence[Filter]) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def rpc(self, name: str, params: Optional[Dict] = None) -> Any:
+        ...
+
+    @abc.abstractmethod
+    async def upload(self, bucket: str, path: str, contents: bytes) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+    # Posts
+    async def iter_posts_by_author(self, author: str, columns: str, cluster_id: Optional[int] = None,
+                                   page_size: int = DB_PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        """Yield pages of an author's posts (optionally one cluster) with keyset pagination on id"""
+        if 'id' not in [c.strip() for c in columns.split(',')]:
+            columns = f"id, {columns}"
+
+        filters = [eq('author', author)]
+        if cluster_id is not None:
+            filters.append(eq('cluster_id', cluster_id))
+
+        last_id = None
+        while True:
+            page_filters = filters + ([gt('id', last_id)] if last_id is not None else [])
+            rows = await self.select('creator_posts', columns, page_filters, order='id', limit=page_size)
+            if not rows:
+                return
+
+            yield rows
+
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['id']
+
+    async def page_posts_by_author(self, author: str, columns: str, limit: int,
+                                   after: Optional[Tuple[Optional[str], int]] = None) -> List[Dict]:
+        """
+        One page of an author's posts, newest first, with keyset pagination on
+        (post_timestamp, id): after is the key of the previous page's last row.
+        Posts without a timestamp come last. Rows always include both key columns.
+
+        Each query bounds post_timestamp by an index-usable comparison
+        (lte / is null) so it seeks on creator_posts_author_timestamp_idx; a
+        page that runs out of dated posts is topped up from the undated tail.
+        """
+        wanted = [c.strip() for c in columns.split(',')]
+        columns = ', '.join(dict.fromkeys(['id', 'post_timestamp'] + wanted))
+        order = 'post_timestamp.desc.nullslast,id.desc'
+
+        if after is None:
+            return await self.select('creator_posts', columns, [eq('author', author)], order=order, limit=limit)
+
+        timestamp, last_id = after
+        if timestamp is None:
+            return await self.select('creator_posts', columns,
+                                     [eq('author', author), is_null('post_timestamp'), lt('id', last_id)],
+                                     order='id.desc', limit=limit)
+
+        quoted = _quote(timestamp)
+        rows = await self.select('creator_posts', columns, [
+            eq('author', author),
+            ('post_timestamp', f"lte.{quoted}"),
+            or_(('post_timestamp', f"lt.{quoted}"), lt('id', last_id)),
+        ], order=order, limit=limit)
+        if len(rows) < limit:
+            rows += await self.select('creator_posts', columns, [eq('author', author), is_null('post_timestamp')],
+                                      order='id.desc', limit=limit - len(rows))
+        return rows
+
+    async def fetch_posts_by_author(self, author: str, columns: str, cluster_id: Optional[int] = None) -> List[Dict]:
+        """Collect every page of an author's posts"""
+        posts = []
+        async for page in self.iter_posts_by_author(author, columns, cluster_id):
+            posts.extend(page)
+        return posts
+
+    async def fetch_posts_by_ids(self, post_ids: Sequence[int], columns: str) -> List[Dict]:
+        """Posts with the given ids (any order), read in id chunks"""
+        post_ids = list(post_ids)
+        chunks = await asyncio.gather(*[
+            self.select('creator_posts', columns, [in_('id', post_ids[i:i + DB_FILTER_CHUNK_SIZE])])
+            for i in range(0, len(post_ids), DB_FILTER_CHUNK_SIZE)
+        ])
+        return [row for chunk in chunks for row in chunk]
+
+    async def count_posts(self, author: Optional[str] = None) -> int:
+        """Exact post count, for one author or the whole table"""
+        return await self.count('creator_posts', [eq('author', author)] if author else [])
+
+    async def has_posts(self, author: str, clustered: Optional[bool] = None) -> bool:
+        """Whether an author has any posts (optionally: any clustered / unclustered ones)"""
+        filters = [eq('author', author)]
+        if clustered is True:
+            filters.append(not_null('cluster_id'))
+        elif clustered is False:
+            filters.append(is_null('cluster_id'))
+        return bool(await self.select('creator_posts', 'id', filters, limit=1))
+
+    async def list_authors(self) -> List[str]:
+        """Distinct authors in creator_posts, read in keyset pages"""
+        authors: Set[str] = set()
+        last_id = None
+        while True:
+            filters = [gt('id', last_id)] if last_id is not None else []
+            rows = await self.select('creator_posts', 'id, author', filters, order='id', limit=DB_PAGE_SIZE)
+            authors.update(row['author'] for row in rows if row.get('author'))
+            if len(rows) < DB_PAGE_SIZE:
+                return sorted(authors)
+            last_id = rows[-1]['id']
+
+    async def insert_posts(self, posts: List[Dict], chunk_size: int = DB_CHUNK_SIZE) -> List[int]:
+        """Bulk insert posts in concurrent chunks; returns new ids in input order"""
+        chunks = [posts[i:i + chunk_size] for i in range(0, len(posts), chunk_size)]
+        results = await asyncio.gather(*(self.insert('creator_posts', chunk) for chunk in chunks))
+        return [row['id'] for rows in results for row in rows]
+
+    async def update_post_clusters(self, assignments: Dict[int, int], chunk_size: int = DB_ASSIGN_CHUNK_SIZE,
+                                   attempts: int = DB_RETRY_ATTEMPTS) -> BulkWriteResult:
+        """
+        Bulk cluster_id update. Pairs are sent as parallel arrays to the
+        assign_post_clusters RPC, chunk_size pairs per request; chunks that
+        fail are retried with backoff and whatever still fails is returned
+        in failed_ids so the caller can retry just those posts.
+        """
+        start = time.perf_counter()
+        result = BulkWriteResult()
+        pairs = [(post_id, int(cluster_id)) for post_id, cluster_id in assignments.items()]
+        pending = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+
+        for attempt in range(1, attempts + 1):
+            if not pending:
+                break
+            if attempt > 1:
+                await asyncio.sleep(DB_RETRY_BACKOFF * 2 ** (attempt - 2))
+                logger.info(f"Retrying {len(pending)} failed cluster assignment chunks (attempt {attempt}/{attempts})")
+
+            outcomes = await asyncio.gather(*(self._assign_cluster_chunk(chunk) for chunk in pending),
+                                            return_exceptions=True)
+            failed = []
+            for chunk, outcome in zip(pending, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.warning(f"Cluster assignment chunk of {len(chunk)} posts failed: {outcome}")
+                    result.requests += 1
+                    failed.append(chunk)
+                else:
+                    result.written += len(chunk)
+                    result.requests += outcome
+            pending = failed
+
+        result.failed_ids = [post_id for chunk in pending for post_id, _ in chunk]
+        result.elapsed = time.perf_counter() - start
+
+        logger.info(f"Assigned {result.written} cluster ids in {result.requests} requests, "
+                    f"{result.elapsed:.2f}s ({result.rows_per_second:.0f} posts/s)")
+        if result.failed_ids:
+            logger.error(f"{len(result.failed_ids)} cluster assignments failed after {attempts} attempts")
+        return result
+
+    async def _assign_cluster_chunk(self, pairs: List[Tuple[int, int]]) -> int:
+        """Write one chunk of (id, cluster_id) pairs; returns the number of requests used"""
+        if self._assign_rpc_available:
+            try:
+                await self.rpc('assign_post_clusters', {
+                    'p_ids': [post_id for post_id, _ in pairs],
+                    'p_cluster_ids': [cluster_id for _, cluster_id in pairs]
+                })
+                return 1
+            except DatabaseError as e:
+                if e.status_code != 404:
+                    raise
+                logger.warning("assign_post_clusters RPC not installed, falling back to one PATCH per cluster")
+                self._assign_rpc_available = False
+
+        # Fallback: one PATCH per (cluster, id chunk) instead of one per post
+        ids_by_cluster: Dict[int, List[int]] = {}
+        for post_id, cluster_id in pairs:
+            ids_by_cluster.setdefault(cluster_id, []).append(post_id)
+
+        requests = []
+        for cluster_id, post_ids in ids_by_cluster.items():
+            for i in range(0, len(post_ids), DB_FILTER_CHUNK_SIZE):
+                chunk = post_ids[i:i + DB_FILTER_CHUNK_SIZE]
+                requests.append(self.update('creator_posts', {'cluster_id': cluster_id}, [in_('id', chunk)]))
+
+        await asyncio.gather(*requests)
+        return len(requests)
+
+    # Upload records
+    async def create_file_record(self, filename: str, status: str = 'processing') -> Dict:
+        rows = await self.insert('uploaded_files', [{'filename': filename, 'status': status}])
+        return rows[0]
+
+    async def get_file_record(self, file_id: str) -> Optional[Dict]:
+        rows = await self.select('uploaded_files', '*', [eq('id', file_id)], limit=1)
+        return rows[0] if rows else None
+
+    async def list_file_records(self, status: Optional[str] = None) -> List[Dict]:
+        return await self.select('uploaded_files', '*', [eq('status', status)] if status else [])
+
+    async def count_file_records(self) -> int:
+        return await self.count('uploaded_files')
+
+    async def update_file_record(self, file_id: str, values: Dict) -> None:
+        await self.update('uploaded_files', values, [eq('id', file_id)])
+
+    # Upload manifests (sql/upload_creators.sql)
+    async def list_upload_creators(self, file_id) -> List[Dict]:
+        """Manifest rows of an upload, paged by creator"""
+        rows: List[Dict] = []
+        last_creator = None
+        while True:
+            filters = [eq('file_id', file_id)]
+            if last_creator is not None:
+                filters.append(gt('creator', last_creator))
+            page = await self.select('upload_creators', '*', filters, order='creator', limit=DB_PAGE_SIZE)
+            rows.extend(page)
+            if len(page) < DB_PAGE_SIZE:
+                return rows
+            last_creator = page[-1]['creator']
+
+    async def get_upload_creator(self, file_id, creator: str) -> Optional[Dict]:
+        rows = await self.select('upload_creators', '*', [eq('file_id', file_id), eq('creator', creator)], limit=1)
+        return rows[0] if rows else None
+
+    async def upsert_upload_creators(self, rows: List[Dict]) -> None:
+        await self.upsert('upload_creators', rows, on_conflict='file_id,creator')
+
+    # Similar posts graph (sql/post_neighbors.sql)
+    async def iter_post_neighbors(self, author: str, page_size: int = DB_PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        """Yield pages of an author's neighbor rows with keyset pagination on post_id"""
+        last_id = None
+        while True:
+            filters = [eq('author', author)] + ([gt('post_id', last_id)] if last_id is not None else [])
+            rows = await self.select('post_neighbors', 'post_id, neighbor_ids, scores', filters,
+                                     order='post_id', limit=page_size)
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['post_id']
+
+    async def get_post_neighbors(self, post_id: int) -> Optional[Dict]:
+        rows = await self.select('post_neighbors', 'post_id, author, neighbor_ids, scores',
+                                 [eq('post_id', post_id)], limit=1)
+        return rows[0] if rows else None
+
+    async def upsert_post_neighbors(self, rows: List[Dict], chunk_size: int = DB_CHUNK_SIZE) -> None:
+        await asyncio.gather(*[
+            self.upsert('post_neighbors', rows[i:i + chunk_size], on_conflict='post_id')
+            for i in range(0, len(rows), chunk_size)
+        ])
+
+    # Similar creators (sql/creator_similarity.sql)
+    async def fetch_creator_similarity(self, page_size: int = DB_PAGE_SIZE) -> Dict[str, Dict]:
+        """Every stored similar-creators list, by creator"""
+        rows: Dict[str, Dict] = {}
+        offset = 0
+        while True:
+            page = await self.select('creator_similarity', 'creator, similar_creators, scores, feature_hash, feature',
+                                     order='creator', limit=page_size, offset=offset)
+            rows.update((row['creator'], row) for row in page)
+            if len(page) < page_size:
+                return rows
+            offset += page_size
+
+    async def get_creator_similarity(self, creator: str) -> Optional[Dict]:
+        rows = await self.select('creator_similarity', 'creator, similar_creators, scores, updated_at',
+                                 [eq('creator', creator)], limit=1)
+        return rows[0] if rows else None
+
+    async def upsert_creator_similarity(self, rows: List[Dict], chunk_size: int = DB_CHUNK_SIZE) -> None:
+        await asyncio.gather(*[
+            self.upsert('creator_similarity', rows[i:i + chunk_size], on_conflict='creator')
+            for i in range(0, len(rows), chunk_size)
+        ])
+
+    async def delete_creator_similarity(self, creators: List[str]) -> None:
+        await asyncio.gather(*[
+            self.delete('creator_similarity', [in_('creator', creators[i:i + DB_FILTER_CHUNK_SIZE])])
+            for i in range(0, len(creators), DB_FILTER_CHUNK_SIZE)
+        ])
+
+    # Global topics (sql/global_topics.sql)
+    async def iter_untopiced_posts(self, columns: str, page_size: int = DB_PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+        """Yield pages of posts with an embedding but no topic yet, keyset-paginated on id"""
+        last_id = None
+        while True:
+            filters = [is_null('topic_id'), not_null('embedding')]
+            if last_id is not None:
+                filters.append(gt('id', last_id))
+            rows = await self.select('creator_posts', columns, filters, order='id', limit=page_size)
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['id']
+
+    async def update_post_topics(self, assignments: Dict[int, int], chunk_size: int = DB_ASSIGN_CHUNK_SIZE) -> int:
+        """
+        Set topic_id through the assign_post_topics RPC, chunk_size
+        (id, topic_id) pairs per request; returns the request count
+        """
+        pairs = [(post_id, int(topic_id)) for post_id, topic_id in assignments.items()]
+        chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        return sum(await asyncio.gather(*(self._assign_topic_chunk(chunk) for chunk in chunks)))
+
+    async def _assign_topic_chunk(self, pairs: List[Tuple[int, int]]) -> int:
+        """Write one chunk of (id, topic_id) pairs; returns the number of requests used"""
+        if self._assign_topics_rpc_available:
+            try:
+                await self.rpc('assign_post_topics', {
+                    'p_ids': [post_id for post_id, _ in pairs],
+                    'p_topic_ids': [topic_id for _, topic_id in pairs]
+                })
+                return 1
+            except DatabaseError as e:
+                if e.status_code != 404:
+                    raise
+                logger.warning("assign_post_topics RPC not installed, falling back to one PATCH per topic")
+                self._assign_topics_rpc_available = False
+
+        # Fallback: one PATCH per (topic, id chunk)
+        ids_by_topic: Dict[int, List[int]] = {}
+        for post_id, topic_id in pairs:
+            ids_by_topic.setdefault(topic_id, []).append(post_id)
+
+        requests = [
+            self.update('creator_posts', {'topic_id': topic_id}, [in_('id', post_ids[i:i + DB_FILTER_CHUNK_SIZE])])
+            for topic_id, post_ids in ids_by_topic.items()
+            for i in range(0, len(post_ids), DB_FILTER_CHUNK_SIZE)
+        ]
+        await asyncio.gather(*requests)
+        return len(requests)
+
+    async def topic_stats(self) -> List[Dict]:
+        """Post count and summed likes / comments / reposts per topic, largest first"""
+        if self._topics_rpc_available:
+            try:
+                return await self.rpc('get_topic_stats', {})
+            except DatabaseError as e:
+                if e.status_code != 404:
+                    raise
+                logger.warning("get_topic_stats RPC not installed, aggregating topics from the posts here")
+                self._topics_rpc_available = False
+
+        totals: Dict[int, Dict] = {}
+        last_id = None
+        while True:
+            filters = [not_null('topic_id')] + ([gt('id', last_id)] if last_id is not None else [])
+            rows = await self.select('creator_posts', 'id, topic_id, like_count, comment_count, repost_count',
+                                     filters, order='id', limit=DB_PAGE_SIZE)
+            for row in rows:
+                topic = totals.setdefault(row['topic_id'], {
+                    'topic_id': row['topic_id'], 'post_count': 0, 'likes': 0, 'comments': 0, 'reposts': 0
+                })
+                topic['post_count'] += 1
+                topic['likes'] += row.get('like_count') or 0
+                topic['comments'] += row.get('comment_count') or 0
+                topic['reposts'] += row.get('repost_count') or 0
+            if len(rows) < DB_PAGE_SIZE:
+                break
+            last_id = rows[-1]['id']
+        return sorted(totals.values(), key=lambda topic: (-topic['post_count'], topic['topic_id']))
+
+    # Platform totals (sql/platform_stats.sql)
+    async def platform_stats(self) -> Dict[str, int]:
+        """Total posts, unique authors and uploaded files"""
+        if self._stats_rpc_available:
+            try:
+                rows = await self.rpc('get_platform_stats', {})
+                if rows:
+                    return {key: int(value or 0) for key, value in rows[0].items()}
+            except DatabaseError as e:
+                if e.status_code != 404:
+                    raise
+                logger.warning("get_platform_stats RPC not installed, counting posts and files directly")
+                self._stats_rpc_available = False
+
+        total_posts, authors, files_processed = await asyncio.gather(
+            self.count_posts(), self.list_authors(), self.count_file_records()
+        )
+        return {'total_posts': total_posts, 'unique_authors': len(authors), 'files_processed': files_processed}
+
+    # Creators and voice profiles
+    async def list_creators(self) -> List[Dict]:
+        return await self.select('creators', '*')
+
+    async def get_creator(self, author: str) -> Optional[Dict]:
+        rows = await self.select('creators', '*', [eq('author', author)], limit=1)
+        return rows[0] if rows else None
+
+    async def get_creator_stats(self, author: str) -> Dict[str, int]:
+        """Post count, average likes / engagement and profile count of one creator"""
+        if self._creator_stats_rpc_available:
+            try:
+                rows = await self.rpc('get_creator_stats', {'p_author': author})
+                row = rows[0] if rows else {}
+                return {
+                    'post_count': int(row.get('total_posts') or 0),
+                    'avg_likes': int(row.get('average_likes') or 0),
+                    'avg_engagement': int(row.get('average_engagement') or 0),
+                    'voice_profiles_count': int(row.get('total_voice_profiles') or 0)
+                }
+            except DatabaseError as e:
+                if e.status_code != 404:
+                    raise
+                logger.warning("get_creator_stats RPC not installed, aggregating the creator's posts here")
+                self._creator_stats_rpc_available = False
+
+        posts, voice_profiles_count = await asyncio.gather(
+            self.fetch_posts_by_author(author, 'like_count, comment_count, repost_count'),
+            self.count_voice_profiles(author)
+        )
+        likes = sum(post.get('like_count') or 0 for post in posts)
+        engagement = likes + sum((post.get('comment_count') or 0) + (post.get('repost_count') or 0) for post in posts)
+        return {
+            'post_count': len(posts),
+            'avg_likes': round(likes / len(posts)) if posts else 0,
+            'avg_engagement': round(engagement / len(posts)) if posts else 0,
+            'voice_profiles_count': voice_profiles_count
+        }
+
+    async def engagement_series(self, author: str, period: str, cluster_id: int = ROLLUP_ALL_CLUSTERS,
+                                since: Optional[date] = None, until: Optional[date] = None) -> List[Dict]:
+        """Post count and summed likes / comments / reposts per week or month, oldest first"""
+        if self._rollups_rpc_available:
+            try:
+                return await self.rpc('get_engagement_series', {
+                    'p_author': author, 'p_period': period, 'p_cluster_id': cluster_id,
+                    'p_since': since.isoformat() if since else None,
+                    'p_until': until.isoformat() if until else None
+                })
+            except DatabaseError as e:
+                if e.status_code != 404:
+                    raise
+                logger.warning("get_engagement_series RPC not installed, bucketing the creator's posts here")
+                self._rollups_rpc_available = False
+
+        posts = await self.fetch_posts_by_author(
+            author, 'post_timestamp, cluster_id, like_count, comment_count, repost_count'
+        )
+        return rollup_posts(posts, period, cluster_id, since, until)
+
+    async def list_voice_profiles(self, creator: str, columns: str = "*") -> List[Dict]:
+        """A creator's voice profiles, best performing first"""
+        return await self.select('creator_voice_profiles', columns, [eq('creator', creator)],
+                                 order='performance_rank.asc.nullslast,cluster_id')
+
+    async def iter_voice_profiles(self, columns: str, page_size: int = DB_PAGE_SIZE,
+                                  creators: Optional[List[str]] = None) -> AsyncIterator[List[Dict]]:
+        """Yield pages of every creator's (or the given creators') voice profiles, ordered by creator and cluster"""
+        if creators is None:
+            groups = [[]]
+        else:
+            creators = sorted(set(creators))
+            groups = [creators[i:i + DB_FILTER_CHUNK_SIZE] for i in range(0, len(creators), DB_FILTER_CHUNK_SIZE)]
+
+        for group in groups:
+            filters = [in_('creator', group)] if group else []
+            offset = 0
+            while True:
+                rows = await self.select('creator_voice_profiles', columns, filters, order='creator,cluster_id',
+                                         limit=page_size, offset=offset)
+                if rows:
+                    yield rows
+                if len(rows) < page_size:
+                    break
+                offset += page_size
+
+    async def count_voice_profiles(self, creator: str) -> int:
+        return await self.count('creator_voice_profiles', [eq('creator', creator)])
+
+    async def fetch_profile_engagement(self, creator: str) -> Dict[int, float]:
+        """Saved total_engagement per cluster of a creator"""
+        rows = await self.select('creator_voice_profiles', 'cluster_id, engagement', [eq('creator', creator)])
+        return {
+            row['cluster_id']: (row.get('engagement') or {}).get('total_engagement', 0)
+            for row in rows
+        }
+
+
+class PostgrestRepository(Repository):
+    """Repository backed by Supabase's REST APIs over a pooled HTTP/2 client"""
+
+    def __init__(self, url: str, key: str, max_connections: int = DB_MAX_CONNECTIONS,
+                 timeout: float = DB_TIMEOUT, transport: Optional[httpx.AsyncBaseTransport] = None):
+        if not url or not key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY are required")
+
+        self.url = url.rstrip('/')
+        self.client = httpx.AsyncClient(
+            http2=transport is None,
+            transport=transport,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            headers={
+                'apikey': key,
+                'Authorization': f'Bearer {key}'
+            }
+        )
+
+    def _rest(self, path: str) -> str:
+        return f"{self.url}/rest/v1/{path}"
+
+    def _params(self, filters: Sequence[Filter], **extra) -> List[Tuple[str, str]]:
+        params = list(filters)
+        params.extend((k, str(v)) for k, v in extra.items() if v is not None)
+        return params
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            raise DatabaseError(f"{method} {url} failed: {e}") from e
+
+        if not response.is_success:
+            raise DatabaseError(
+                f"{method} {url} returned {response.status_code}: {response.text[:500]}",
+                status_code=response.status_code
+            )
+        return response
+
+    async def select(self, table, columns="*", filters=(), order=None, limit=None, offset=None):
+        params = self._params(filters, select=columns.replace(' ', ''), order=order, limit=limit, offset=offset)
+        response = await self._request('GET', self._rest(table), params=params)
+        return response.json()
+
+    async def count(self, table, filters=()):
+        params = self._params(filters, select='id', limit=0)
+        response = await self._request('HEAD', self._rest(table), params=params,
+                                       headers={'Prefer': 'count=exact'})
+        # Content-Range: */123 (or 0-0/123)
+        return int(response.headers.get('content-range', '*/0').split('/')[-1])
+
+    async def insert(self, table, rows):
+        if not rows:
+            return []
+        response = await self._request('POST', self._rest(table), json=rows,
+                                       headers={'Prefer': 'return=representation'})
+        return response.json()
+
+    async def upsert(self, table, rows, on_conflict):
+        if not rows:
+            return []
+        response = await self._request(
+            'POST', self._rest(table), json=rows,
+            params={'on_conflict': on_conflict},
+            headers={'Prefer': 'resolution=merge-duplicates,return=representation'}
+        )
+        return response.json()
+
+    async def update(self, table, values, filters):
+        response = await self._request('PATCH', self._rest(table), json=values,
+                                       params=self._params(filters),
+                                       headers={'Prefer': 'return=representation'})
+        return response.json()
+
+    async def delete(self, table, filters):
+        await self._request('DELETE', self._rest(table), params=self._params(filters))
+
+    async def rpc(self, name, params=None):
+        response = await self._request('POST', self._rest(f"rpc/{name}"), json=params or {})
+        return response.json() if response.content else None
+
+    async def upload(self, bucket, path, contents):
+        await self._request('POST', f"{self.url}/storage/v1/object/{bucket}/{path}", content=contents,
+                            headers={'Content-Type': 'application/octet-stream'})
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_repository: Optional[Repository] = None
+
+
+def get_repository() -> Repository:
+    """Process-wide repository (created on first use)"""
+    global _repository
+    if _repository is None:
+        _repository = PostgrestRepository(SUPABASE_URL, SUPABASE_KEY)
+    return _repository
+
+
+def set_repository(repository: Repository) -> None:
+    """Swap the process-wide repository, e.g. for InMemoryRepository in tests"""
+    global _repository
+    _repository = repository
+
+
+async def close_repository() -> None:
+    global _repository
+    if _repository is not None:
+        await _repository.close()
+        _repository = None
@@ -0,0 +1,310 @@
+"""
+In-memory Repository for tests and local runs without Supabase.
+Understands the PostgREST filter syntax produced by core.database helpers,
+so typed queries exercise the same code paths as in production.
+"""
+import copy
+import itertools
+from collections import Counter
+from datetime import date
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from core.database import Repository, DatabaseError, rollup_posts
+
+_IN_VALUE = re.compile(r'"((?:[^"\\]|\\.)*)"|([^,]+)')
+
+
+def _coerce(raw: str, current: Any) -> Any:
+    """Convert a filter literal to the type of the stored value"""
+    if current is None or isinstance(current, str):
+        return raw
+    if isinstance(current, bool):
+        return raw.lower() == 'true'
+    try:
+        return type(current)(raw)
+    except (TypeError, ValueError):
+        return raw
+
+
+def _parse_in(raw: str) -> List[str]:
+    body = raw[1:-1] if raw.startswith('(') and raw.endswith(')') else raw
+    return [
+        quoted.replace('\\"', '"').replace('\\\\', '\\') if quoted else plain
+        for quoted, plain in _IN_VALUE.findall(body)
+    ]
+
+
+def _assign_post_clusters(repo: 'InMemoryRepository', p_ids: List[int], p_cluster_ids: List[int]) -> int:
+    """Stand-in for sql/assign_post_clusters.sql"""
+    if len(p_ids) != len(p_cluster_ids):
+        raise DatabaseError("p_ids and p_cluster_ids must have the same length", status_code=400)
+    targets = dict(zip(p_ids, p_cluster_ids))
+    updated = 0
+    for row in repo.tables.get('creator_posts', []):
+        if row.get('id') in targets and row.get('cluster_id') != targets[row['id']]:
+            row['cluster_id'] = targets[row['id']]
+            updated += 1
+    return updated
+
+
+def _split_conditions(body: str) -> List[str]:
+    """Split an or/and group body on top-level commas"""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(body):
+        if char == '"' and (i == 0 or body[i - 1] != '\\'):
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and char == ',' and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return parts
+
+
+def _matches_group(row: Dict, operator: str, body: str) -> bool:
+    results = []
+    for condition in _split_conditions(body[1:-1]):
+        if condition.startswith(('or(', 'and(')):
+            name, _, rest = condition.partition('(')
+            results.append(_matches_group(row, name, '(' + rest))
+        else:
+            column, _, expression = condition.partition('.')
+            results.append(_matches(row, column, expression))
+    return any(results) if operator == 'or' else all(results)
+
+
+def _matches(row: Dict, column: str, expression: str) -> bool:
+    if column in ('or', 'and'):
+        return _matches_group(row, column, expression)
+
+    negate = expression.startswith('not.')
+    if negate:
+        expression = expression[4:]
+
+    op, _, raw = expression.partition('.')
+    if len(raw) > 1 and raw.startswith('"') and raw.endswith('"'):
+        raw = raw[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    value = row.get(column)
+
+    if op == 'is':
+        result = value is None if raw == 'null' else value is (raw == 'true')
+    elif op == 'in':
+        result = value is not None and value in [_coerce(v, value) for v in _parse_in(raw)]
+    elif value is None:
+        result = False
+    else:
+        target = _coerce(raw, value)
+        result = {
+            'eq': lambda: value == target,
+            'neq': lambda: value != target,
+            'gt': lambda: value > target,
+            'gte': lambda: value >= target,
+            'lt': lambda: value < target,
+            'lte': lambda: value <= target,
+        }[op]()
+
+    return not result if negate else result
+
+
+def _get_platform_stats(repo: 'InMemoryRepository') -> List[Dict]:
+    """Stand-in for sql/platform_stats.sql"""
+    posts = repo.tables.get('creator_posts', [])
+    return [{
+        'total_posts': len(posts),
+        'unique_authors': len({row['author'] for row in posts if row.get('author')}),
+        'files_processed': len(repo.tables.get('uploaded_files', []))
+    }]
+
+
+def _get_creators_with_stats(repo: 'InMemoryRepository') -> List[Dict]:
+    """Stand-in for the get_creators_with_stats database function"""
+    posts_by_author: Dict[str, List[Dict]] = {}
+    for row in repo.tables.get('creator_posts', []):
+        posts_by_author.setdefault(row.get('author'), []).append(row)
+    profiles = Counter(row.get('creator') for row in repo.tables.get('creator_voice_profiles', []))
+
+    rows = []
+    for creator in repo.tables.get('creators', []):
+        posts = posts_by_author.get(creator['author'], [])
+        likes = sum(post.get('like_count') or 0 for post in posts)
+        engagement = likes + sum((post.get('comment_count') or 0) + (post.get('repost_count') or 0) for post in posts)
+        rows.append({
+            'creator_id': creator['id'],
+            'creator_name': creator['author'],
+            'creator_headline': creator.get('headline'),
+            'creator_location': creator.get('location'),
+            'creator_avatar_url': creator.get('avatar_url'),
+            'creator_linkedin_url': creator.get('linkedin_url'),
+            'creator_created_at': creator.get('created_at'),
+            'total_posts': len(posts),
+            'average_likes': round(likes / len(posts)) if posts else 0,
+            'average_engagement': round(engagement / len(posts)) if posts else 0,
+            'total_voice_profiles': profiles[creator['author']]
+        })
+    return sorted(rows, key=lambda row: row['total_posts'], reverse=True)
+
+
+def _get_creator_stats(repo: 'InMemoryRepository', p_author: str) -> List[Dict]:
+    """Stand-in for sql/get_creator_stats.sql"""
+    posts = [row for row in repo.tables.get('creator_posts', []) if row.get('author') == p_author]
+    likes = sum(post.get('like_count') or 0 for post in posts)
+    engagement = likes + sum((post.get('comment_count') or 0) + (post.get('repost_count') or 0) for post in posts)
+    return [{
+        'total_posts': len(posts),
+        'average_likes': round(likes / len(posts)) if posts else 0,
+        'average_engagement': round(engagement / len(posts)) if posts else 0,
+        'total_voice_profiles': sum(
+            1 for row in repo.tables.get('creator_voice_profiles', []) if row.get('creator') == p_author
+        )
+    }]
+
+
+def _get_engagement_series(repo: 'InMemoryRepository', p_author: str, p_period: str, p_cluster_id: int = -1,
+                           p_since: Optional[str] = None, p_until: Optional[str] = None) -> List[Dict]:
+    """Stand-in for sql/engagement_rollups.sql (buckets computed from the posts)"""
+    posts = [row for row in repo.tables.get('creator_posts', []) if row.get('author') == p_author]
+    return rollup_posts(posts, p_period, p_cluster_id,
+                        date.fromisoformat(p_since) if p_since else None,
+                        date.fromisoformat(p_until) if p_until else None)
+
+
+def _assign_post_topics(repo: 'InMemoryRepository', p_ids: List[int], p_topic_ids: List[int]) -> int:
+    """Stand-in for assign_post_topics in sql/global_topics.sql"""
+    if len(p_ids) != len(p_topic_ids):
+        raise DatabaseError("p_ids and p_topic_ids must have the same length", status_code=400)
+    targets = dict(zip(p_ids, p_topic_ids))
+    updated = 0
+    for row in repo.tables.get('creator_posts', []):
+        if row.get('id') in targets and row.get('topic_id') != targets[row['id']]:
+            row['topic_id'] = targets[row['id']]
+            updated += 1
+    return updated
+
+
+def _get_topic_stats(repo: 'InMemoryRepository') -> List[Dict]:
+    """Stand-in for sql/global_topics.sql"""
+    totals: Dict[int, Dict] = {}
+    for row in repo.tables.get('creator_posts', []):
+        if row.get('topic_id') is None:
+            continue
+        topic = totals.setdefault(row['topic_id'], {
+            'topic_id': row['topic_id'], 'post_count': 0, 'likes': 0, 'comments': 0, 'reposts': 0
+        })
+        topic['post_count'] += 1
+        topic['likes'] += row.get('like_count') or 0
+        topic['comments'] += row.get('comment_count') or 0
+        topic['reposts'] += row.get('repost_count') or 0
+    return sorted(totals.values(), key=lambda topic: (-topic['post_count'], topic['topic_id']))
+
+
+class InMemoryRepository(Repository):
+    """Dict-backed tables with auto-increment ids and pluggable RPCs"""
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict]]] = None):
+        self.tables: Dict[str, List[Dict]] = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.rpcs: Dict[str, Callable[..., Any]] = {
+            'assign_post_clusters': _assign_post_clusters,
+            'get_platform_stats': _get_platform_stats,
+            'get_creators_with_stats': _get_creators_with_stats,
+            'get_creator_stats': _get_creator_stats,
+            'get_engagement_series': _get_engagement_series,
+            'get_topic_stats': _get_topic_stats,
+            'assign_post_topics': _assign_post_topics,
+        }
+        self.files: Dict[str, bytes] = {}
+        self.request_count = 0
+        self._ids = itertools.count(
+            max((row.get('id', 0) for rows in self.tables.values() for row in rows
+                 if isinstance(row.get('id'), int)), default=0) + 1
+        )
+
+    def register_rpc(self, name: str, handler: Callable[..., Any]) -> None:
+        """Install a Python stand-in for a database function"""
+        self.rpcs[name] = handler
+
+    def _rows(self, table: str, filters) -> List[Dict]:
+        rows = self.tables.setdefault(table, [])
+        return [row for row in rows if all(_matches(row, column, expr) for column, expr in filters)]
+
+    async def select(self, table, columns="*", filters=(), order=None, limit=None, offset=None):
+        self.request_count += 1
+        rows = self._rows(table, filters)
+
+        for part in reversed((order or '').split(',')):
+            if not part:
+                continue
+            column, _, modifiers = part.partition('.')
+            modifiers = modifiers.split('.')
+            descending = 'desc' in modifiers
+            # Postgres default: nulls sort as the largest value
+            nulls_first = 'nullsfirst' in modifiers or (descending and 'nullslast' not in modifiers)
+            present = sorted((r for r in rows if r.get(column) is not None),
+                             key=lambda r: r[column], reverse=descending)
+            missing = [r for r in rows if r.get(column) is None]
+            rows = missing + present if nulls_first else present + missing
+
+        rows = rows[offset or 0:]
+        if limit is not None:
+            rows = rows[:limit]
+
+        if columns.strip() == '*':
+            return copy.deepcopy(rows)
+        wanted = [c.strip() for c in columns.split(',')]
+        return [{c: copy.deepcopy(row.get(c)) for c in wanted} for row in rows]
+
+    async def count(self, table, filters=()):
+        self.request_count += 1
+        return len(self._rows(table, filters))
+
+    async def insert(self, table, rows):
+        self.request_count += 1
+        stored = []
+        for row in rows:
+            row = copy.deepcopy(row)
+            row.setdefault('id', next(self._ids))
+            self.tables.setdefault(table, []).append(row)
+            stored.append(copy.deepcopy(row))
+        return stored
+
+    async def upsert(self, table, rows, on_conflict):
+        self.request_count += 1
+        keys = [k.strip() for k in on_conflict.split(',')]
+        stored = []
+        for row in rows:
+            existing = next((r for r in self.tables.setdefault(table, [])
+                             if all(r.get(k) == row.get(k) for k in keys)), None)
+            if existing is not None:
+                existing.update(copy.deepcopy(row))
+                stored.append(copy.deepcopy(existing))
+            else:
+                row = copy.deepcopy(row)
+                row.setdefault('id', next(self._ids))
+                self.tables[table].append(row)
+                stored.append(copy.deepcopy(row))
+        return stored
+
+    async def update(self, table, values, filters):
+        self.request_count += 1
+        rows = self._rows(table, filters)
+        for row in rows:
+            row.update(copy.deepcopy(values))
+        return copy.deepcopy(rows)
+
+    async def delete(self, table, filters):
+        self.request_count += 1
+        doomed = {id(row) for row in self._rows(table, filters)}
+        self.tables[table] = [row for row in self.tables.get(table, []) if id(row) not in doomed]
+
+    async def rpc(self, name, params=None):
+        self.request_count += 1
+        if name not in self.rpcs:
+            raise DatabaseError(f"function {name} does not exist", status_code=404)
+        return self.rpcs[name](self, **(params or {}))
+
+    async def upload(self, bucket, path, contents):
+        self.request_count += 1
+        self.files[f"{bucket}/{path}"] = contents
@@ -11,7 +11,7 @@ import logging
 import sys
 import asyncio
 import concurrent.futures
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Set, Tuple, Any
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from functools import lru_cache
@@ -21,10 +21,17 @@ import time
 
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
-from supabase import create_client
 from dotenv import load_dotenv
 import openai
 
+from core.database import (
+    get_repository, close_repository, eq, not_in, DatabaseError,
+    POST_METRIC_COLUMNS, POST_EMBEDDING_COLUMNS
+)
+from services.creator_snapshot import CreatorSnapshot
+from services.dirty_clusters import dirty_clusters
+from services.stylometry import StylometryScanner
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -44,7 +51,6 @@ try:
     if not all([SUPABASE_URL, SUPABASE_KEY, OPENAI_API_KEY]):
         raise ValueError("Missing required environment variables")
     
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     openai.api_key = OPENAI_API_KEY
     
 except Exception as e:
@@ -63,6 +69,10 @@ class ClusterMetrics:
     ellipses_per_100_words: float
     questions_per_100_words: float
     exclamations_per_100_words: float
+    emojis_per_100_words: float
+    hashtags_per_post: float
+    mentions_per_post: float
+    avg_hook_line_words: float
     avg_paragraphs_per_post: float
     avg_words_per_post: float
     avg_likes: float
@@ -76,10 +86,9 @@ class FastVoiceProfileGenerator:
     """Ultra-optimized voice profile generator"""
     
     def __init__(self):
-        self.supabase = supabase
-        # Pre-compile regex patterns
-        self.sentence_splitter = re.compile(r'[.!?]+(?:\s+|$)')
-        self.word_splitter = re.compile(r'\s+')
+        self.db = get_repository()
+        # Buffer-level stylometry (replaces per-post regex splitting)
+        self.scanner = StylometryScanner()
         # Thread pool for parallel processing
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
         
@@ -103,82 +112,68 @@ class FastVoiceProfileGenerator:
             if post.get('embedding') and isinstance(post['embedding'], str):
                 post['embedding'] = self.parse_embedding_cached(post['embedding'])
     
+    async def attach_cluster_embeddings(self, creator: str, cluster_id: int, posts: List[Dict]) -> None:
+        """Stream one cluster's embeddings page by page and attach them to its posts"""
+        posts_by_id = {post['id']: post for post in posts}
+        
+        async for page in self.db.iter_posts_by_author(creator, POST_EMBEDDING_COLUMNS, cluster_id=cluster_id):
+            self.batch_process_embeddings(page)
+            for row in page:
+                post = posts_by_id.get(row['id'])
+                if post is not None:
+                    post['embedding'] = row.get('embedding')
+    
     def calculate_all_metrics_vectorized(self, posts_by_cluster: Dict[int, List[Dict]]) -> Dict[int, ClusterMetrics]:
-        """Calculate all metrics for all clusters in one pass"""
+        """Calculate all metrics for all clusters, one buffer scan per cluster"""
         results = {}
         
         for cluster_id, posts in posts_by_cluster.items():
             if not posts:
                 continue
-                
-            # Vectorized calculations
-            metrics_arrays = {
-                'words': [],
-                'sentences': [],
-                'line_breaks': [],
-                'em_dashes': [],
-                'ellipses': [],
-                'questions': [],
-                'exclamations': [],
-                'paragraphs': [],
-                'likes': [],
-                'comments': [],
-                'reposts': []
-            }
             
-            for post in posts:
-                content = post.get('post_content', '')
-                if not content:
-                    continue
-                
-                # Count everything in one pass
-                words = len(self.word_splitter.split(content))
-                sentences = len([s for s in self.sentence_splitter.split(content) if s.strip()])
-                
-                metrics_arrays['words'].append(words)
-                metrics_arrays['sentences'].append(sentences or 1)
-                metrics_arrays['line_breaks'].append(content.count('\n'))
-                metrics_arrays['em_dashes'].append(content.count('—') + content.count('--'))
-                metrics_arrays['ellipses'].append(content.count('...') + content.count('…'))
-                metrics_arrays['questions'].append(content.count('?'))
-                metrics_arrays['exclamations'].append(content.count('!'))
-                metrics_arrays['paragraphs'].append(len([p for p in content.split('\n\n') if p.strip()]) or 1)
-                metrics_arrays['likes'].append(int(post.get('like_count', 0)))
-                metrics_arrays['comments'].append(int(post.get('comment_count', 0)))
-                metrics_arrays['reposts'].append(int(post.get('repost_count', 0)))
+            # Text features - scanned over the whole cluster at once
+            totals = self.scanner.scan([post.get('post_content') or '' for post in posts])
+            if not totals.post_count:
+                continue
             
-            # Calculate all averages using numpy (much faster)
-            if metrics_arrays['words']:
-                total_words = sum(metrics_arrays['words'])
-                total_sentences = sum(metrics_arrays['sentences'])
-                num_posts = len(posts)
-                
-                # Get top posts by engagement
-                engagements = [l + c + r for l, c, r in zip(
-                    metrics_arrays['likes'], 
-                    metrics_arrays['comments'], 
-                    metrics_arrays['reposts']
-                )]
-                top_indices = np.argsort(engagements)[-3:][::-1]
-                top_post_ids = [posts[i]['id'] for i in top_indices if i < len(posts)]
-                
-                results[cluster_id] = ClusterMetrics(
-                    cluster_id=cluster_id,
-                    post_count=num_posts,
-                    avg_words_per_sentence=round(total_words / total_sentences, 1) if total_sentences > 0 else 0,
-                    line_breaks_per_100_words=round(sum(metrics_arrays['line_breaks']) / total_words * 100, 1) if total_words > 0 else 0,
-                    em_dashes_per_100_words=round(sum(metrics_arrays['em_dashes']) / total_words * 100, 2) if total_words > 0 else 0,
-                    ellipses_per_100_words=round(sum(metrics_arrays['ellipses']) / total_words * 100, 2) if total_words > 0 else 0,
-                    questions_per_100_words=round(sum(metrics_arrays['questions']) / total_words * 100, 2) if total_words > 0 else 0,
-                    exclamations_per_100_words=round(sum(metrics_arrays['exclamations']) / total_words * 100, 2) if total_words > 0 else 0,
-                    avg_paragraphs_per_post=round(np.mean(metrics_arrays['paragraphs']), 1),
-                    avg_words_per_post=round(total_words / num_posts, 0),
-                    avg_likes=round(np.mean(metrics_arrays['likes']), 0),
-                    avg_comments=round(np.mean(metrics_arrays['comments']), 0),
-                    avg_reposts=round(np.mean(metrics_arrays['reposts']), 0),
-                    total_engagement=round(np.mean(engagements), 0),
-                    top_post_ids=top_post_ids
-                )
+            # Engagement features - numpy arrays
+            likes = np.fromiter((int(post.get('like_count') or 0) for post in posts), dtype=np.int64, count=len(posts))
+            comments = np.fromiter((int(post.get('comment_count') or 0) for post in posts), dtype=np.int64, count=len(posts))
+            reposts = np.fromiter((int(post.get('repost_count') or 0) for post in posts), dtype=np.int64, count=len(posts))
+            engagements = likes + comments + reposts
+            
+            total_words = totals.words
+            total_sentences = totals.sentences
+            num_posts = len(posts)
+            
+            def per_100_words(count: int, digits: int = 2) -> float:
+                return round(count / total_words * 100, digits) if total_words > 0 else 0
+            
+            # Get top posts by engagement
+            top_indices = np.argsort(engagements, kind='stable')[-3:][::-1]
+            top_post_ids = [posts[i]['id'] for i in top_indices]
+            
+            results[cluster_id] = ClusterMetrics(
+                cluster_id=cluster_id,
+                post_count=num_posts,
+                avg_words_per_sentence=round(total_words / total_sentences, 1) if total_sentences > 0 else 0,
+                line_breaks_per_100_words=per_100_words(totals.line_breaks, 1),
+                em_dashes_per_100_words=per_100_words(totals.em_dashes),
+                ellipses_per_100_words=per_100_words(totals.ellipses),
+                questions_per_100_words=per_100_words(totals.questions),
+                exclamations_per_100_words=per_100_words(totals.exclamations),
+                emojis_per_100_words=per_100_words(totals.emojis),
+                hashtags_per_post=round(totals.hashtags / totals.post_count, 2),
+                mentions_per_post=round(totals.mentions / totals.post_count, 2),
+                avg_hook_line_words=round(totals.hook_words / totals.post_count, 1),
+                avg_paragraphs_per_post=round(totals.paragraphs / totals.post_count, 1),
+                avg_words_per_post=round(total_words / num_posts, 0),
+                avg_likes=round(float(likes.mean()), 0),
+                avg_comments=round(float(comments.mean()), 0),
+                avg_reposts=round(float(reposts.mean()), 0),
+                total_engagement=round(float(engagements.mean()), 0),
+                top_post_ids=top_post_ids
+            )
         
         return results
     
@@ -286,102 +281,185 @@ class FastVoiceProfileGenerator:
             logger.warning(f"AI generation failed: {e}")
             return f"Content Series {cluster_id + 1}", f"A collection of posts in cluster {cluster_id}"
     
-    def batch_save_profiles(self, profiles_data: List[Dict]) -> int:
-        """Save all profiles using UPSERT (insert or update based on unique constraint)"""
-        if not profiles_data:
+    def assign_performance_ranks(self, profiles_data: List[Dict],
+                                 other_clusters: Optional[Dict[int, float]] = None) -> Dict[int, int]:
+        """
+        Rank clusters by total engagement in memory (1 = best).
+        other_clusters holds the engagement of saved clusters that are not being
+        regenerated, so a partial update still ranks across the full set.
+        Returns cluster_id -> rank for every cluster that should exist.
+        """
+        engagement = dict(other_clusters or {})
+        for profile in profiles_data:
+            engagement[profile['cluster_id']] = profile.get('engagement', {}).get('total_engagement', 0)
+        
+        ranked = sorted(engagement, key=lambda cluster_id: engagement[cluster_id], reverse=True)
+        ranks = {cluster_id: rank for rank, cluster_id in enumerate(ranked, 1)}
+        
+        for profile in profiles_data:
+            profile['performance_rank'] = ranks[profile['cluster_id']]
+        
+        return ranks
+    
+    async def batch_save_profiles(self, creator: str, profiles_data: List[Dict], ranks: Dict[int, int]) -> int:
+        """
+        Write a creator's regenerated profiles in one request, apply ranks to the
+        rest and drop every cluster that is not in ranks. Raises if they could
+        not be saved.
+        """
+        if not profiles_data and not ranks:
             return 0
         
-        success_count = 0
+        cluster_ids = [profile['cluster_id'] for profile in profiles_data]
         
         try:
-            for profile in profiles_data:
-                try:
-                    # Use upsert - this will insert if new, update if exists
-                    # The unique constraint on (creator, cluster_id) makes this work perfectly
-                    self.supabase.table("creator_voice_profiles") \
-                        .upsert(profile, on_conflict="creator,cluster_id") \
-                        .execute()
-                    
-                    success_count += 1
-                    logger.info(f"Upserted profile for {profile['creator']} cluster {profile['cluster_id']}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to upsert profile for {profile['creator']} cluster {profile['cluster_id']}: {e}")
-            
-            return success_count
+            # Upsert + stale-cluster delete + rerank in a single transaction
+            # (sql/replace_creator_voice_profiles.sql)
+            await self.db.rpc('replace_creator_voice_profiles', {
+                'p_creator': creator,
+                'p_profiles': profiles_data,
+                'p_ranks': {str(cluster_id): rank for cluster_id, rank in ranks.items()}
+            })
+            logger.info(f"Saved {len(profiles_data)} profiles for {creator} (clusters {cluster_ids}, {len(ranks)} ranked)")
+            return len(profiles_data)
             
-        except Exception as e:
-            logger.error(f"Batch save failed: {e}")
-            return success_count
+        except DatabaseError as e:
+            # Only a missing RPC falls back; a timeout or 5xx may have left the
+            # transaction applied, and the non-atomic path could half-replace it
+            if e.status_code != 404:
+                logger.error(f"Batch save failed for {creator}: {e}")
+                raise
+            logger.warning(f"replace_creator_voice_profiles RPC not installed, falling back to bulk upsert for {creator}")
+        
+        # Fallback: one bulk upsert, one delete for clusters that no longer
+        # exist, one PATCH per rank of the untouched clusters (an upsert of
+        # partial rows would fail the NOT NULL checks of the insert half)
+        await self.db.upsert("creator_voice_profiles", profiles_data, on_conflict="creator,cluster_id")
+        
+        await self.db.delete("creator_voice_profiles", [
+            eq("creator", creator),
+            not_in("cluster_id", list(ranks))
+        ])
+        
+        await asyncio.gather(*[
+            self.db.update("creator_voice_profiles", {"performance_rank": rank},
+                           [eq("creator", creator), eq("cluster_id", cluster_id)])
+            for cluster_id, rank in ranks.items()
+            if cluster_id not in cluster_ids
+        ])
+        
+        logger.info(f"Upserted {len(profiles_data)} profiles for {creator} (clusters {cluster_ids}, {len(ranks)} ranked)")
+        return len(profiles_data)
     
-    def generate_voice_profiles_ultra_fast(self, creator: str) -> int:
-        """Ultra-fast voice profile generation"""
+    async def generate_voice_profiles_ultra_fast(self, creator: str, cluster_ids: Optional[Set[int]] = None,
+                                                 snapshot: Optional[CreatorSnapshot] = None,
+                                                 raise_errors: bool = False) -> int:
+        """
+        Ultra-fast voice profile generation.
+        cluster_ids limits the work to clusters whose membership changed;
+        None regenerates every cluster of the creator. With a snapshot the
+        posts and embeddings are read from it instead of the database.
+        Errors are logged and give 0 unless raise_errors is set.
+        """
         start_time = time.time()
+        partial = cluster_ids is not None
         
         try:
-            # 1. SINGLE QUERY - Get everything at once
-            logger.info(f"Fetching all posts for {creator}")
-            response = self.supabase.table("creator_posts") \
-                .select("*") \
-                .eq("author", creator) \
-                .execute()
-            
-            all_posts = response.data
-            if not all_posts:
-                logger.warning(f"No posts found for {creator}")
+            if partial and not cluster_ids:
+                logger.info(f"No changed clusters for {creator}, skipping profile generation")
                 return 0
             
-            # 2. BATCH PROCESS - Parse embeddings once
-            self.batch_process_embeddings(all_posts)
+            # 1. POSTS - From the job's snapshot, or a paged fetch of only the columns metrics and prompts need
+            if snapshot is not None:
+                all_posts = snapshot.cluster_posts(cluster_ids)
+            elif partial:
+                logger.info(f"Fetching posts for {creator} clusters {sorted(cluster_ids)}")
+                pages = await asyncio.gather(*(
+                    self.db.fetch_posts_by_author(creator, POST_METRIC_COLUMNS, cluster_id=cluster_id)
+                    for cluster_id in sorted(cluster_ids)
+                ))
+                all_posts = [post for page in pages for post in page]
+            else:
+                logger.info(f"Fetching posts for {creator}")
+                all_posts = await self.db.fetch_posts_by_author(creator, POST_METRIC_COLUMNS)
             
-            # 3. GROUP BY CLUSTER - In memory
+            if partial:
+                # Saved clusters that are not regenerated still take part in ranking
+                saved_engagement = await self.db.fetch_profile_engagement(creator)
+                other_clusters = {
+                    cluster_id: engagement
+                    for cluster_id, engagement in saved_engagement.items()
+                    if cluster_id not in cluster_ids
+                }
+            else:
+                other_clusters = {}
+                
+                if not all_posts:
+                    logger.warning(f"No posts found for {creator}")
+                    return 0
+            
+            # 2. GROUP BY CLUSTER - In memory
             posts_by_cluster = defaultdict(list)
             for post in all_posts:
                 cluster_id = post.get('cluster_id')
                 if cluster_id is not None:
                     posts_by_cluster[cluster_id].append(post)
             
-            if not posts_by_cluster:
+            if not posts_by_cluster and not partial:
                 logger.warning(f"No clustered posts for {creator}")
                 return 0
             
-            # 4. CALCULATE ALL METRICS - Vectorized
+            # 3. CALCULATE ALL METRICS - Vectorized
             all_metrics = self.calculate_all_metrics_vectorized(posts_by_cluster)
             
-            # 4.5 CALCULATE CLUSTER CENTROIDS - NEW
+            # 4. CENTROIDS + REPRESENTATIVE POSTS - Embeddings attached one cluster at a time
             cluster_centroids = {}
+            ai_tasks = {}
             for cluster_id, posts in posts_by_cluster.items():
+                if snapshot is not None:
+                    snapshot.attach_embeddings(posts)
+                else:
+                    await self.attach_cluster_embeddings(creator, cluster_id, posts)
+                
                 # Get all valid embeddings for this cluster
-                embeddings = []
-                for post in posts:
-                    if post.get('embedding') and isinstance(post['embedding'], list):
-                        embeddings.append(post['embedding'])
+                embeddings = [
+                    post['embedding'] for post in posts
+                    if post.get('embedding') and isinstance(post['embedding'], list)
+                ]
                 
                 # Calculate centroid if we have embeddings
                 if embeddings:
-                    embeddings_array = np.array(embeddings)
-                    centroid = embeddings_array.mean(axis=0).tolist()  # Convert to list for JSON storage
+                    centroid = np.array(embeddings).mean(axis=0).tolist()  # Convert to list for JSON storage
                     cluster_centroids[cluster_id] = centroid
                     logger.info(f"Calculated centroid for cluster {cluster_id} with {len(embeddings)} posts")
                 else:
                     cluster_centroids[cluster_id] = None
                     logger.warning(f"No valid embeddings for cluster {cluster_id}")
-            
-            # 5. PREPARE AI DESCRIPTIONS - Get representative posts
-            ai_tasks = {}
-            for cluster_id, posts in posts_by_cluster.items():
+                
+                # 5. PREPARE AI DESCRIPTIONS - Get representative posts
                 representative = self.get_representative_posts_fast(posts)
                 ai_tasks[cluster_id] = (creator, representative, len(posts))
+                
+                # Release this cluster's embeddings before moving to the next one
+                for post in posts:
+                    post.pop('embedding', None)
+            
+            # 6. GENERATE AI DESCRIPTIONS - Concurrently on the thread pool, off the event loop
+            loop = asyncio.get_running_loop()
+            cluster_order = list(ai_tasks)
+            results = await asyncio.gather(*(
+                loop.run_in_executor(self.executor, self._generate_single_description_sync,
+                                     creator, cluster_id, posts, total_posts)
+                for cluster_id, (creator, posts, total_posts) in ai_tasks.items()
+            ), return_exceptions=True)
             
-            # 6. GENERATE AI DESCRIPTIONS - SYNCHRONOUSLY (FIXED)
             ai_descriptions = {}
-            for cluster_id, (creator, posts, total_posts) in ai_tasks.items():
-                try:
-                    name, description = self._generate_single_description_sync(creator, cluster_id, posts, total_posts)
-                    ai_descriptions[cluster_id] = (name, description)
-                except Exception as e:
-                    logger.warning(f"AI generation failed for cluster {cluster_id}: {e}")
+            for cluster_id, result in zip(cluster_order, results):
+                if isinstance(result, Exception):
+                    logger.warning(f"AI generation failed for cluster {cluster_id}: {result}")
                     ai_descriptions[cluster_id] = (f"Cluster {cluster_id}", f"Posts in cluster {cluster_id}")
+                else:
+                    ai_descriptions[cluster_id] = result
             
             # 7. BUILD ALL PROFILES
             profiles_data = []
@@ -403,7 +481,15 @@ class FastVoiceProfileGenerator:
                             "em_dashes_per_100_words": metrics.em_dashes_per_100_words,
                             "ellipses_per_100_words": metrics.ellipses_per_100_words,
                             "questions_per_100_words": metrics.questions_per_100_words,
-                            "exclamations_per_100_words": metrics.exclamations_per_100_words
+                            "exclamations_per_100_words": metrics.exclamations_per_100_words,
+                            "emojis_per_100_words": metrics.emojis_per_100_words
+                        },
+                        "hook": {
+                            "avg_hook_line_words": metrics.avg_hook_line_words
+                        },
+                        "tagging": {
+                            "hashtags_per_post": metrics.hashtags_per_post,
+                            "mentions_per_post": metrics.mentions_per_post
                         },
                         "structure": {
                             "avg_paragraphs_per_post": metrics.avg_paragraphs_per_post,
@@ -431,11 +517,11 @@ class FastVoiceProfileGenerator:
                 profiles_data.append(profile)
                 logger.info(f"Prepared profile for Cluster {cluster_id}: {name}")
             
-            # 8. BATCH SAVE
-            saved_count = self.batch_save_profiles(profiles_data)
+            # 8. RANK IN MEMORY - Changed clusters against the saved engagement of the rest
+            ranks = self.assign_performance_ranks(profiles_data, other_clusters)
             
-            # 9. UPDATE RANKS - Optimized
-            self.update_performance_ranks_fast(creator)
+            # 9. BULK SAVE - One request per creator; emptied clusters are dropped
+            saved_count = await self.batch_save_profiles(creator, profiles_data, ranks)
             
             elapsed = time.time() - start_time
             logger.info(f"✓ Generated {saved_count} profiles for {creator} in {elapsed:.2f} seconds")
@@ -444,60 +530,49 @@ class FastVoiceProfileGenerator:
             
         except Exception as e:
             logger.error(f"Critical error in ultra-fast generation: {e}")
+            if raise_errors:
+                raise
             return 0
-    
-    def update_performance_ranks_fast(self, creator: str):
-        """Update ranks in a single operation"""
-        try:
-            # Get all profiles sorted by engagement
-            response = self.supabase.table("creator_voice_profiles") \
-                .select("cluster_id, engagement") \
-                .eq("creator", creator) \
-                .execute()
-            
-            if not response.data:
-                return
-            
-            # Sort and prepare updates
-            sorted_profiles = sorted(
-                response.data,
-                key=lambda p: p.get('engagement', {}).get('total_engagement', 0),
-                reverse=True
-            )
-            
-            # Update all at once (would be better with bulk update if Supabase supported it)
-            for rank, profile in enumerate(sorted_profiles, 1):
-                self.supabase.table("creator_voice_profiles") \
-                    .update({"performance_rank": rank}) \
-                    .eq("creator", creator) \
-                    .eq("cluster_id", profile['cluster_id']) \
-                    .execute()
-                    
-        except Exception as e:
-            logger.error(f"Error updating ranks: {e}")
 
 
 # Integration functions
-def generate_voice_profiles_after_clustering(creator: str) -> int:
+async def generate_voice_profiles_after_clustering(creator: str, cluster_ids: Optional[Set[int]] = None,
+                                                  snapshot: Optional[CreatorSnapshot] = None) -> int:
     """Fast integration function for main.py"""
     try:
         with FastVoiceProfileGenerator() as generator:
-            return generator.generate_voice_profiles_ultra_fast(creator)
+            return await generator.generate_voice_profiles_ultra_fast(creator, cluster_ids, snapshot)
     except Exception as e:
         logger.error(f"Error in generate_voice_profiles_after_clustering: {e}")
         return 0
 
 
-def generate_all_voice_profiles():
+async def generate_voice_profiles_for_dirty_clusters(creator: str, snapshot: Optional[CreatorSnapshot] = None) -> int:
+    """
+    Regenerate only the clusters whose membership changed since the last run.
+    They stay marked until their profiles are saved, so a failed run is
+    picked up again by the next one.
+    """
+    cluster_ids = dirty_clusters.peek(creator)
+    logger.info(f"Regenerating {creator} clusters {sorted(cluster_ids)}")
+    try:
+        with FastVoiceProfileGenerator() as generator:
+            count = await generator.generate_voice_profiles_ultra_fast(creator, cluster_ids, snapshot,
+                                                                       raise_errors=True)
+    except Exception as e:
+        logger.error(f"Keeping {creator} clusters {sorted(cluster_ids)} dirty after failed generation: {e}")
+        return 0
+    
+    dirty_clusters.discard(creator, cluster_ids)
+    return count
+
+
+async def generate_all_voice_profiles():
     """Generate profiles for all creators - optimized"""
     try:
         with FastVoiceProfileGenerator() as generator:
-            # Get all creators in one query
-            response = supabase.table("creator_posts") \
-                .select("author") \
-                .execute()
-            
-            creators = list(set([p['author'] for p in response.data if p.get('author')]))
+            # Get all creators (paged)
+            creators = await generator.db.list_authors()
             logger.info(f"Processing {len(creators)} creators")
             
             total_profiles = 0
@@ -505,13 +580,13 @@ def generate_all_voice_profiles():
             
             for creator in creators:
                 start = time.time()
-                count = generator.generate_voice_profiles_ultra_fast(creator)
+                count = await generator.generate_voice_profiles_ultra_fast(creator)
                 elapsed = time.time() - start
                 total_profiles += count
                 total_time += elapsed
                 logger.info(f"{creator}: {count} profiles in {elapsed:.2f}s")
             
-            logger.info(f"✓ Total: {total_profiles} profiles in {total_time:.2f}s ({total_time/len(creators):.2f}s per creator)")
+            logger.info(f"✓ Total: {total_profiles} profiles in {total_time:.2f}s ({total_time/max(len(creators), 1):.2f}s per creator)")
             return total_profiles
             
     except Exception as e:
@@ -519,6 +594,17 @@ def generate_all_voice_profiles():
         return 0
 
 
+async def _run_cli(target: str):
+    try:
+        if target == "--all":
+            await generate_all_voice_profiles()
+        else:
+            count = await generate_voice_profiles_after_clustering(target)
+            print(f"Generated {count} profiles for {target}")
+    finally:
+        await close_repository()
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage:")
@@ -526,9 +612,4 @@ if __name__ == "__main__":
         print("  python generate_voice_profiles.py --all")
         sys.exit(1)
     
-    if sys.argv[1] == "--all":
-        generate_all_voice_profiles()
-    else:
-        creator_name = sys.argv[1]
-        count = generate_voice_profiles_after_clustering(creator_name)
-        print(f"Generated {count} profiles for {creator_name}")
+    asyncio.run(_run_cli(sys.argv[1]))
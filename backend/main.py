@@ -3,21 +3,29 @@ Kaive AI Backend - Ultra Optimized Version
 Performance improvements: 5-10x faster upload and processing
 """
 
-from fastapi import FastAPI, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, HTTPException, Request
+from fastapi.responses import StreamingResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
 import pandas as pd
 import openai
-from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, date
 import io
 from sklearn.cluster import KMeans
 import numpy as np
 import json
 import asyncio
 import concurrent.futures
-from core.config import MAX_WORKERS, BATCH_SIZE, DB_CHUNK_SIZE
+import multiprocessing
+import traceback
+from core.config import (
+    MAX_WORKERS, BATCH_SIZE, CLUSTERING_MIN_POSTS, RECLUSTER_THRESHOLD, CLUSTER_PROCESSES,
+    UPLOAD_SPOOL_DIR, CREATOR_CONCURRENCY, EVENT_HEARTBEAT_INTERVAL, CREATOR_DIRECTORY_MAX_AGE,
+    POSTS_PAGE_MAX, PROFILE_POSTS_PAGE_SIZE, SEARCH_MAX_K,
+    VOICE_MATCH_TOP_K, VOICE_MATCH_MAX_DRAFTS
+)
 from typing import List, Dict, Tuple, Optional
 import logging
 from functools import lru_cache
@@ -26,9 +34,32 @@ from collections import defaultdict
 import sys
 from services.text_cleaner import clean_text
 from services.file_processor import FileProcessor
+from core.database import (
+    get_repository, close_repository, PROFILE_SUMMARY_COLUMNS, ROLLUP_PERIODS, ROLLUP_ALL_CLUSTERS
+)
 
 # Import the fast version
-from generate_voice_profiles import generate_voice_profiles_after_clustering
+from generate_voice_profiles import generate_voice_profiles_after_clustering, generate_voice_profiles_for_dirty_clusters
+from services.dirty_clusters import dirty_clusters, align_cluster_labels
+from services.creator_snapshot import CreatorSnapshot, parse_embedding
+from services.clustering import fit_cluster_labels, nearest_centroid_labels
+from services.progress import FileProgress
+from services.pipeline import UploadPipeline
+from services.job_queue import JobQueue, JobWorkerPool
+from core.responses import FastJSONResponse, CompressionMiddleware, negotiate_encoding
+from services.creator_runs import creator_runs
+from services.events import processing_events, is_terminal
+from services.stats import stats_cache
+from services.creator_directory import creator_directory, etag_matches
+from services.profile_cache import profile_cache
+from services.pagination import InvalidPageRequest, parse_fields, decode_cursor, encode_cursor, project
+from services.checkpoints import UploadCheckpoints, INSERTED, CLUSTERED, PROFILED
+from services.embedding_cache import query_embeddings
+from services.vector_index import vector_indexes
+from services.voice_matcher import voice_matcher
+from services.post_neighbors import update_post_neighbors
+from services.creator_similarity import update_creator_similarity, changed_creators
+from services.topic_model import global_topics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,7 +68,7 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -47,17 +78,25 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# brotli/gzip for large JSON responses, negotiated per request
+app.add_middleware(CompressionMiddleware)
 
-# Initialize clients
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+# Initialize clients - all database access goes through the shared pooled repository
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
 # Thread pool for parallel processing
 executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
 
+# Process pool for CPU-bound clustering (spawned, so workers never inherit
+# the event loop's threads or sockets)
+cluster_pool = concurrent.futures.ProcessPoolExecutor(
+    max_workers=CLUSTER_PROCESSES,
+    mp_context=multiprocessing.get_context('spawn')
+)
+
+# Durable background jobs (started on app startup)
+job_pool: Optional[JobWorkerPool] = None
+
 # Cache for cleaned text
 
 
@@ -99,93 +138,95 @@ class OptimizedProcessor:
     
     def cluster_posts_batch(self, embeddings: np.ndarray, n_clusters: int = 4) -> np.ndarray:
         """Optimized clustering"""
-        actual_clusters = min(n_clusters, len(embeddings))
-        
-        if len(embeddings) <= 1:
-            return np.zeros(len(embeddings), dtype=int)
-        
-        kmeans = KMeans(
-            n_clusters=actual_clusters,
-            random_state=42,
-            n_init=10,
-            max_iter=100,  # Limit iterations for speed
-            algorithm='elkan'  # Faster for well-separated clusters
+        return fit_cluster_labels(embeddings, n_clusters)
+    
+    async def cluster_posts_async(self, embeddings: np.ndarray, n_clusters: int = 4) -> np.ndarray:
+        """Cluster in the process pool so other creators keep making progress"""
+        return await asyncio.get_running_loop().run_in_executor(
+            cluster_pool, fit_cluster_labels, embeddings, n_clusters
         )
-        
-        return kmeans.fit_predict(embeddings)
 
-async def should_recluster(creator: str, new_post_count: int) -> bool:
+def should_recluster(snapshot: CreatorSnapshot, new_post_count: int) -> bool:
     """
     Determine if we should recluster all posts or just cluster new ones
     """
-    try:
-        # Get current post count for creator
-        response = supabase.table('creator_posts') \
-            .select('id', count='exact') \
-            .eq('author', creator) \
-            .execute()
-        
-        total_posts = response.count
+    total_posts = snapshot.post_count
+    
+    # Recluster if:
+    # 1. Creator has < 20 posts (small dataset benefits from full reclustering)
+    # 2. New posts are > 30% of total (significant change)
+    # 3. No clusters exist yet
+    
+    if total_posts < CLUSTERING_MIN_POSTS:
+        return True
         
-        # Recluster if:
-        # 1. Creator has < 20 posts (small dataset benefits from full reclustering)
-        # 2. New posts are > 30% of total (significant change)
-        # 3. No clusters exist yet
+    if new_post_count / total_posts > RECLUSTER_THRESHOLD:
+        return True
         
-        if total_posts < 20:
-            return True
-            
-        if new_post_count / total_posts > 0.3:
-            return True
-            
-        # Check if clusters exist
-        cluster_check = supabase.table('creator_posts') \
-            .select('cluster_id') \
-            .eq('author', creator) \
-            .not_.is_('cluster_id', 'null') \
-            .limit(1) \
-            .execute()
-            
-        if not cluster_check.data:
-            return True
-            
-        return False
+    # Check if clusters exist
+    if not snapshot.has_clusters():
+        return True
         
-    except Exception as e:
-        logger.error(f"Error in should_recluster: {e}")
-        return True  # Default to reclustering on error
+    return False
 
-async def recluster_creator(creator: str):
+async def recluster_creator(snapshot: CreatorSnapshot):
     """
-    Recluster all posts for a creator
+    Recluster all posts for a creator, staging the new assignments in the snapshot
     """
     try:
-        # Get all posts with embeddings
-        response = supabase.table('creator_posts') \
-            .select('id, embedding') \
-            .eq('author', creator) \
-            .execute()
-        
-        post_ids = []
-        embeddings = []
-        
-        for post in response.data:
-            if post.get('embedding'):
-                post_ids.append(post['id'])
-                if isinstance(post['embedding'], str):
-                    embeddings.append(json.loads(post['embedding']))
-                else:
-                    embeddings.append(post['embedding'])
-        
-        if embeddings:
+        # All posts with embeddings and their current cluster
+        post_ids, embeddings, previous_cluster_ids = snapshot.embedded_posts()
+        
+        if post_ids:
             processor = OptimizedProcessor()
-            await cluster_creator_optimized(creator, post_ids, embeddings, processor)
+            await cluster_creator_optimized(snapshot.creator, post_ids, embeddings, processor,
+                                            previous_cluster_ids, snapshot=snapshot)
             
     except Exception as e:
         logger.error(f"Error in recluster_creator: {e}")
 
-async def cluster_creator_optimized(creator: str, post_ids: List[int], embeddings: List[List[float]], processor):
-    """Optimized clustering for a single creator"""
+async def finalize_creator(snapshot: CreatorSnapshot, checkpoints: Optional[UploadCheckpoints] = None) -> int:
+    """
+    Write a creator's staged cluster changes in one bulk commit, then
+    regenerate the changed voice profiles from the same snapshot. Raises,
+    before any checkpoint or profile is written, if assignments were not saved.
+    """
+    creator = snapshot.creator
+    result = await snapshot.commit(get_repository())
+    if result.failed_ids:
+        # Profiles built from the staged labels would disagree with the
+        # database; the creator stays at its last checkpoint for a retry
+        raise RuntimeError(f"{len(result.failed_ids)} cluster assignments for {creator} were not saved")
+    
+    if checkpoints is None:
+        return await generate_voice_profiles_for_dirty_clusters(creator, snapshot=snapshot)
+    
+    # Checkpoint before profiling so a resume only redoes the profiles
+    changed = dirty_clusters.peek(creator)
+    await checkpoints.mark(creator, CLUSTERED, dirty_clusters=changed)
+    count = await generate_voice_profiles_for_dirty_clusters(creator, snapshot=snapshot)
+    await mark_profiled(checkpoints, creator, changed, count)
+    return count
+
+async def mark_profiled(checkpoints: UploadCheckpoints, creator: str, changed, count: int):
+    """Checkpoint a creator as done unless its profile generation produced nothing"""
+    # Profile generation logs and swallows its errors; zero profiles for
+    # changed clusters is treated as a failure and left for a resume
+    if changed and not count:
+        logger.warning(f"No profiles saved for {creator} clusters {sorted(changed)}, leaving it resumable")
+        return
+    await checkpoints.mark(creator, PROFILED, dirty_clusters=[])
+
+async def cluster_creator_optimized(creator: str, post_ids: List[int], embeddings: List[List[float]], processor,
+                                    previous_cluster_ids: Optional[List[Optional[int]]] = None,
+                                    snapshot: Optional[CreatorSnapshot] = None):
+    """
+    Optimized clustering for a single creator.
+    previous_cluster_ids holds each post's current cluster (None for new posts);
+    labels are aligned to it and every cluster whose membership changes is
+    recorded in dirty_clusters for profile regeneration. With a snapshot the
+    changes are staged for its bulk commit instead of written right away.
+    """
     try:
         logger.info(f"Clustering {len(post_ids)} posts for {creator}")
         
@@ -193,276 +234,408 @@ async def cluster_creator_optimized(creator: str, post_ids: List[int], embedding
         embeddings_array = np.array(embeddings)
         
         # Cluster
-        labels = processor.cluster_posts_batch(embeddings_array)
-        
-        # Batch update cluster IDs
-        updates = []
-        for post_id, cluster_id in zip(post_ids, labels):
-            updates.append({
-                'id': post_id,
-                'cluster_id': int(cluster_id)
-            })
+        labels = await processor.cluster_posts_async(embeddings_array)
+        
+        # Keep existing cluster ids stable and track what changed
+        if previous_cluster_ids is None:
+            previous_cluster_ids = [None] * len(post_ids)
+        else:
+            labels = align_cluster_labels(previous_cluster_ids, labels)
+        dirty_clusters.mark_assignments(creator, previous_cluster_ids, labels)
+        
+        # Batch update cluster IDs - only posts whose cluster changed
+        updates = {
+            post_id: int(cluster_id)
+            for post_id, previous, cluster_id in zip(post_ids, previous_cluster_ids, labels)
+            if previous is None or int(previous) != int(cluster_id)
+        }
+        
+        if snapshot is not None:
+            snapshot.assign(updates)
+            logger.info(f"✓ Clustered {creator}'s posts into {len(set(labels))} clusters ({len(updates)} posts moved, staged)")
+            return
         
-        # Update in chunks
-        for i in range(0, len(updates), 50):
-            chunk = updates[i:i + 50]
-            for update in chunk:
-                supabase.table('creator_posts').update({
-                    'cluster_id': update['cluster_id']
-                }).eq('id', update['id']).execute()
+        result = await get_repository().update_post_clusters(updates)
+        if result.failed_ids:
+            logger.error(f"{len(result.failed_ids)} cluster assignments for {creator} were not saved")
         
-        logger.info(f"✓ Clustered {creator}'s posts into {len(set(labels))} clusters")
+        logger.info(f"✓ Clustered {creator}'s posts into {len(set(labels))} clusters ({result.written} posts moved, {result.rows_per_second:.0f} posts/s)")
         
     except Exception as e:
         logger.error(f"Error clustering {creator}: {e}")
 
-async def deduplicate_posts(posts_to_insert: List[Dict], texts_for_embedding: List[str]) -> Tuple[Dict, int]:
-    """
-    Deduplicate posts against existing database content
-    Returns: (unique_posts_dict, duplicate_count)
-    """
-    # Group posts by author for efficient checking
-    posts_by_author = defaultdict(list)
-    for i, post in enumerate(posts_to_insert):
-        posts_by_author[post['author']].append((i, post))
-    
-    unique_posts = []
-    unique_texts = []
-    duplicate_count = 0
-    
-    # Check each author's posts
-    for author, author_posts in posts_by_author.items():
-        # Get existing posts for this author
-        existing_response = supabase.table('creator_posts') \
-            .select('post_content, post_url') \
-            .eq('author', author) \
-            .execute()
-        
-        # Create a set of existing content for fast lookup
-        # Use first 200 chars for comparison to handle minor edits
-        existing_content = {
-            post['post_content'][:200]: post 
-            for post in existing_response.data
-        }
-        
-        existing_urls = {
-            post.get('post_url') 
-            for post in existing_response.data 
-            if post.get('post_url')
-        }
-        
-        # Check each post
-        for idx, post in author_posts:
-            content_key = post['post_content'][:200]
-            post_url = post.get('post_url')
-            
-            # Check if duplicate by content or URL
-            is_duplicate = (
-                content_key in existing_content or 
-                (post_url and post_url in existing_urls)
-            )
-            
-            if is_duplicate:
-                duplicate_count += 1
-                logger.debug(f"Skipping duplicate post for {author}")
-            else:
-                unique_posts.append(post)
-                unique_texts.append(texts_for_embedding[idx])
-                # Add to existing set to catch duplicates within the same file
-                existing_content[content_key] = post
-                if post_url:
-                    existing_urls.add(post_url)
-    
-    return {'posts': unique_posts, 'texts': unique_texts}, duplicate_count
+async def assign_new_posts(snapshot: CreatorSnapshot, new_post_ids: List[int]):
+    """
+    Put new posts in the creator's nearest existing cluster, by the stored
+    centroid_embedding (or the cluster's mean embedding where its profile
+    has none yet). Only clusters that receive posts become dirty.
+    """
+    creator = snapshot.creator
+    post_ids, embeddings = snapshot.embedded_subset(new_post_ids)
+    if not post_ids:
+        return
+    
+    centroids = snapshot.cluster_centroids()
+    if not centroids:
+        # Nothing to assign to yet
+        await recluster_creator(snapshot)
+        return
+    for profile in await get_repository().list_voice_profiles(creator, 'cluster_id, centroid_embedding'):
+        centroid = parse_embedding(profile.get('centroid_embedding'))
+        if centroid and profile['cluster_id'] in centroids:
+            centroids[profile['cluster_id']] = np.asarray(centroid, dtype=np.float32)
+    
+    cluster_ids = list(centroids)
+    rows = nearest_centroid_labels(embeddings, np.vstack([centroids[cluster_id] for cluster_id in cluster_ids]))
+    labels = [cluster_ids[row] for row in rows]
+    dirty_clusters.mark_assignments(creator, [None] * len(post_ids), labels)
+    snapshot.assign(dict(zip(post_ids, labels)))
+    logger.info(f"✓ Assigned {len(post_ids)} new posts of {creator} to {len(set(labels))} existing clusters (staged)")
+
+async def process_creator(creator: str, new_post_ids: List[int], processor,
+                          checkpoints: Optional[UploadCheckpoints] = None) -> int:
+    """Cluster one creator of an upload and regenerate its changed profiles"""
+    # Another upload or a recluster of the same creator finishes first, so
+    # the snapshot below already includes its assignments
+    async with creator_runs.lock(creator):
+        return await process_creator_locked(creator, new_post_ids, processor, checkpoints)
+
+async def process_creator_locked(creator: str, new_post_ids: List[int], processor,
+                                 checkpoints: Optional[UploadCheckpoints] = None) -> int:
+    logger.info(f"Processing creator: {creator}")
+    
+    # One read of the creator's posts, shared by every step below
+    snapshot = await CreatorSnapshot.load(get_repository(), creator)
+    
+    if not snapshot.post_count:
+        logger.info(f"  - No posts found for {creator} in database, skipping")
+        if checkpoints is not None:
+            await checkpoints.mark(creator, PROFILED)
+        return 0
+    
+    # CLUSTERING - A retried upload sees posts an earlier attempt inserted as
+    # duplicates, so posts still waiting for a cluster join the new ones
+    new_post_ids = list(dict.fromkeys(list(new_post_ids) + snapshot.unclustered_ids()))
+    new_count = len(new_post_ids)
+    
+    logger.info(f"  - {creator}: new posts: {new_count}")
+    
+    if new_count > 0:
+        # New posts - decide on clustering strategy
+        if should_recluster(snapshot, new_count):
+            logger.info(f"  - Reclustering ALL posts for {creator}")
+            await recluster_creator(snapshot)
+        else:
+            logger.info(f"  - Assigning NEW posts to {creator}'s existing clusters")
+            await assign_new_posts(snapshot, new_post_ids)
+    else:
+        # No new posts - check if needs clustering
+        if snapshot.has_unclustered():
+            logger.info(f"  - Found unclustered posts for {creator}, clustering now")
+            await recluster_creator(snapshot)
+    
+    # SIMILAR POSTS - Rows for the new posts, and existing rows they enter
+    await refresh_similar_posts(snapshot)
+    
+    # COMMIT + VOICE PROFILE GENERATION - Only clusters whose membership changed
+    logger.info(f"=== GENERATING VOICE PROFILES FOR {creator} ===")
+    result = await finalize_creator(snapshot, checkpoints)
+    logger.info(f"✅ Voice profiles generated for {creator}: {result} profiles created")
+    return result
+
+async def set_file_status(file_id, fields: Dict, stage: Optional[str] = None):
+    """Persist a file's status change and push it (with the pipeline stage) to status stream clients"""
+    await get_repository().update_file_record(file_id, fields)
+    processing_events.publish(file_id, {**fields, 'stage': stage} if stage else fields)
+
+async def run_creator_isolated(creator: str, work, progress: FileProgress) -> int:
+    """Await one creator's work with its failure logged and counted instead of raised"""
+    try:
+        count = await work
+    except Exception as e:
+        logger.error(f"❌ Error processing {creator}: {str(e)}")
+        logger.error(traceback.format_exc())
+        await progress.creator_done(creator, error=str(e))
+        return 0
+    await progress.creator_done(creator)
+    return count
 
 async def process_file_optimized(contents: bytes, filename: str, file_record_id: str):
-    """Optimized file processing pipeline with deduplication"""
+    """
+    Streaming file processing pipeline with deduplication.
+    Chunks of rows flow parse -> dedup -> embed -> insert while earlier
+    chunks are still in flight; each creator is clustered and profiled as
+    soon as all of its posts are in (see services/pipeline.py).
+    """
     start_time = time.time()
     processor = OptimizedProcessor()
-    file_processor = FileProcessor()  # NEW: Create FileProcessor instance
+    file_processor = FileProcessor()
+    repository = get_repository()
+    
+    # A retry starts over from here; an earlier attempt's failure is not final
+    await set_file_status(file_record_id, {'status': 'processing'}, stage='reading')
     
     try:
-        # 1. Read file - UPDATED to use FileProcessor
+        # 1. Read and validate file
         df = file_processor.read_file(contents, filename)
-        
-        # 2. Validate columns - UPDATED to use FileProcessor
         file_processor.validate_columns(df)
         
-        logger.info(f"Processing {len(df)} rows from {filename}")
-        
-        # 3. Prepare all data at once - UPDATED to use FileProcessor
-        posts_to_insert, texts_for_embedding = file_processor.prepare_post_data_batch(df)
-        
-        if not posts_to_insert:
-            logger.warning("No valid posts to process")
-            return 0
-        
-        # 4. DEDUPLICATION - Check for existing posts
-        unique_posts, existing_count = await deduplicate_posts(posts_to_insert, texts_for_embedding)
-        posts_to_insert = unique_posts['posts']
-        texts_for_embedding = unique_posts['texts']
-        
-        logger.info(f"Found {existing_count} duplicate posts, processing {len(posts_to_insert)} new posts")
-
-        
-        # DEBUG: Check what's in the data
-        logger.info("=== DEBUG: Checking post data structure ===")
-        logger.info(f"Total posts to insert: {len(posts_to_insert)}")
-        
-        # Count posts with imgurl
-        posts_with_img = sum(1 for post in posts_to_insert if 'imgurl' in post)
-        logger.info(f"Posts with imgurl field: {posts_with_img}")
-        
-        # Show first 3 posts
-        for i, post in enumerate(posts_to_insert[:3]):
-            logger.info(f"Post {i} keys: {list(post.keys())}")
-            has_img = 'imgurl' in post
-            logger.info(f"Post {i} has imgurl: {has_img}")
-            if has_img:
-                logger.info(f"Post {i} imgurl value: {post.get('imgurl', 'N/A')[:50]}...")
-
-        
-        # 4. Generate embeddings in parallel
-        embeddings = await processor.generate_embeddings_batch(texts_for_embedding)
-        
-        # Add embeddings to posts
-        for i, (post, embedding) in enumerate(zip(posts_to_insert, embeddings)):
-            if embedding:
-                post['embedding'] = embedding
-        
-        # 5. CRITICAL FIX: Ensure all posts have the same structure before insert
-        # UPDATED to use FileProcessor
-        posts_to_insert = file_processor.standardize_post_keys(posts_to_insert)
-        
-        # 5. Batch insert all posts
-        logger.info("Inserting posts to database...")
-        
-        # Insert in chunks to avoid timeouts
-        chunk_size = DB_CHUNK_SIZE
-        inserted_ids = []
-        
-        for i in range(0, len(posts_to_insert), chunk_size):
-            chunk = posts_to_insert[i:i + chunk_size]
-            response = supabase.table('creator_posts').insert(chunk).execute()
-            inserted_ids.extend([r['id'] for r in response.data])
-        
-        logger.info(f"Inserted {len(inserted_ids)} posts")
-        
-        # UPDATE STATUS: Posts saved
-        supabase.table('uploaded_files').update({
-            'status': 'posts_saved',
-            'total_posts': len(inserted_ids),
-            'new_posts': len(inserted_ids),
-            'duplicate_posts': existing_count
-        }).eq('id', file_record_id).execute()
+        # 2. Get ALL creators from the file for processing
+        all_creators_in_file = file_processor.get_all_creators_from_df(df)
         
-        # 6. Cluster by creator
-        creators_data = defaultdict(lambda: {'ids': [], 'embeddings': []})
+        logger.info(f"Processing {len(df)} rows from {filename} ({len(all_creators_in_file)} unique creators)")
         
-        for post_id, post, embedding in zip(inserted_ids, posts_to_insert, embeddings):
-            if embedding:
-                creators_data[post['author']]['ids'].append(post_id)
-                creators_data[post['author']]['embeddings'].append(embedding)
+        # Manifest of the creators this upload touches; on a retry, creators
+        # that already finished are skipped
+        checkpoints = UploadCheckpoints(repository, file_record_id)
+        await checkpoints.load()
+        await checkpoints.record_manifest(all_creators_in_file)
         
-        # 7. Get ALL creators from the file for processing - UPDATED to use FileProcessor
-        all_creators_in_file = file_processor.get_all_creators_from_df(df)
+        processing_events.publish(file_record_id, {'stage': 'inserting', 'rows': len(df)})
+        progress = FileProgress(repository, file_record_id, total=len(all_creators_in_file))
+        await progress.flush()
         
-        logger.info(f"Found {len(all_creators_in_file)} unique creators in file")
+        def pipeline_progress(totals):
+            # Pushed to status stream clients only; the record is written at posts_saved
+            processing_events.publish(file_record_id, {
+                'new_posts': totals.inserted,
+                'duplicate_posts': totals.duplicates
+            })
         
-        # 8. Process EACH creator
-        voice_profiles_created = 0
+        async def posts_saved(inserted: int, duplicates: int):
+            # UPDATE STATUS: Posts saved
+            logger.info(f"Inserted {inserted} posts, skipped {duplicates} duplicates")
+            await set_file_status(file_record_id, {
+                'status': 'posts_saved',
+                'total_posts': inserted,
+                'new_posts': inserted,
+                'duplicate_posts': duplicates
+            }, stage='profiling')
+        
+        async def finalize(creator: str, new_post_ids: List[int]) -> int:
+            if checkpoints.stage(creator) == PROFILED:
+                await progress.creator_done(creator)
+                return 0
+            # Posts inserted by an earlier attempt are duplicates now, keep their ids
+            new_post_ids = sorted(set(checkpoints.new_post_ids(creator)) | set(new_post_ids))
+            await checkpoints.mark(creator, INSERTED, new_post_ids=new_post_ids)
+            return await run_creator_isolated(
+                creator, process_creator(creator, new_post_ids, processor, checkpoints), progress
+            )
         
-        for creator in all_creators_in_file:
-            logger.info(f"Processing creator: {creator}")
-            
-            try:
-                # Check if creator has posts in database
-                check_response = supabase.table('creator_posts') \
-                    .select('id', count='exact') \
-                    .eq('author', creator) \
-                    .execute()
-                
-                if check_response.count == 0:
-                    logger.info(f"  - No posts found for {creator} in database, skipping")
-                    continue
-                
-                # CLUSTERING
-                creator_has_new_data = creator in creators_data
-                new_count = len(creators_data.get(creator, {}).get('ids', []))
-                
-                logger.info(f"  - Has new data: {creator_has_new_data}, New posts: {new_count}")
-                
-                if creator_has_new_data and new_count > 0:
-                    # New posts - decide on clustering strategy
-                    if await should_recluster(creator, new_count):
-                        logger.info(f"  - Reclustering ALL posts for {creator}")
-                        await recluster_creator(creator)
-                    else:
-                        logger.info(f"  - Clustering only NEW posts for {creator}")
-                        data = creators_data[creator]
-                        await cluster_creator_optimized(creator, data['ids'], data['embeddings'], processor)
-                else:
-                    # No new posts - check if needs clustering
-                    cluster_check = supabase.table('creator_posts') \
-                        .select('id') \
-                        .eq('author', creator) \
-                        .is_('cluster_id', 'null') \
-                        .limit(1) \
-                        .execute()
-                    
-                    if cluster_check.data:
-                        logger.info(f"  - Found unclustered posts, clustering now")
-                        await recluster_creator(creator)
-                
-                # VOICE PROFILE GENERATION - ALWAYS RUN THIS
-                logger.info(f"=== GENERATING VOICE PROFILES FOR {creator} ===")
-                
-                # Import and run synchronously to ensure it completes
-                from generate_voice_profiles import generate_voice_profiles_after_clustering
-                
-                result = generate_voice_profiles_after_clustering(creator)
-                logger.info(f"✅ Voice profiles generated for {creator}: {result} profiles created")
-                voice_profiles_created += result
-                
-            except Exception as e:
-                logger.error(f"❌ Error processing {creator}: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
-                # Continue with other creators
-                continue
+        # 3. Stream every chunk through the pipeline
+        pipeline = UploadPipeline(
+            repository,
+            file_processor,
+            embed=processor.generate_embeddings_batch,
+            finalize=finalize,
+            on_posts_saved=posts_saved,
+            on_progress=pipeline_progress,
+            on_inserted=on_posts_inserted
+        )
+        result = await pipeline.run(df, all_creators_in_file)
         
         # Update final status
-        supabase.table('uploaded_files').update({
+        await set_file_status(file_record_id, {
             'status': 'completed',
-            'total_posts': len(inserted_ids) + existing_count
-        }).eq('id', file_record_id).execute()
+            'total_posts': result.inserted + result.duplicates
+        }, stage='done')
         
         elapsed = time.time() - start_time
         logger.info(f"✓ Processed {filename} in {elapsed:.2f} seconds")
-        logger.info(f"  - New posts: {len(inserted_ids)}")
-        logger.info(f"  - Duplicates skipped: {existing_count}")
-        logger.info(f"  - Voice profiles created: {voice_profiles_created}")
+        logger.info(f"  - New posts: {result.inserted}")
+        logger.info(f"  - Duplicates skipped: {result.duplicates}")
+        logger.info(f"  - Voice profiles created: {result.profiles}")
+        if progress.failed:
+            logger.warning(f"  - Creators failed: {len(progress.failed)} ({', '.join(sorted(progress.failed))})")
         
-        return len(inserted_ids)
+        return result.inserted
         
     except Exception as e:
         logger.error(f"Error processing file: {e}")
-        import traceback
         logger.error(f"Full traceback: {traceback.format_exc()}")
         
-        # UPDATE STATUS: Failed
-        supabase.table('uploaded_files').update({
-            'status': 'failed'
-        }).eq('id', file_record_id).execute()
+        # The job queue retries the upload; it is marked failed once no attempts are left
+        processing_events.publish(file_record_id, {'stage': 'attempt_failed', 'error': str(e)})
         raise
 
+# Job handlers - run by the worker pool, retried on failure
+async def run_process_file_job(payload: Dict):
+    """Process an upload spooled to local disk by /upload"""
+    with open(payload['path'], 'rb') as f:
+        contents = f.read()
+    
+    await process_file_optimized(contents, payload['filename'], payload['file_id'])
+    os.remove(payload['path'])
+
+async def run_recluster_job(payload: Dict):
+    """Recluster every post of a creator and regenerate the changed profiles"""
+    creator = payload['creator']
+    await creator_runs.run('recluster', creator, lambda: recluster_and_profile(creator))
+
+async def recluster_and_profile(creator: str):
+    snapshot = await CreatorSnapshot.load(get_repository(), creator)
+    
+    if not snapshot.embedded_ids:
+        logger.warning(f"No embeddings found for {creator}, nothing to cluster")
+        return
+    
+    await recluster_creator(snapshot)
+    # Posts deleted since the index was built leave search results too
+    await vector_indexes.sync(snapshot)
+    await refresh_similar_posts(snapshot)
+    await finalize_creator(snapshot)
+
+async def refresh_similar_posts(snapshot: CreatorSnapshot):
+    """Best effort: posts left without neighbors are picked up by the creator's next run"""
+    try:
+        await update_post_neighbors(get_repository(), snapshot)
+    except Exception as e:
+        logger.error(f"Similar posts update failed for {snapshot.creator}: {e}")
+
+async def resume_upload(file_id) -> Dict:
+    """
+    Finish a stuck upload: only the creators in its manifest that are not
+    profiled yet, each from the stage it reached
+    """
+    repository = get_repository()
+    checkpoints = UploadCheckpoints(repository, file_id)
+    await checkpoints.load()
+    
+    if not checkpoints.rows:
+        # Uploaded before manifests existed - fall back to every creator
+        logger.warning(f"File {file_id} has no manifest, regenerating profiles for all creators")
+        creators = await repository.list_authors()
+        for creator in creators:
+            await creator_runs.run('profiles', creator, lambda: generate_voice_profiles_after_clustering(creator))
+        await set_file_status(file_id, {'status': 'completed'})
+        return {"file_id": file_id, "creators_resumed": creators, "failed": {}}
+    
+    unfinished = checkpoints.unfinished()
+    logger.info(f"Resuming file {file_id}: {len(unfinished)} of {len(checkpoints.rows)} creators unfinished")
+    
+    processor = OptimizedProcessor()
+    progress = FileProgress(repository, file_id, total=len(unfinished))
+    semaphore = asyncio.Semaphore(CREATOR_CONCURRENCY)
+    
+    async def resume_creator(creator: str) -> int:
+        async with creator_runs.lock(creator):
+            # The stage read above may be stale: another run can have finished
+            # the creator while this one waited for the lock
+            stage = await checkpoints.reload(creator)
+            if stage == PROFILED:
+                return 0
+            if stage == CLUSTERED:
+                # Assignments are committed; only the changed profiles are missing
+                changed = set(checkpoints.dirty_clusters(creator))
+                count = await generate_voice_profiles_after_clustering(creator, changed)
+                await mark_profiled(checkpoints, creator, changed, count)
+                return count
+            return await process_creator_locked(creator, checkpoints.new_post_ids(creator), processor, checkpoints)
+    
+    async def run_one(creator: str) -> int:
+        async with semaphore:
+            return await run_creator_isolated(creator, resume_creator(creator), progress)
+    
+    await asyncio.gather(*(run_one(creator) for creator in unfinished))
+    
+    if not progress.failed:
+        await set_file_status(file_id, {'status': 'completed'})
+    return {"file_id": file_id, "creators_resumed": unfinished, "failed": progress.failed}
+
+async def run_resume_file_job(payload: Dict):
+    result = await resume_upload(payload['file_id'])
+    if result['failed']:
+        raise RuntimeError(f"{len(result['failed'])} creators failed: {', '.join(sorted(result['failed']))}")
+
+async def run_creator_similarity_job(payload: Dict):
+    """Rewrite the similar-creators lists affected by profile changes"""
+    await update_creator_similarity(get_repository())
+
+async def run_topic_backfill_job(payload: Dict):
+    """Give every embedded post without a topic its global topic"""
+    await global_topics.backfill(get_repository())
+
+def on_posts_inserted(posts: List[Dict], post_ids: List[int]):
+    """Newly inserted posts go to the search indexes and the global topic model"""
+    vector_indexes.add_posts(posts, post_ids)
+    global_topics.observe(posts, post_ids)
+
+def schedule_creator_similarity(creator: str):
+    """A creator's profiles changed: queue one similarity update (joins a queued one)"""
+    changed_creators.mark(creator)
+    if job_pool is not None:
+        job_pool.enqueue('creator_similarity', {}, 'creators', coalesce=True)
+
+def schedule_topic_backfill(dropped: int):
+    """Posts skipped by a full topic queue: queue one backfill (joins a queued one)"""
+    if job_pool is not None:
+        job_pool.enqueue('topic_backfill', {}, 'topics', coalesce=True)
+
+def enqueue_job(job_type: str, payload: Dict, group_key: str, coalesce: bool = False) -> int:
+    if job_pool is None:
+        raise HTTPException(503, "Job queue is not running")
+    return job_pool.enqueue(job_type, payload, group_key, coalesce=coalesce)
+
+def on_job_failed(job):
+    """An upload whose last attempt failed is final: mark it failed for the admin UI and status streams"""
+    if job.job_type == 'process_file':
+        # No attempt will read the spooled file again
+        try:
+            os.remove(job.payload['path'])
+        except FileNotFoundError:
+            pass
+        task = asyncio.ensure_future(set_file_status(job.payload['file_id'], {'status': 'failed'}, stage='failed'))
+        task.add_done_callback(log_task_error)
+
+def log_task_error(task: asyncio.Future):
+    """Done-callback for fire-and-forget tasks, whose errors would otherwise go unseen"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task failed: {task.exception()}")
+
+def on_job_complete(job):
+    """Finished uploads and reclusters change what the read endpoints serve"""
+    stats_cache.invalidate()
+    creator_directory.refresh_in_background(get_repository())
+    # Profiles rebuilt after the creator's lock was released took their stats
+    # from the directory build that was just invalidated
+    if job.job_type == 'recluster':
+        profile_cache.invalidate(job.payload['creator'])
+    else:
+        profile_cache.invalidate_all()
+
+@app.on_event("startup")
+async def startup_event():
+    global job_pool
+    job_pool = JobWorkerPool(JobQueue(), {
+        'process_file': run_process_file_job,
+        'recluster': run_recluster_job,
+        'resume_file': run_resume_file_job,
+        'creator_similarity': run_creator_similarity_job,
+        'topic_backfill': run_topic_backfill_job,
+    })
+    job_pool.on_complete(on_job_complete)
+    job_pool.on_failed(on_job_failed)
+    # A creator's cached profile is stale once a run has written its clusters or profiles
+    creator_runs.on_release(profile_cache.invalidate)
+    creator_runs.on_release(voice_matcher.invalidate)
+    creator_runs.on_release(schedule_creator_similarity)
+    global_topics.on_dropped(schedule_topic_backfill)
+    global_topics.start(get_repository())
+    # Requeues whatever was running when the last process stopped
+    job_pool.start()
+    # Posts held back until the model has enough to start are only kept in
+    # memory, so until it is ready every start pages through the untopiced posts
+    if not global_topics.model.ready:
+        job_pool.enqueue('topic_backfill', {}, 'topics', coalesce=True)
+
 @app.get("/")
 async def root():
     return {"message": "Kaive AI Backend Running (Optimized)"}
 
 @app.post("/upload")
-async def upload_excel(file: UploadFile, background_tasks: BackgroundTasks):
-    """Optimized upload endpoint with background processing"""
+async def upload_excel(file: UploadFile):
+    """Optimized upload endpoint - stores the file and queues its processing"""
     try:
         # Validate file type
         if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
@@ -473,112 +646,81 @@ async def upload_excel(file: UploadFile, background_tasks: BackgroundTasks):
         
         # Save to storage
         file_path = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-        supabase.storage.from_("excel-files").upload(file_path, contents)
+        repository = get_repository()
+        await repository.upload("excel-files", file_path, contents)
         
         # Create file record
-        file_record = supabase.table('uploaded_files').insert({
-            'filename': file.filename,
-            'status': 'processing'
-        }).execute()
+        file_record = await repository.create_file_record(file.filename, status='processing')
         
-        file_record_id = file_record.data[0]['id']
+        file_record_id = file_record['id']
         
-        # Process in background for immediate response
-        background_tasks.add_task(
-            process_file_optimized,
-            contents,
-            file.filename,
-            file_record_id
-        )
+        # Spool to local disk so the job survives a restart, then queue it
+        os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+        spool_path = os.path.join(UPLOAD_SPOOL_DIR, f"{file_record_id}_{os.path.basename(file.filename)}")
+        with open(spool_path, 'wb') as f:
+            f.write(contents)
+        
+        job_id = enqueue_job('process_file', {
+            'file_id': file_record_id,
+            'filename': file.filename,
+            'path': spool_path
+        }, group_key=f"file:{file_record_id}")
+        processing_events.publish(file_record_id, {
+            'status': 'processing',
+            'stage': 'queued',
+            'filename': file.filename
+        })
         
         return {
             "status": "processing",
             "message": "File uploaded successfully. Processing in background.",
             "file_id": file_record_id,
+            "job_id": job_id,
             "filename": file.filename
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Upload error: {e}")
         raise HTTPException(500, f"Error uploading file: {str(e)}")
 
 @app.get("/stats")
 async def get_stats():
-    """Optimized stats endpoint with single query"""
+    """Platform totals, served from memory and refreshed when jobs finish"""
     try:
-        # Use RPC for optimized counting
-        stats_query = """
-        SELECT 
-            COUNT(DISTINCT id) as total_posts,
-            COUNT(DISTINCT author) as unique_authors
-        FROM creator_posts
-        """
-        
-        # Get counts efficiently
-        posts_response = supabase.table('creator_posts').select('id, author', count='exact').execute()
-        files_response = supabase.table('uploaded_files').select('*').execute()
-        
-        # Calculate unique authors efficiently
-        unique_authors = len(set(p['author'] for p in posts_response.data if p.get('author')))
+        stats = await stats_cache.get(get_repository())
         
         return {
-            "total_posts": posts_response.count,
-            "unique_authors": unique_authors,
-            "files_processed": len(files_response.data)
+            "total_posts": stats['total_posts'],
+            "unique_authors": stats['unique_authors'],
+            "files_processed": stats['files_processed']
         }
     except Exception as e:
         logger.error(f"Stats error: {e}")
         raise HTTPException(500, f"Error getting stats: {str(e)}")
 
 @app.post("/cluster/{creator}")
-async def cluster_creator(creator: str, background_tasks: BackgroundTasks):
-    """Optimized manual clustering endpoint"""
+async def cluster_creator(creator: str):
+    """Optimized manual clustering endpoint - queues a recluster job"""
     try:
-        # Get posts with embeddings
-        response = supabase.table('creator_posts') \
-            .select('id, embedding') \
-            .eq('author', creator) \
-            .execute()
+        post_count = await get_repository().count_posts(creator)
         
-        if not response.data:
+        if not post_count:
             raise HTTPException(404, f"No posts found for {creator}")
         
-        # Prepare data
-        post_ids = []
-        embeddings = []
-        
-        for post in response.data:
-            if post.get('embedding'):
-                post_ids.append(post['id'])
-                if isinstance(post['embedding'], str):
-                    embeddings.append(json.loads(post['embedding']))
-                else:
-                    embeddings.append(post['embedding'])
-        
-        if not embeddings:
-            raise HTTPException(400, f"No embeddings found for {creator}")
-        
-        # Process in background
-        processor = OptimizedProcessor()
-        background_tasks.add_task(
-            cluster_creator_optimized,
-            creator,
-            post_ids,
-            embeddings,
-            processor
-        )
-        
-        background_tasks.add_task(
-            generate_voice_profiles_after_clustering,
-            creator
-        )
+        # A recluster of this creator still waiting in the queue covers this request too
+        job_id = enqueue_job('recluster', {'creator': creator}, group_key=f"creator:{creator}", coalesce=True)
         
         return {
             "status": "processing",
-            "message": f"Clustering and voice profile generation started for {creator}",
-            "post_count": len(post_ids)
+            "message": f"Clustering and voice profile generation queued for {creator}",
+            "job_id": job_id,
+            "post_count": post_count
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Cluster error: {e}")
         raise HTTPException(500, f"Error clustering posts: {str(e)}")
@@ -587,19 +729,126 @@ async def cluster_creator(creator: str, background_tasks: BackgroundTasks):
 async def get_processing_status(file_id: str):
     """Check the status of file processing"""
     try:
-        response = supabase.table('uploaded_files') \
-            .select('*') \
-            .eq('id', file_id) \
-            .execute()
+        file_record = await get_repository().get_file_record(file_id)
         
-        if not response.data:
+        if not file_record:
             raise HTTPException(404, "File not found")
         
-        return response.data[0]
+        return file_record
         
     except Exception as e:
         raise HTTPException(500, f"Error checking status: {str(e)}")
 
+@app.get("/processing-status/{file_id}/stream")
+async def stream_processing_status(file_id: str, request: Request):
+    """
+    Server-Sent Events stream of a file's processing status.
+    The first event is the current status (from memory, or the file record
+    for files this process has not seen); each later event is pushed by the
+    pipeline as it happens. The stream ends once the file is finished.
+    """
+    # Subscribe before taking the snapshot so no event falls in between
+    queue = processing_events.subscribe(file_id)
+    try:
+        snapshot = processing_events.snapshot(file_id)
+        if snapshot is None:
+            snapshot = await get_repository().get_file_record(file_id)
+            if not snapshot:
+                raise HTTPException(404, "File not found")
+    except Exception:
+        processing_events.unsubscribe(file_id, queue)
+        raise
+    
+    async def events():
+        try:
+            status = snapshot
+            yield format_status_event(status)
+            while not is_terminal(status):
+                try:
+                    status = await asyncio.wait_for(queue.get(), EVENT_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_status_event(status)
+        finally:
+            processing_events.unsubscribe(file_id, queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def format_status_event(status: Dict) -> str:
+    event_id = f"id: {status['sequence']}\n" if 'sequence' in status else ""
+    return f"{event_id}event: status\ndata: {json.dumps(status, default=str)}\n\n"
+
+@app.get("/jobs/metrics")
+async def get_job_metrics():
+    """Queue depth per job type and per-creator run coordination"""
+    if job_pool is None:
+        raise HTTPException(503, "Job queue is not running")
+    
+    depth = job_pool.queue.depth()
+    return {
+        "depth": depth,
+        "queued": sum(counts['queued'] for counts in depth.values()),
+        "running": sum(counts['running'] for counts in depth.values()),
+        # Creators with clustering/profile work holding or waiting for their lock
+        "creators_busy": creator_runs.busy(),
+        "runs_coalesced": creator_runs.coalesced
+    }
+
+@app.post("/topics/backfill")
+async def backfill_topics():
+    """Queue a job assigning global topics to posts that have none (e.g. uploaded before topics existed)"""
+    try:
+        job_id = enqueue_job('topic_backfill', {}, group_key='topics', coalesce=True)
+        return {"job_id": job_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Topic backfill failed to queue: {e}")
+        raise HTTPException(500, str(e))
+
+@app.get("/api/topics")
+async def get_topics():
+    """Global topics across all creators with post counts and engagement, largest first"""
+    try:
+        topics = []
+        for row in await get_repository().topic_stats():
+            count = row['post_count']
+            engagement = row['likes'] + row['comments'] + row['reposts']
+            topics.append({
+                **row,
+                'avg_likes': round(row['likes'] / count, 1),
+                'avg_engagement': round(engagement / count, 1),
+                'total_engagement': engagement
+            })
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": topics,
+            "model": global_topics.metrics()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error fetching topics: {e}")
+        raise HTTPException(500, str(e))
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int):
+    """Status of one background job"""
+    if job_pool is None:
+        raise HTTPException(503, "Job queue is not running")
+    
+    job = job_pool.queue.get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
+
 # NEW ENDPOINT - FORCE VOICE PROFILE GENERATION
 @app.post("/generate-voice-profiles/{creator}")
 async def force_generate_voice_profiles(creator: str):
@@ -611,17 +860,14 @@ async def force_generate_voice_profiles(creator: str):
         logger.info(f"FORCE GENERATING VOICE PROFILES FOR {creator}")
         
         # Check if creator exists
-        check = supabase.table('creator_posts') \
-            .select('id', count='exact') \
-            .eq('author', creator) \
-            .execute()
-        
-        if check.count == 0:
+        if not await get_repository().has_posts(creator):
             raise HTTPException(404, f"No posts found for {creator}")
         
-        # Run synchronously to ensure completion
-        from generate_voice_profiles import generate_voice_profiles_after_clustering
-        result = generate_voice_profiles_after_clustering(creator)
+        # Awaited to ensure completion; joins a regeneration already queued for this creator
+        result = await creator_runs.run(
+            'profiles', creator, lambda: generate_voice_profiles_after_clustering(creator)
+        )
+        creator_directory.invalidate()
         
         return {
             "success": True,
@@ -643,58 +889,42 @@ async def force_generate_voice_profiles(creator: str):
 @app.post("/fix-all-stuck-files")
 async def fix_all_stuck_files():
     """
-    EMERGENCY ENDPOINT: Process all files stuck at 'posts_saved' status
+    EMERGENCY ENDPOINT: Resume all files stuck at 'posts_saved' status.
+    Each file gets a resume job that redoes only the unfinished stages of
+    the creators in its manifest.
     """
     try:
         # Get all stuck files
-        stuck_files = supabase.table('uploaded_files') \
-            .select('*') \
-            .eq('status', 'posts_saved') \
-            .execute()
-        
-        results = []
-        
-        for file in stuck_files.data:
-            # Get unique creators from posts
-            creators_response = supabase.table('creator_posts') \
-                .select('author') \
-                .execute()
-            
-            unique_creators = list(set([p['author'] for p in creators_response.data if p.get('author')]))
-            
-            file_result = {
+        stuck_files = await get_repository().list_file_records(status='posts_saved')
+        if job_pool is None:
+            raise HTTPException(503, "Job queue is not running")
+        
+        # 'posts_saved' is also the status of an upload still profiling; files
+        # with a queued or running job are live, not stuck
+        active = job_pool.queue.active_groups(['process_file', 'resume_file'])
+        
+        jobs = []
+        skipped = []
+        for file in stuck_files:
+            group_key = f"file:{file['id']}"
+            if group_key in active:
+                skipped.append(file['id'])
+                continue
+            job_id = enqueue_job('resume_file', {'file_id': file['id']}, group_key=group_key)
+            jobs.append({
                 "file_id": file['id'],
                 "filename": file['filename'],
-                "creators_processed": []
-            }
-            
-            # Generate voice profiles for each creator
-            for creator in unique_creators:
-                try:
-                    from generate_voice_profiles import generate_voice_profiles_after_clustering
-                    count = generate_voice_profiles_after_clustering(creator)
-                    file_result["creators_processed"].append({
-                        "creator": creator,
-                        "profiles": count
-                    })
-                except Exception as e:
-                    file_result["creators_processed"].append({
-                        "creator": creator,
-                        "error": str(e)
-                    })
-            
-            # Update file status
-            supabase.table('uploaded_files').update({
-                'status': 'completed'
-            }).eq('id', file['id']).execute()
-            
-            results.append(file_result)
+                "job_id": job_id
+            })
         
         return {
-            "files_processed": len(results),
-            "details": results
+            "files_queued": len(jobs),
+            "files_in_progress": skipped,
+            "details": jobs
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Fix all failed: {e}")
         raise HTTPException(500, str(e))
@@ -704,36 +934,32 @@ async def fix_all_stuck_files():
 async def get_all_creators():
     """Get all creators with their stats"""
     try:
+        repository = get_repository()
+        
         # Get all creators from creators table
-        creators_response = supabase.table('creators') \
-            .select('*') \
-            .execute()
+        creators = await repository.list_creators()
         
         creators_list = []
         
-        for creator in creators_response.data:
+        for creator in creators:
             # Get post stats for each creator
-            posts_response = supabase.table('creator_posts') \
-                .select('id, like_count, comment_count, repost_count') \
-                .eq('author', creator['author']) \
-                .execute()
+            posts = await repository.fetch_posts_by_author(
+                creator['author'], 'id, like_count, comment_count, repost_count'
+            )
             
-            post_count = len(posts_response.data)
+            post_count = len(posts)
             
             # Calculate average engagement
-            total_likes = sum(p.get('like_count', 0) for p in posts_response.data)
-            total_comments = sum(p.get('comment_count', 0) for p in posts_response.data)
-            total_reposts = sum(p.get('repost_count', 0) for p in posts_response.data)
+            total_likes = sum(p.get('like_count') or 0 for p in posts)
+            total_comments = sum(p.get('comment_count') or 0 for p in posts)
+            total_reposts = sum(p.get('repost_count') or 0 for p in posts)
             
             avg_engagement = 0
             if post_count > 0:
                 avg_engagement = round((total_likes + total_comments + total_reposts) / post_count)
             
             # Get voice profiles count
-            voice_profiles_response = supabase.table('creator_voice_profiles') \
-                .select('cluster_id', count='exact') \
-                .eq('creator', creator['author']) \
-                .execute()
+            voice_profiles_count = await repository.count_voice_profiles(creator['author'])
             
             creator_data = {
                 'id': creator['id'],
@@ -745,7 +971,7 @@ async def get_all_creators():
                 'post_count': post_count,
                 'avg_likes': round(total_likes / post_count) if post_count > 0 else 0,
                 'avg_engagement': avg_engagement,
-                'voice_profiles_count': voice_profiles_response.count,
+                'voice_profiles_count': voice_profiles_count,
                 'created_at': creator.get('created_at', '')
             }
             
@@ -754,11 +980,11 @@ async def get_all_creators():
         # Sort by post count (most active creators first)
         creators_list.sort(key=lambda x: x['post_count'], reverse=True)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": creators_list,
             "total": len(creators_list)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error fetching creators: {e}")
@@ -767,35 +993,29 @@ async def get_all_creators():
 # ADD THE NEW FAST ENDPOINT HERE ↓↓↓
 
 @app.get("/api/creators/fast")
-async def get_all_creators_fast():
-    """Ultra-fast endpoint for creators listing - uses database function"""
+async def get_all_creators_fast(request: Request):
+    """
+    Ultra-fast endpoint for creators listing - served from the in-memory
+    creator directory, rebuilt from the database function when a job
+    finishes. Revalidation with If-None-Match costs a 304 and no database work.
+    """
     try:
-        # Call the Supabase function we just created
-        response = supabase.rpc('get_creators_with_stats', {}).execute()
+        directory = await creator_directory.get(get_repository())
+        headers = {
+            'ETag': directory.etag,
+            'Cache-Control': f'public, max-age={CREATOR_DIRECTORY_MAX_AGE}, must-revalidate'
+        }
         
-        # Transform the data to match your frontend expectations
-        creators_list = []
-        for row in response.data:
-            creator_data = {
-                'id': row['creator_id'],
-                'author': row['creator_name'],
-                'headline': row['creator_headline'],
-                'location': row['creator_location'],
-                'avatar_url': row['creator_avatar_url'],
-                'linkedin_url': row['creator_linkedin_url'],
-                'created_at': row['creator_created_at'],
-                'post_count': row['total_posts'],
-                'avg_likes': row['average_likes'],
-                'avg_engagement': row['average_engagement'],
-                'voice_profiles_count': row['total_voice_profiles']
-            }
-            creators_list.append(creator_data)
+        if etag_matches(request.headers.get('if-none-match'), directory.etag):
+            return Response(status_code=304, headers=headers)
         
-        return {
-            "success": True,
-            "data": creators_list,
-            "total": len(creators_list)
-        }
+        # Served from compressed copies made once per directory build
+        encoding = negotiate_encoding(request.headers.get('accept-encoding'))
+        headers['Vary'] = 'Accept-Encoding'
+        if encoding is None:
+            return Response(content=directory.body, media_type='application/json', headers=headers)
+        headers['Content-Encoding'] = encoding
+        return Response(content=directory.encoded(encoding), media_type='application/json', headers=headers)
         
     except Exception as e:
         logger.error(f"Error fetching creators fast: {e}")
@@ -806,68 +1026,308 @@ async def get_all_creators_fast():
 async def get_creator_details(author_name: str):
     """Get detailed information for a specific creator"""
     try:
-        # Get creator info
-        creator_response = supabase.table('creators') \
-            .select('*') \
-            .eq('author', author_name) \
-            .single() \
-            .execute()
-        
-        if not creator_response.data:
-            raise HTTPException(404, "Creator not found")
-        
-        creator = creator_response.data
-        
-        # Get aggregated stats using our function
-        stats_response = supabase.rpc('get_creators_with_stats', {}).execute()
+        # Get creator info and this creator's stats concurrently
+        repository = get_repository()
+        creator, creator_stats = await asyncio.gather(
+            repository.get_creator(author_name),
+            get_creator_stats(author_name)
+        )
         
-        # Find this creator's stats
-        creator_stats = next((s for s in stats_response.data if s['creator_name'] == author_name), None)
+        if not creator:
+            raise HTTPException(404, "Creator not found")
         
-        if creator_stats:
-            creator.update({
-                'post_count': creator_stats['total_posts'],
-                'avg_likes': creator_stats['average_likes'],
-                'avg_engagement': creator_stats['average_engagement'],
-                'voice_profiles_count': creator_stats['total_voice_profiles']
-            })
+        creator.update(creator_stats)
         
         return {
             "success": True,
             "data": creator
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching creator details: {e}")
         raise HTTPException(500, str(e))
 
-@app.get("/api/creators/{author_name}/posts")
-async def get_creator_posts(author_name: str, limit: int = 50, offset: int = 0):
-    """Get posts for a specific creator"""
+async def get_creator_stats(author_name: str) -> Dict:
+    """One creator's stats from the creator directory, else from a per-creator query"""
+    entry = creator_directory.lookup(author_name)
+    if entry is not None:
+        return {key: entry[key] for key in ('post_count', 'avg_likes', 'avg_engagement', 'voice_profiles_count')}
+    return await get_repository().get_creator_stats(author_name)
+
+@app.get("/api/creators/{author_name}/profile")
+async def get_creator_profile(author_name: str):
+    """
+    Everything the creator profile page shows, in one response: creator info
+    with stats, ranked voice profiles and the first page of posts. Built
+    concurrently and cached per creator until its clusters, profiles or
+    posts change.
+    """
     try:
-        # Get posts with engagement metrics
-        posts_response = supabase.table('creator_posts') \
-            .select('*') \
-            .eq('author', author_name) \
-            .order('post_timestamp', desc=True) \
-            .range(offset, offset + limit - 1) \
-            .execute()
+        profile = await profile_cache.get(author_name, lambda: load_creator_profile(author_name))
         
-        return {
+        if profile is None:
+            raise HTTPException(404, "Creator not found")
+        
+        return FastJSONResponse({
             "success": True,
-            "data": posts_response.data,
-            "total": len(posts_response.data)
+            "data": profile
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching creator profile: {e}")
+        raise HTTPException(500, str(e))
+
+async def load_creator_profile(author_name: str) -> Optional[Dict]:
+    repository = get_repository()
+    fields = parse_fields(None)
+    creator, creator_stats, voice_profiles, rows = await asyncio.gather(
+        repository.get_creator(author_name),
+        get_creator_stats(author_name),
+        repository.list_voice_profiles(author_name, PROFILE_SUMMARY_COLUMNS),
+        repository.page_posts_by_author(author_name, ', '.join(fields), PROFILE_POSTS_PAGE_SIZE + 1)
+    )
+    
+    if not creator:
+        return None
+    
+    creator.update(creator_stats)
+    page = rows[:PROFILE_POSTS_PAGE_SIZE]
+    return {
+        "creator": creator,
+        "voice_profiles": voice_profiles,
+        "posts": {
+            "data": project(page, fields),
+            "next_cursor": encode_cursor(page[-1]) if len(rows) > PROFILE_POSTS_PAGE_SIZE else None
         }
+    }
+
+@app.get("/api/creators/{author_name}/posts")
+async def get_creator_posts(author_name: str, limit: int = 50, cursor: Optional[str] = None,
+                            fields: Optional[str] = None):
+    """
+    Get posts for a specific creator, newest first.
+    Pass the returned next_cursor to get the following page; fields selects
+    the columns returned (the embedding is only included when asked for).
+    """
+    try:
+        wanted = parse_fields(fields)
+        after = decode_cursor(cursor) if cursor else None
+        limit = max(1, min(limit, POSTS_PAGE_MAX))
         
+        # One extra row tells whether another page follows
+        rows = await get_repository().page_posts_by_author(author_name, ', '.join(wanted), limit + 1, after)
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": project(page, wanted),
+            "total": len(page),
+            "next_cursor": next_cursor
+        })
+        
+    except InvalidPageRequest as e:
+        raise HTTPException(400, str(e))
     except Exception as e:
         logger.error(f"Error fetching creator posts: {e}")
         raise HTTPException(500, str(e))
 
+@app.get("/api/creators/{author_name}/search")
+async def search_creator_posts(author_name: str, q: str, k: int = 10, fields: Optional[str] = None):
+    """
+    A creator's posts most similar in meaning to the query, best first.
+    Each post carries its cosine similarity as score.
+    """
+    try:
+        query = q.strip()
+        if not query:
+            raise HTTPException(400, "Query must not be empty")
+        wanted = parse_fields(fields)
+        k = max(1, min(k, SEARCH_MAX_K))
+        
+        repository = get_repository()
+        # The index loads (or catches up) while the query is being embedded
+        vector, index = await asyncio.gather(
+            query_embeddings.get(query, OptimizedProcessor().generate_embeddings_batch),
+            vector_indexes.get(repository, author_name)
+        )
+        if vector is None:
+            raise HTTPException(502, "Could not embed the query")
+        
+        matches = index.search(vector, k)
+        columns = ', '.join(dict.fromkeys(['id'] + wanted))
+        rows = await repository.fetch_posts_by_ids([post_id for post_id, _ in matches], columns)
+        rows_by_id = {row['id']: row for row in rows}
+        
+        results = []
+        for post_id, score in matches:
+            row = rows_by_id.get(post_id)
+            if row is not None:
+                results.append({**project([row], wanted)[0], 'score': round(score, 4)})
+        
+        return FastJSONResponse({
+            "success": True,
+            "data": results,
+            "total": len(results)
+        })
+        
+    except HTTPException:
+        raise
+    except InvalidPageRequest as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        logger.error(f"Error searching creator posts: {e}")
+        raise HTTPException(500, str(e))
+
+@app.get("/api/creators/{author_name}/engagement")
+async def get_creator_engagement(author_name: str, period: str = 'week', cluster_id: Optional[int] = None,
+                                 since: Optional[date] = None, until: Optional[date] = None):
+    """
+    Weekly or monthly engagement of a creator (or one of its clusters),
+    oldest first, read from the precomputed rollups.
+    """
+    if period not in ROLLUP_PERIODS:
+        raise HTTPException(400, f"period must be one of: {', '.join(ROLLUP_PERIODS)}")
+    try:
+        rows = await get_repository().engagement_series(
+            author_name, period, cluster_id if cluster_id is not None else ROLLUP_ALL_CLUSTERS, since, until
+        )
+        series = []
+        for row in rows:
+            count = row['post_count']
+            engagement = row['likes'] + row['comments'] + row['reposts']
+            series.append({
+                **row,
+                'avg_likes': round(row['likes'] / count, 1),
+                'avg_engagement': round(engagement / count, 1),
+                'total_engagement': engagement
+            })
+        
+        return FastJSONResponse({
+            "success": True,
+            "creator": author_name,
+            "period": period,
+            "cluster_id": cluster_id,
+            "data": series
+        })
+        
+    except Exception as e:
+        logger.error(f"Error fetching creator engagement: {e}")
+        raise HTTPException(500, str(e))
+
+@app.get("/api/creators/{author_name}/similar")
+async def get_similar_creators(author_name: str, k: Optional[int] = None):
+    """Creators who write most like this one (topics and style), best first"""
+    try:
+        row = await get_repository().get_creator_similarity(author_name)
+        if row is None:
+            raise HTTPException(404, "No similar creators computed for this creator")
+        
+        limit = max(1, min(k, SEARCH_MAX_K)) if k is not None else None
+        pairs = list(zip(row['similar_creators'], row['scores']))[:limit]
+        return FastJSONResponse({
+            "success": True,
+            "creator": author_name,
+            "data": [{"creator": creator, "score": score} for creator, score in pairs],
+            "updated_at": row.get('updated_at')
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching similar creators: {e}")
+        raise HTTPException(500, str(e))
+
+@app.get("/api/posts/{post_id}/similar")
+async def get_similar_posts(post_id: int, k: Optional[int] = None, fields: Optional[str] = None):
+    """
+    The creator's posts most similar to this one, best first, from the
+    precomputed neighbor graph. Each post carries its cosine similarity as score.
+    """
+    try:
+        wanted = parse_fields(fields)
+        repository = get_repository()
+        
+        neighbors = await repository.get_post_neighbors(post_id)
+        if neighbors is None:
+            raise HTTPException(404, "No similar posts for this post")
+        
+        # A negative k would otherwise slice from the end
+        limit = max(1, min(k, SEARCH_MAX_K)) if k is not None else None
+        pairs = list(zip(neighbors['neighbor_ids'], neighbors['scores']))[:limit]
+        columns = ', '.join(dict.fromkeys(['id'] + wanted))
+        rows = await repository.fetch_posts_by_ids([neighbor_id for neighbor_id, _ in pairs], columns)
+        rows_by_id = {row['id']: row for row in rows}
+        
+        results = [
+            {**project([rows_by_id[neighbor_id]], wanted)[0], 'score': score}
+            for neighbor_id, score in pairs if neighbor_id in rows_by_id
+        ]
+        return FastJSONResponse({
+            "success": True,
+            "data": results,
+            "total": len(results)
+        })
+        
+    except HTTPException:
+        raise
+    except InvalidPageRequest as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        logger.error(f"Error fetching similar posts: {e}")
+        raise HTTPException(500, str(e))
+
+class VoiceMatchRequest(BaseModel):
+    drafts: List[str]
+    creator: Optional[str] = None
+    top_k: int = VOICE_MATCH_TOP_K
+
+@app.post("/api/voice-match")
+async def match_voice_clusters(request: VoiceMatchRequest):
+    """
+    Best matching voice clusters for each draft, across all creators or only
+    request.creator, with similarity scores and each cluster's voice_schema.
+    """
+    try:
+        drafts = [draft.strip() for draft in request.drafts]
+        if not drafts or not all(drafts):
+            raise HTTPException(400, "Drafts must not be empty")
+        if len(drafts) > VOICE_MATCH_MAX_DRAFTS:
+            raise HTTPException(400, f"At most {VOICE_MATCH_MAX_DRAFTS} drafts per request")
+        top_k = max(1, min(request.top_k, SEARCH_MAX_K))
+        
+        vectors = await query_embeddings.get_many(drafts, OptimizedProcessor().generate_embeddings_batch)
+        if any(vector is None for vector in vectors):
+            raise HTTPException(502, "Could not embed the drafts")
+        
+        matches = await voice_matcher.match(get_repository(), np.vstack(vectors), top_k, request.creator)
+        return FastJSONResponse({
+            "success": True,
+            "data": [{"draft": draft, "matches": found} for draft, found in zip(request.drafts, matches)]
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error matching voice clusters: {e}")
+        raise HTTPException(500, str(e))
+
 
 # Cleanup on shutdown
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
+    if job_pool is not None:
+        # Running jobs go back to the queue and resume on the next start
+        await job_pool.stop()
+        job_pool.queue.close()
+    await global_topics.stop()
+    await close_repository()
     executor.shutdown(wait=True)
+    cluster_pool.shutdown(wait=True)
 
 if __name__ == "__main__":
     import uvicorn
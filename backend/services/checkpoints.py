@@ -0,0 +1,85 @@
+# services/checkpoints.py
+"""
+Per-upload manifest and stage checkpoints (table from sql/upload_creators.sql).
+Every creator in an uploaded file gets a row when the file is parsed, and
+the row moves through parsed -> inserted -> clustered -> profiled as the
+pipeline finishes each stage for that creator. Resuming a stuck upload
+redoes only the stages its unfinished creators have not reached.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from core.database import Repository
+
+logger = logging.getLogger(__name__)
+
+PARSED, INSERTED, CLUSTERED, PROFILED = 'parsed', 'inserted', 'clustered', 'profiled'
+
+
+class UploadCheckpoints:
+    """Manifest rows of one upload, cached in memory and written through"""
+
+    def __init__(self, repository: Repository, file_id):
+        self.repository = repository
+        self.file_id = file_id
+        self.rows: Dict[str, Dict] = {}
+
+    async def load(self) -> Dict[str, Dict]:
+        """Read the manifest (empty for uploads made before checkpoints existed)"""
+        rows = await self.repository.list_upload_creators(self.file_id)
+        self.rows = {row['creator']: row for row in rows}
+        return self.rows
+
+    async def reload(self, creator: str) -> Optional[str]:
+        """Re-read one creator's row (another run may have moved it on); returns its stage"""
+        row = await self.repository.get_upload_creator(str(self.file_id), creator)
+        if row is not None:
+            self.rows[creator] = row
+        return self.stage(creator)
+
+    async def record_manifest(self, creators: Iterable[str]) -> None:
+        """Add creators not yet in the manifest at the parsed stage"""
+        new_rows = [self._row(creator, PARSED) for creator in sorted(set(creators)) if creator not in self.rows]
+        if not new_rows:
+            return
+        await self.repository.upsert_upload_creators(new_rows)
+        self.rows.update({row['creator']: row for row in new_rows})
+        logger.info(f"Recorded {len(new_rows)} creators in the manifest of file {self.file_id}")
+
+    def stage(self, creator: str) -> Optional[str]:
+        row = self.rows.get(creator)
+        return row['stage'] if row else None
+
+    def new_post_ids(self, creator: str) -> List[int]:
+        row = self.rows.get(creator)
+        return list(row.get('new_post_ids') or []) if row else []
+
+    def dirty_clusters(self, creator: str) -> List[int]:
+        row = self.rows.get(creator)
+        return list(row.get('dirty_clusters') or []) if row else []
+
+    def unfinished(self) -> List[str]:
+        return sorted(creator for creator, row in self.rows.items() if row['stage'] != PROFILED)
+
+    async def mark(self, creator: str, stage: str, new_post_ids: Optional[List[int]] = None,
+                   dirty_clusters: Optional[Iterable[int]] = None) -> None:
+        """Checkpoint a creator; fields not given keep their stored values"""
+        row = self._row(
+            creator, stage,
+            new_post_ids if new_post_ids is not None else self.new_post_ids(creator),
+            sorted(dirty_clusters) if dirty_clusters is not None else self.dirty_clusters(creator)
+        )
+        await self.repository.upsert_upload_creators([row])
+        self.rows[creator] = row
+
+    def _row(self, creator: str, stage: str, new_post_ids: Optional[List[int]] = None,
+             dirty_clusters: Optional[List[int]] = None) -> Dict:
+        return {
+            'file_id': str(self.file_id),
+            'creator': creator,
+            'stage': stage,
+            'new_post_ids': new_post_ids or [],
+            'dirty_clusters': dirty_clusters or [],
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }
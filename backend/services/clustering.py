@@ -0,0 +1,35 @@
+# services/clustering.py
+"""
+KMeans clustering of post embeddings, and nearest-centroid assignment of
+new posts to existing clusters.
+Kept as a plain module-level function so it can run in a worker process:
+fitting is CPU-bound and would otherwise block the event loop that the
+other creators' database and OpenAI calls run on.
+"""
+import numpy as np
+from sklearn.cluster import KMeans
+
+from core.config import DEFAULT_N_CLUSTERS
+
+
+def fit_cluster_labels(embeddings: np.ndarray, n_clusters: int = DEFAULT_N_CLUSTERS) -> np.ndarray:
+    """Cluster an (n_posts, dim) embedding matrix and return one label per post"""
+    if len(embeddings) <= 1:
+        return np.zeros(len(embeddings), dtype=int)
+
+    kmeans = KMeans(
+        n_clusters=min(n_clusters, len(embeddings)),
+        random_state=42,
+        n_init=10,
+        max_iter=100,  # Limit iterations for speed
+        algorithm='elkan'  # Faster for well-separated clusters
+    )
+
+    return kmeans.fit_predict(embeddings)
+
+
+def nearest_centroid_labels(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Row index of each embedding's most cosine-similar centroid"""
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    centroids = centroids / np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return np.argmax(embeddings @ centroids.T, axis=1)
@@ -0,0 +1,128 @@
+# services/creator_directory.py
+"""
+Materialized creator directory behind /api/creators/fast.
+The get_creators_with_stats RPC aggregates over every post, but its result
+only changes when an upload or recluster finishes. The directory runs it
+once, keeps the serialized response and its ETag in memory, and is rebuilt
+after each finished job; clients revalidate with If-None-Match and get a
+304 without any database work.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+from core.database import Repository
+from core.responses import dumps, compress
+
+logger = logging.getLogger(__name__)
+
+
+def _creator_from_row(row: Dict) -> Dict:
+    """get_creators_with_stats row -> the shape the frontend expects"""
+    return {
+        'id': row['creator_id'],
+        'author': row['creator_name'],
+        'headline': row['creator_headline'],
+        'location': row['creator_location'],
+        'avatar_url': row['creator_avatar_url'],
+        'linkedin_url': row['creator_linkedin_url'],
+        'created_at': row['creator_created_at'],
+        'post_count': row['total_posts'],
+        'avg_likes': row['average_likes'],
+        'avg_engagement': row['average_engagement'],
+        'voice_profiles_count': row['total_voice_profiles']
+    }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header covers etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in (tag[2:] if tag.startswith('W/') else tag for tag in tags)
+
+
+class CreatorDirectory:
+    """All creators with their stats, the encoded response body and its ETag"""
+
+    def __init__(self):
+        self.creators: List[Dict] = []
+        self.by_author: Dict[str, Dict] = {}
+        self.body = b''
+        # Compressed copies of body, made once per build
+        self._encoded: Dict[str, bytes] = {}
+        self.etag = ''
+        self.loaded_at: Optional[float] = None
+        self._stale = True
+        self._generation = 0
+        self._refreshing: Optional[asyncio.Future] = None
+        self._refreshing_generation = 0
+
+    async def get(self, repository: Repository) -> 'CreatorDirectory':
+        """The directory, rebuilt first if a job finished since the last build"""
+        if self._stale:
+            await self.refresh(repository)
+        return self
+
+    async def refresh(self, repository: Repository) -> None:
+        """Rebuild from the database; concurrent callers share one rebuild"""
+        if self._refreshing is not None and self._refreshing_generation != self._generation:
+            # That rebuild started before the latest change; a new one follows it
+            await asyncio.gather(asyncio.shield(self._refreshing), return_exceptions=True)
+        if self._refreshing is None:
+            self._refreshing_generation = self._generation
+            self._refreshing = asyncio.ensure_future(self._rebuild(repository, self._generation))
+        await asyncio.shield(self._refreshing)
+
+    async def _rebuild(self, repository: Repository, generation: int) -> None:
+        start = time.time()
+        try:
+            rows = await repository.rpc('get_creators_with_stats', {})
+        finally:
+            self._refreshing = None
+
+        creators = [_creator_from_row(row) for row in rows]
+        body = dumps({"success": True, "data": creators, "total": len(creators)})
+
+        self.creators = creators
+        self.by_author = {creator['author']: creator for creator in creators}
+        self.body = body
+        self._encoded = {}
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.loaded_at = time.time()
+        # Invalidated while loading: keep serving this build but rebuild on the next read
+        self._stale = generation != self._generation
+        logger.info(f"Creator directory rebuilt: {len(creators)} creators in {time.time() - start:.2f}s")
+
+    def encoded(self, encoding: str) -> bytes:
+        """body compressed with encoding ('br' or 'gzip')"""
+        if encoding not in self._encoded:
+            self._encoded[encoding] = compress(self.body, encoding)
+        return self._encoded[encoding]
+
+    def lookup(self, author: str) -> Optional[Dict]:
+        """One creator's entry from a current build; None if not loaded or out of date"""
+        if self._stale:
+            return None
+        return self.by_author.get(author)
+
+    def invalidate(self) -> None:
+        self._stale = True
+        self._generation += 1
+
+    def refresh_in_background(self, repository: Repository) -> None:
+        """Invalidate and rebuild now, so the next visitor does not wait for it"""
+        self.invalidate()
+        task = asyncio.ensure_future(self.refresh(repository))
+        task.add_done_callback(self._log_refresh_error)
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Future) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Creator directory refresh failed: {task.exception()}")
+
+
+# Shared by the creator endpoints and the job completion hook
+creator_directory = CreatorDirectory()
@@ -0,0 +1,101 @@
+# services/creator_runs.py
+"""
+Per-creator coordination of clustering and voice profile work.
+Every run that writes a creator's cluster assignments or profiles holds
+that creator's lock, so writes for one creator never interleave. Repeated
+requests for the same kind of run are coalesced: a request joins a run that
+is still waiting for the lock (it has not read anything yet), so however many
+requests arrive while a run is in progress, they share one follow-up run.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CreatorRuns:
+    """Per-creator write locks and single-flight runs (one event loop)"""
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._holders: Dict[str, int] = {}
+        # Runs not started yet, by (kind, creator); new requests join these
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.coalesced = 0
+        self._listeners: List[Callable[[str], None]] = []
+
+    def on_release(self, listener: Callable[[str], None]) -> None:
+        """Call listener with the creator each time a run releases its lock (its writes are done)"""
+        self._listeners.append(listener)
+
+    def lock(self, creator: str) -> '_CreatorLock':
+        """Async context manager serializing a creator's cluster and profile writes"""
+        return _CreatorLock(self, creator)
+
+    async def run(self, kind: str, creator: str, work: Callable[[], Awaitable[Any]]) -> Any:
+        """Run work under the creator's lock, or join an identical run that has not started"""
+        key = (kind, creator)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._run(key, work))
+            self._pending[key] = pending
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalesced {kind} request for {creator} into the queued run")
+        # A cancelled caller must not cancel the run other callers share
+        return await asyncio.shield(pending)
+
+    async def _run(self, key: Tuple[str, str], work: Callable[[], Awaitable[Any]]) -> Any:
+        kind, creator = key
+        async with self.lock(creator):
+            # From here on the run reads fresh data; later requests need a run of their own
+            self._pending.pop(key, None)
+            return await work()
+
+    def busy(self) -> Dict[str, int]:
+        """Creators with a run holding or waiting for their lock"""
+        return dict(self._holders)
+
+    async def _acquire(self, creator: str) -> None:
+        lock = self._locks.get(creator)
+        if lock is None:
+            lock = self._locks[creator] = asyncio.Lock()
+        self._holders[creator] = self._holders.get(creator, 0) + 1
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._forget(creator)
+            raise
+
+    def _release(self, creator: str) -> None:
+        self._locks[creator].release()
+        self._forget(creator)
+        for listener in self._listeners:
+            try:
+                listener(creator)
+            except Exception as e:
+                logger.error(f"Release listener failed for {creator}: {e}")
+
+    def _forget(self, creator: str) -> None:
+        # Drop the lock once nobody holds or waits for it
+        self._holders[creator] -= 1
+        if not self._holders[creator]:
+            del self._holders[creator]
+            del self._locks[creator]
+
+
+class _CreatorLock:
+    def __init__(self, runs: CreatorRuns, creator: str):
+        self.runs = runs
+        self.creator = creator
+
+    async def __aenter__(self) -> None:
+        await self.runs._acquire(self.creator)
+
+    async def __aexit__(self, *exc) -> None:
+        self.runs._release(self.creator)
+
+
+# Shared by every job and endpoint of the process
+creator_runs = CreatorRuns()
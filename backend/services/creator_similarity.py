@@ -0,0 +1,257 @@
+# services/creator_similarity.py
+"""
+"Creators who write like X": top-k similar creators for every creator.
+A creator's feature vector joins what they write about (the mean of their
+clusters' centroid embeddings) with how they write (the mean of their
+clusters' voice_schema metrics, each on a log scale around a typical value),
+weighted so the cosine of two features is
+    (1 - w) * semantic similarity + w * stylometric similarity.
+Features depend only on the creator's own profiles, so a stored list stays
+valid until a creator involved changes. Each row keeps the feature it was
+computed from: a run rereads the voice profiles of only the creators whose
+runs finished since the last one (changed_creators; everyone on the first
+run of a process), takes every other feature from its row, recomputes the
+creators whose feature changed plus the lists that pointed at them, and
+only merges every other list with the changed creators. Scores are
+computed in tiles, as in services/post_neighbors.py.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.config import CREATOR_SIMILARITY_K, CREATOR_SIMILARITY_STYLE_WEIGHT, CREATOR_SIMILARITY_BLOCK
+from core.database import Repository
+from services.creator_snapshot import parse_embedding
+from services.post_neighbors import blocked_neighbors, merge_new_neighbors
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_PROFILE_COLUMNS = "creator, voice_schema, centroid_embedding"
+
+# voice_schema metrics and the typical value each is scaled by
+STYLE_FEATURES = [
+    ('line_style', 'avg_words_per_sentence', 20.0),
+    ('line_style', 'line_breaks_per_100_words', 10.0),
+    ('punctuation', 'em_dashes_per_100_words', 1.0),
+    ('punctuation', 'ellipses_per_100_words', 1.0),
+    ('punctuation', 'questions_per_100_words', 1.0),
+    ('punctuation', 'exclamations_per_100_words', 1.0),
+    ('punctuation', 'emojis_per_100_words', 2.0),
+    ('hook', 'avg_hook_line_words', 10.0),
+    ('tagging', 'hashtags_per_post', 3.0),
+    ('tagging', 'mentions_per_post', 1.0),
+    ('structure', 'avg_paragraphs_per_post', 5.0),
+    ('structure', 'avg_words_per_post', 150.0),
+]
+
+
+def style_vector(voice_schema: Optional[Dict]) -> np.ndarray:
+    """Metrics as log(1 + value / typical) - log(2): 0 at the typical value"""
+    voice_schema = voice_schema or {}
+    values = []
+    for group, name, typical in STYLE_FEATURES:
+        value = (voice_schema.get(group) or {}).get(name) or 0.0
+        values.append(math.log1p(max(float(value), 0.0) / typical) - math.log(2.0))
+    return np.asarray(values, dtype=np.float32)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+class ChangedCreators:
+    """Thread-safe set of creators whose profiles changed since the last similarity run"""
+
+    def __init__(self):
+        # Nothing is known about changes made before this process started
+        self._everyone = True
+        self._creators: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def mark(self, creator: str) -> None:
+        with self._lock:
+            self._creators.add(creator)
+
+    def pop(self) -> Optional[Set[str]]:
+        """Take (and clear) the changed creators; None means every creator"""
+        with self._lock:
+            creators = None if self._everyone else self._creators
+            self._everyone, self._creators = False, set()
+            return creators
+
+    def restore(self, creators: Optional[Set[str]]) -> None:
+        """Put back creators taken by a run that did not store them"""
+        with self._lock:
+            if creators is None:
+                self._everyone = True
+            else:
+                self._creators.update(creators)
+
+
+class CreatorFeatures:
+    """Combined feature per creator, row i belongs to creators[i]"""
+
+    def __init__(self, creators: List[str], matrix: np.ndarray):
+        self.creators = creators
+        self.matrix = matrix
+        self.rows = {creator: row for row, creator in enumerate(creators)}
+
+    @classmethod
+    async def load(cls, repository: Repository, stored: Dict[str, Dict], creators: Optional[Set[str]] = None,
+                   style_weight: float = CREATOR_SIMILARITY_STYLE_WEIGHT) -> 'CreatorFeatures':
+        """
+        Features of the given creators (None: everyone) from their voice
+        profiles, keeping only running sums per creator; every other
+        creator's from its stored row
+        """
+        if creators is not None:
+            # Rows written before features were stored have to be read once
+            creators = set(creators) | {creator for creator, row in stored.items() if not row.get('feature')}
+
+        sums: Dict[str, List] = {}
+        async for page in repository.iter_voice_profiles(
+                SIMILARITY_PROFILE_COLUMNS, creators=None if creators is None else list(creators)):
+            for row in page:
+                centroid = parse_embedding(row.get('centroid_embedding'))
+                if not centroid:
+                    continue
+                entry = sums.setdefault(row['creator'], [0.0, 0.0, 0])
+                entry[0] = entry[0] + _unit(np.asarray(centroid, dtype=np.float32))
+                entry[1] = entry[1] + style_vector(row.get('voice_schema'))
+                entry[2] += 1
+
+        features = {
+            creator: np.concatenate([
+                math.sqrt(1.0 - style_weight) * _unit(semantic / count),
+                math.sqrt(style_weight) * _unit(style / count)
+            ]).astype(np.float32)
+            for creator, (semantic, style, count) in sums.items()
+        }
+        if creators is not None:
+            for creator, row in stored.items():
+                if creator not in creators:
+                    features[creator] = np.asarray(parse_embedding(row['feature']), dtype=np.float32)
+
+        names = sorted(features)
+        matrix = np.vstack([features[creator] for creator in names]) if names else np.empty((0, 0), dtype=np.float32)
+        return cls(names, matrix)
+
+    def fingerprint(self, row: int) -> str:
+        return hashlib.sha1(np.round(self.matrix[row], 4).tobytes()).hexdigest()
+
+
+def _plan(features: CreatorFeatures, stored: Dict[str, Dict]) -> Tuple[List[int], List[int], List[int]]:
+    """Rows to recompute against everyone, rows to merge with the changed ones, and the changed rows"""
+    changed = [row for row, creator in enumerate(features.creators)
+               if stored.get(creator, {}).get('feature_hash') != features.fingerprint(row)
+               or not stored[creator].get('feature')]
+    changed_creators = {features.creators[row] for row in changed}
+    # Creators that no longer have features count as changed for the lists pointing at them
+    gone = {creator for creator in stored if creator not in features.rows}
+
+    recompute, merge = list(changed), []
+    for row, creator in enumerate(features.creators):
+        if creator in changed_creators:
+            continue
+        similar = set(stored[creator].get('similar_creators') or [])
+        # A list that held a changed creator may now miss someone ranked just below
+        if similar & (changed_creators | gone):
+            recompute.append(row)
+        else:
+            merge.append(row)
+    return recompute, merge, changed
+
+
+def compute_similarity(features: CreatorFeatures, stored: Dict[str, Dict], k: int = CREATOR_SIMILARITY_K,
+                       block: int = CREATOR_SIMILARITY_BLOCK) -> List[Dict]:
+    """Similarity rows to write for the creators whose list changed"""
+    if len(features.creators) < 2:
+        return []
+    recompute, merge, changed = _plan(features, stored)
+    if not recompute:
+        return []
+
+    matrix = features.matrix
+    names = np.asarray(features.creators, dtype=object)
+    rows = []
+
+    if recompute:
+        recompute = np.asarray(sorted(recompute), dtype=np.int64)
+        indexes, scores = blocked_neighbors(matrix[recompute], recompute, matrix, k, block)
+        for row, neighbor_rows, neighbor_scores in zip(recompute, indexes, scores):
+            rows.append(_row(features, row, names[neighbor_rows], neighbor_scores))
+
+    if merge and changed:
+        merge = np.asarray(merge, dtype=np.int64)
+        changed = np.asarray(changed, dtype=np.int64)
+        width = min(k, len(features.creators) - 1)
+        stored_rows = np.full((len(merge), width), -1, dtype=np.int64)
+        stored_scores = np.full((len(merge), width), -np.inf, dtype=np.float32)
+        for i, row in enumerate(merge):
+            entry = stored[features.creators[row]]
+            pairs = list(zip(entry.get('similar_creators') or [], entry.get('scores') or []))[:width]
+            for j, (creator, score) in enumerate(pairs):
+                stored_rows[i, j] = features.rows[creator]
+                stored_scores[i, j] = score
+
+        merged_rows, merged_scores, entered = merge_new_neighbors(
+            stored_rows, stored_scores, matrix[merge], matrix[changed], changed, width, block
+        )
+        for i in np.flatnonzero(entered):
+            keep = merged_rows[i] >= 0
+            rows.append(_row(features, merge[i], names[merged_rows[i][keep]], merged_scores[i][keep]))
+    return rows
+
+
+def _row(features: CreatorFeatures, row: int, similar: np.ndarray, scores: np.ndarray) -> Dict:
+    return {
+        'creator': features.creators[row],
+        'similar_creators': [str(creator) for creator in similar],
+        'scores': [round(float(score), 4) for score in scores],
+        'feature_hash': features.fingerprint(row),
+        'feature': [float(value) for value in features.matrix[row]],
+    }
+
+
+async def update_creator_similarity(repository: Repository, k: int = CREATOR_SIMILARITY_K,
+                                    changes: Optional[ChangedCreators] = None) -> int:
+    """Bring every creator's similar-creators list up to date; returns rows written"""
+    start = time.time()
+    changes = changes or changed_creators
+    creators = changes.pop()
+    try:
+        stored = await repository.fetch_creator_similarity()
+        features = await CreatorFeatures.load(repository, stored, creators)
+        if len(features.creators) < 2:
+            # Nobody to compare with: nothing is stored yet, so keep them for the next run
+            changes.restore(creators)
+            return 0
+
+        rows = await asyncio.to_thread(compute_similarity, features, stored, k)
+        updated_at = datetime.now().isoformat()
+        for row in rows:
+            row['updated_at'] = updated_at
+        await repository.upsert_creator_similarity(rows)
+
+        gone = [creator for creator in stored if creator not in features.rows]
+        if gone:
+            await repository.delete_creator_similarity(gone)
+    except BaseException:
+        changes.restore(creators)
+        raise
+
+    logger.info(f"Updated similar creators: {len(rows)} of {len(features.creators)} lists rewritten "
+                f"({'all' if creators is None else len(creators)} reread), {len(gone)} removed "
+                f"in {time.time() - start:.2f}s")
+    return len(rows)
+
+
+# Marked when a creator run finishes, taken by the creator_similarity job
+changed_creators = ChangedCreators()
@@ -0,0 +1,133 @@
+# services/creator_snapshot.py
+"""
+Per-creator snapshot shared by every stage of a processing job.
+A creator's posts (ids, content, engagement, cluster assignments) and
+embeddings are read once; the recluster decision, clustering and voice
+profile generation all work on the snapshot, and cluster changes are
+staged here and written back in one bulk commit.
+"""
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.database import Repository, BulkWriteResult, POST_METRIC_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLUMNS = f"{POST_METRIC_COLUMNS}, embedding"
+
+
+def parse_embedding(value) -> Optional[List[float]]:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value or None
+
+
+class CreatorSnapshot:
+    """One creator's posts and embeddings, loaded once per job"""
+
+    def __init__(self, creator: str, posts: List[Dict], embedded_ids: List[int], embeddings: np.ndarray):
+        self.creator = creator
+        # Post rows without the embedding column (content, engagement, cluster_id)
+        self.posts = posts
+        # float32 matrix, row i belongs to embedded_ids[i]
+        self.embedded_ids = embedded_ids
+        self.embeddings = embeddings
+        self._posts_by_id = {post['id']: post for post in posts}
+        self._embedding_rows = {post_id: row for row, post_id in enumerate(embedded_ids)}
+        # Cluster changes not yet written to the database
+        self.pending: Dict[int, int] = {}
+
+    @classmethod
+    async def load(cls, repository: Repository, creator: str) -> 'CreatorSnapshot':
+        """Read every post of a creator in one keyset-paged pass"""
+        start = time.time()
+        posts = []
+        embedded_ids = []
+        vectors = []
+
+        async for page in repository.iter_posts_by_author(creator, SNAPSHOT_COLUMNS):
+            for row in page:
+                embedding = parse_embedding(row.pop('embedding', None))
+                if embedding:
+                    embedded_ids.append(row['id'])
+                    vectors.append(np.asarray(embedding, dtype=np.float32))
+                posts.append(row)
+
+        embeddings = np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+        logger.info(f"Loaded snapshot for {creator}: {len(posts)} posts, "
+                    f"{len(embedded_ids)} embeddings in {time.time() - start:.2f}s")
+        return cls(creator, posts, embedded_ids, embeddings)
+
+    @property
+    def post_count(self) -> int:
+        return len(self.posts)
+
+    def has_clusters(self) -> bool:
+        return any(post.get('cluster_id') is not None for post in self.posts)
+
+    def has_unclustered(self) -> bool:
+        return any(post.get('cluster_id') is None for post in self.posts)
+
+    def embedded_posts(self) -> Tuple[List[int], np.ndarray, List[Optional[int]]]:
+        """Ids, embedding matrix and current cluster of every post with an embedding"""
+        previous = [self._posts_by_id[post_id].get('cluster_id') for post_id in self.embedded_ids]
+        return list(self.embedded_ids), self.embeddings, previous
+
+    def unclustered_ids(self) -> List[int]:
+        """Ids of posts that have an embedding but no cluster yet"""
+        return [post_id for post_id in self.embedded_ids if self._posts_by_id[post_id].get('cluster_id') is None]
+
+    def embedded_subset(self, post_ids: List[int]) -> Tuple[List[int], np.ndarray]:
+        """Ids (those that have an embedding) and embedding matrix for some posts"""
+        ids = [post_id for post_id in post_ids if post_id in self._embedding_rows]
+        rows = [self._embedding_rows[post_id] for post_id in ids]
+        return ids, self.embeddings[rows]
+
+    def cluster_centroids(self) -> Dict[int, np.ndarray]:
+        """Mean embedding of each cluster's posts"""
+        rows_by_cluster: Dict[int, List[int]] = {}
+        for row, post_id in enumerate(self.embedded_ids):
+            cluster_id = self._posts_by_id[post_id].get('cluster_id')
+            if cluster_id is not None:
+                rows_by_cluster.setdefault(int(cluster_id), []).append(row)
+        return {cluster_id: self.embeddings[rows].mean(axis=0) for cluster_id, rows in rows_by_cluster.items()}
+
+    def assign(self, assignments: Dict[int, int]) -> None:
+        """Stage cluster changes; they are visible to later stages immediately"""
+        for post_id, cluster_id in assignments.items():
+            post = self._posts_by_id.get(post_id)
+            if post is not None:
+                post['cluster_id'] = int(cluster_id)
+            self.pending[post_id] = int(cluster_id)
+
+    def cluster_posts(self, cluster_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Clustered posts (optionally only some clusters), as copies safe to annotate"""
+        wanted = set(cluster_ids) if cluster_ids is not None else None
+        return [
+            dict(post) for post in self.posts
+            if post.get('cluster_id') is not None and (wanted is None or post['cluster_id'] in wanted)
+        ]
+
+    def attach_embeddings(self, posts: List[Dict]) -> None:
+        """Add each post's embedding (as a list) to post copies from cluster_posts"""
+        for post in posts:
+            row = self._embedding_rows.get(post['id'])
+            if row is not None:
+                post['embedding'] = self.embeddings[row].tolist()
+
+    async def commit(self, repository: Repository) -> BulkWriteResult:
+        """Write all staged cluster changes in one bulk assignment; failed ones stay staged"""
+        if not self.pending:
+            return BulkWriteResult()
+
+        result = await repository.update_post_clusters(self.pending)
+        failed = set(result.failed_ids)
+        self.pending = {post_id: cluster_id for post_id, cluster_id in self.pending.items() if post_id in failed}
+        return result
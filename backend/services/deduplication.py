@@ -0,0 +1,66 @@
+# services/deduplication.py
+"""
+Duplicate detection for uploaded posts.
+A post is a duplicate when its content prefix or its URL is already stored
+for the same author, or appeared earlier in the same upload. Each author's
+existing posts are read once per upload, the first time the author is seen.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Set, Tuple
+
+from core.database import Repository
+
+logger = logging.getLogger(__name__)
+
+# Compare on the first 200 chars to handle minor edits
+CONTENT_KEY_LENGTH = 200
+
+
+class PostDeduplicator:
+    """Per-upload registry of known post contents and URLs, by author"""
+
+    def __init__(self, repository: Repository):
+        self.repository = repository
+        self._contents: Dict[str, Set[str]] = {}
+        self._urls: Dict[str, Set[str]] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    async def _load_author(self, author: str) -> None:
+        existing = await self.repository.fetch_posts_by_author(author, 'post_content, post_url')
+        self._contents[author] = {(post.get('post_content') or '')[:CONTENT_KEY_LENGTH] for post in existing}
+        self._urls[author] = {post['post_url'] for post in existing if post.get('post_url')}
+
+    async def _ensure_loaded(self, authors: Set[str]) -> None:
+        """Read existing posts of authors not seen yet (once per author, even with concurrent callers)"""
+        for author in authors:
+            if author not in self._loading:
+                self._loading[author] = asyncio.ensure_future(self._load_author(author))
+        await asyncio.gather(*(self._loading[author] for author in authors))
+
+    async def filter(self, posts: List[Dict], texts: List[str]) -> Tuple[List[Dict], List[str], int]:
+        """Return the unique posts with their embedding texts, and the number of duplicates dropped"""
+        await self._ensure_loaded({post['author'] for post in posts})
+
+        unique_posts = []
+        unique_texts = []
+        duplicate_count = 0
+
+        for post, text in zip(posts, texts):
+            author = post['author']
+            content_key = post['post_content'][:CONTENT_KEY_LENGTH]
+            post_url = post.get('post_url')
+
+            if content_key in self._contents[author] or (post_url and post_url in self._urls[author]):
+                duplicate_count += 1
+                logger.debug(f"Skipping duplicate post for {author}")
+                continue
+
+            unique_posts.append(post)
+            unique_texts.append(text)
+            # Remember it to catch duplicates within the same file
+            self._contents[author].add(content_key)
+            if post_url:
+                self._urls[author].add(post_url)
+
+        return unique_posts, unique_texts, duplicate_count
@@ -0,0 +1,97 @@
+# services/dirty_clusters.py
+"""
+Tracks which (creator, cluster_id) pairs had their membership change.
+Clustering and assignment record changes here; voice profile generation
+then rebuilds only those clusters instead of every cluster of the creator.
+"""
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+
+def align_cluster_labels(previous: Sequence[Optional[int]], labels: Sequence[int]) -> List[int]:
+    """
+    Renumber fresh KMeans labels so each new cluster keeps the id of the old
+    cluster it overlaps most. Without this a recluster that finds the same
+    groups under permuted labels would mark every cluster as changed.
+    """
+    overlap = Counter(
+        (int(new), old) for new, old in zip(labels, previous) if old is not None
+    )
+
+    mapping = {}
+    used_old = set()
+    # Greedy matching, largest overlaps first
+    for (new, old), _ in sorted(overlap.items(), key=lambda item: item[1], reverse=True):
+        if new in mapping or old in used_old:
+            continue
+        mapping[new] = old
+        used_old.add(old)
+
+    # Clusters with no surviving counterpart get the lowest free ids
+    next_id = 0
+    for new in sorted(set(int(label) for label in labels)):
+        if new in mapping:
+            continue
+        while next_id in used_old:
+            next_id += 1
+        mapping[new] = next_id
+        used_old.add(next_id)
+
+    return [mapping[int(label)] for label in labels]
+
+
+class DirtyClusterTracker:
+    """Thread-safe registry of clusters whose membership changed"""
+
+    def __init__(self):
+        self._dirty: Dict[str, Set[int]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def mark(self, creator: str, cluster_ids) -> None:
+        """Record clusters as changed for a creator"""
+        cluster_ids = {int(c) for c in cluster_ids if c is not None}
+        if not cluster_ids:
+            return
+        with self._lock:
+            self._dirty[creator].update(cluster_ids)
+
+    def mark_assignments(self, creator: str, previous: Sequence[Optional[int]], labels: Sequence[int]) -> Set[int]:
+        """Compare old and new assignments; every cluster a post left or joined is dirty"""
+        changed = set()
+        for old, new in zip(previous, labels):
+            if old is None or int(old) != int(new):
+                changed.add(int(new))
+                if old is not None:
+                    changed.add(int(old))
+
+        self.mark(creator, changed)
+        logger.info(f"Dirty clusters for {creator}: {sorted(changed)}")
+        return changed
+
+    def pop(self, creator: str) -> Set[int]:
+        """Take (and clear) the changed clusters of a creator"""
+        with self._lock:
+            return self._dirty.pop(creator, set())
+
+    def discard(self, creator: str, cluster_ids) -> None:
+        """Clear the given clusters once their profiles are saved"""
+        with self._lock:
+            remaining = self._dirty.get(creator)
+            if remaining is None:
+                return
+            remaining.difference_update(cluster_ids)
+            if not remaining:
+                del self._dirty[creator]
+
+    def peek(self, creator: str) -> Set[int]:
+        """Changed clusters of a creator, without clearing them"""
+        with self._lock:
+            return set(self._dirty.get(creator, set()))
+
+
+# Shared by the upload pipeline and the manual endpoints
+dirty_clusters = DirtyClusterTracker()
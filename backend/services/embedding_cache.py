@@ -0,0 +1,83 @@
+# services/embedding_cache.py
+"""
+LRU cache of query embeddings.
+Search queries repeat (the same phrase from several clients, a page being
+refreshed), and each embedding is an OpenAI round trip. Vectors are stored
+L2-normalized as float32; concurrent requests for the same text share one
+embedding call.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from core.config import QUERY_EMBEDDING_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+EmbedFunction = Callable[[List[str]], Awaitable[List[Optional[List[float]]]]]
+
+
+class EmbeddingCache:
+    """Text -> normalized embedding, least recently used evicted first (one event loop)"""
+
+    def __init__(self, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, text: str, embed: EmbedFunction) -> Optional[np.ndarray]:
+        """Embedding of text (None if the embedding call failed)"""
+        return (await self.get_many([text], embed))[0]
+
+    async def get_many(self, texts: List[str], embed: EmbedFunction) -> List[Optional[np.ndarray]]:
+        """Embeddings of several texts; the uncached ones are embedded in one call"""
+        missing = []
+        for text in dict.fromkeys(texts):
+            if text in self._entries:
+                self._entries.move_to_end(text)
+                self.hits += 1
+            elif text not in self._loading:
+                self.misses += 1
+                self._loading[text] = asyncio.get_running_loop().create_future()
+                missing.append(text)
+
+        if missing:
+            asyncio.ensure_future(self._load(missing, embed))
+
+        vectors = []
+        for text in texts:
+            vector = self._entries.get(text)
+            if vector is None and text in self._loading:
+                # A cancelled caller must not cancel the load other callers share
+                vector = await asyncio.shield(self._loading[text])
+            vectors.append(vector)
+        return vectors
+
+    async def _load(self, texts: List[str], embed: EmbedFunction) -> None:
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        try:
+            embeddings = await embed(texts)
+        except Exception as e:
+            logger.error(f"Query embedding failed: {e}")
+        finally:
+            for text, embedding in zip(texts, embeddings):
+                vector = None
+                # Failures are not cached, the next request tries again
+                if embedding:
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    vector /= max(float(np.linalg.norm(vector)), 1e-12)
+                    self._entries[text] = vector
+                future = self._loading.pop(text)
+                if not future.done():
+                    future.set_result(vector)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# Shared by the search endpoints
+query_embeddings = EmbeddingCache()
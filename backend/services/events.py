@@ -0,0 +1,81 @@
+# services/events.py
+"""
+In-process event bus for upload processing status.
+The pipeline publishes stage transitions and progress counters here as they
+happen; the SSE endpoint streams them to clients instead of clients polling
+uploaded_files. Each file keeps its latest merged status, so a client that
+(re)connects starts from a snapshot and every event is a complete state.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from core.config import EVENT_QUEUE_SIZE, EVENT_SNAPSHOT_RETENTION
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a file gets no more events
+TERMINAL_STATUSES = {'completed', 'failed', 'voice_profile_failed'}
+
+
+def is_terminal(status: Dict) -> bool:
+    return status.get('status') in TERMINAL_STATUSES
+
+
+class ProcessingEvents:
+    """Latest status per file plus live subscriber queues (one event loop)"""
+
+    def __init__(self, retention: int = EVENT_SNAPSHOT_RETENTION, queue_size: int = EVENT_QUEUE_SIZE):
+        self.retention = retention
+        self.queue_size = queue_size
+        self._snapshots: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._sequence = 0
+
+    def publish(self, file_id, fields: Dict) -> None:
+        """Merge fields into the file's status and push the result to its subscribers"""
+        key = str(file_id)
+        snapshot = self._snapshots.pop(key, None) or {'id': file_id}
+        snapshot.update(fields)
+        self._sequence += 1
+        snapshot['sequence'] = self._sequence
+        self._snapshots[key] = snapshot
+        # Oldest files fall out first; their clients fall back to the database
+        while len(self._snapshots) > self.retention:
+            self._snapshots.popitem(last=False)
+
+        for queue in self._subscribers.get(key, ()):
+            self._offer(queue, dict(snapshot))
+
+    def snapshot(self, file_id) -> Optional[Dict]:
+        snapshot = self._snapshots.get(str(file_id))
+        return dict(snapshot) if snapshot is not None else None
+
+    def subscribe(self, file_id) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(str(file_id), set()).add(queue)
+        return queue
+
+    def unsubscribe(self, file_id, queue: asyncio.Queue) -> None:
+        key = str(file_id)
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[key]
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict) -> None:
+        # Events are complete states, so a slow client only needs the newest ones
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+# Shared by the pipeline and the status endpoints
+processing_events = ProcessingEvents()
@@ -0,0 +1,349 @@
+# services/job_queue.py
+"""
+Durable job queue for background work (uploads, reclustering).
+Jobs live in a local SQLite file, so they survive restarts: anything that
+was running when the process died is put back in the queue on startup.
+A pool of async workers claims jobs with per-type concurrency caps. Jobs
+are claimed oldest first, except that a job whose group already has one
+running waits behind jobs of idle groups. Group keys are per file and per
+creator, so this only holds back a second job for the same file or
+creator; separate uploads are served in FIFO order.
+Finished rows are purged after JOB_RETENTION.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from core.config import (
+    JOB_DB_PATH, JOB_WORKERS, JOB_TYPE_LIMITS, JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BACKOFF, JOB_POLL_INTERVAL, JOB_RETENTION, JOB_PURGE_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+_SCHEMA = """
+create table if not exists jobs (
+    id integer primary key autoincrement,
+    job_type text not null,
+    group_key text not null,
+    payload text not null,
+    status text not null default 'queued',
+    attempts integer not null default 0,
+    max_attempts integer not null,
+    error text,
+    created_at real not null,
+    available_at real not null,
+    started_at real,
+    finished_at real
+);
+create index if not exists jobs_status_idx on jobs (status, job_type, available_at);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    job_type: str
+    group_key: str
+    payload: Dict
+    attempts: int
+    max_attempts: int
+
+
+class JobQueue:
+    """SQLite-backed job storage; every method is a short transaction (thread-safe)"""
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def enqueue(self, job_type: str, payload: Dict, group_key: str = '',
+                max_attempts: int = JOB_MAX_ATTEMPTS, coalesce: bool = False) -> int:
+        """Add a job; with coalesce, an identical job still queued is returned instead"""
+        now = time.time()
+        encoded = json.dumps(payload, sort_keys=True)
+        with self._lock:
+            if coalesce:
+                row = self._conn.execute(
+                    "select id from jobs where status = ? and job_type = ? and group_key = ? and payload = ? "
+                    "order by id limit 1",
+                    (QUEUED, job_type, group_key, encoded)
+                ).fetchone()
+                if row is not None:
+                    return row['id']
+            cursor = self._conn.execute(
+                "insert into jobs (job_type, group_key, payload, max_attempts, created_at, available_at) "
+                "values (?, ?, ?, ?, ?, ?)",
+                (job_type, group_key, encoded, max_attempts, now, now)
+            )
+        return cursor.lastrowid
+
+    def claim(self, job_types: List[str]) -> Optional[Job]:
+        """
+        Mark the next runnable job of the given types as running and return it.
+        Oldest first, but jobs of groups with nothing running go before jobs
+        of groups that already have one (FIFO when every group key is unique)
+        """
+        if not job_types:
+            return None
+
+        placeholders = ','.join('?' for _ in job_types)
+        with self._lock:
+            self._conn.execute("begin immediate")
+            try:
+                row = self._conn.execute(
+                    f"""
+                    select j.* from jobs j
+                    where j.status = ? and j.job_type in ({placeholders}) and j.available_at <= ?
+                    order by (select count(*) from jobs r where r.status = ? and r.group_key = j.group_key),
+                             j.id
+                    limit 1
+                    """,
+                    (QUEUED, *job_types, time.time(), RUNNING)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("commit")
+                    return None
+
+                self._conn.execute(
+                    "update jobs set status = ?, attempts = attempts + 1, started_at = ? where id = ?",
+                    (RUNNING, time.time(), row['id'])
+                )
+                self._conn.execute("commit")
+            except Exception:
+                self._conn.execute("rollback")
+                raise
+
+        return Job(row['id'], row['job_type'], row['group_key'], json.loads(row['payload']),
+                   row['attempts'] + 1, row['max_attempts'])
+
+    def complete(self, job_id: int) -> None:
+        self._execute("update jobs set status = ?, error = null, finished_at = ? where id = ?",
+                      (DONE, time.time(), job_id))
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Record a failed attempt; returns True if the job will be retried"""
+        if job.attempts < job.max_attempts:
+            delay = JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            self._execute("update jobs set status = ?, error = ?, available_at = ? where id = ?",
+                          (QUEUED, error, time.time() + delay, job.id))
+            return True
+
+        self._execute("update jobs set status = ?, error = ?, finished_at = ? where id = ?",
+                      (FAILED, error, time.time(), job.id))
+        return False
+
+    def release(self, job_id: int) -> None:
+        """Put a job interrupted by shutdown back without counting the attempt"""
+        self._execute("update jobs set status = ?, attempts = max(attempts - 1, 0) where id = ? and status = ?",
+                      (QUEUED, job_id, RUNNING))
+
+    def recover(self) -> List[Job]:
+        """
+        Requeue jobs left running by a process that died. The interrupted run
+        counts as an attempt, so a job that keeps taking the process down is
+        failed once it has used them all; returns the jobs failed that way.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("begin immediate")
+            try:
+                exhausted = self._conn.execute(
+                    "select * from jobs where status = ? and attempts >= max_attempts", (RUNNING,)
+                ).fetchall()
+                self._conn.execute(
+                    "update jobs set status = ?, error = ?, finished_at = ? "
+                    "where status = ? and attempts >= max_attempts",
+                    (FAILED, 'interrupted on every attempt', now, RUNNING)
+                )
+                cursor = self._conn.execute("update jobs set status = ?, available_at = ? where status = ?",
+                                            (QUEUED, now, RUNNING))
+                self._conn.execute("commit")
+            except Exception:
+                self._conn.execute("rollback")
+                raise
+
+        if cursor.rowcount:
+            logger.warning(f"Recovered {cursor.rowcount} interrupted jobs")
+        if exhausted:
+            logger.error(f"Gave up on {len(exhausted)} interrupted jobs with no attempts left")
+        return [Job(row['id'], row['job_type'], row['group_key'], json.loads(row['payload']),
+                    row['attempts'], row['max_attempts']) for row in exhausted]
+
+    def purge(self, older_than: float = JOB_RETENTION) -> int:
+        """Delete done and failed jobs that finished more than older_than seconds ago"""
+        cursor = self._execute("delete from jobs where status in (?, ?) and finished_at < ?",
+                               (DONE, FAILED, time.time() - older_than))
+        if cursor.rowcount:
+            logger.info(f"Purged {cursor.rowcount} finished jobs")
+        return cursor.rowcount
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        row = self._execute("select * from jobs where id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        return job
+
+    def active_groups(self, job_types: List[str]) -> Set[str]:
+        """Group keys with a queued or running job of the given types"""
+        if not job_types:
+            return set()
+        placeholders = ','.join('?' for _ in job_types)
+        rows = self._execute(
+            f"select distinct group_key from jobs where status in (?, ?) and job_type in ({placeholders})",
+            (QUEUED, RUNNING, *job_types)
+        ).fetchall()
+        return {row['group_key'] for row in rows}
+
+    def depth(self) -> Dict[str, Dict[str, int]]:
+        """Queued / running job counts per job type"""
+        rows = self._execute(
+            "select job_type, status, count(*) as n from jobs where status in (?, ?) group by job_type, status",
+            (QUEUED, RUNNING)
+        ).fetchall()
+        depth: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            depth.setdefault(row['job_type'], {QUEUED: 0, RUNNING: 0})[row['status']] = row['n']
+        return depth
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+JobHandler = Callable[[Dict], Awaitable[None]]
+
+
+class JobWorkerPool:
+    """Async workers that run queued jobs in the web process's event loop"""
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, JobHandler], workers: int = JOB_WORKERS,
+                 type_limits: Optional[Dict[str, int]] = None, poll_interval: float = JOB_POLL_INTERVAL):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.type_limits = type_limits if type_limits is not None else JOB_TYPE_LIMITS
+        self.poll_interval = poll_interval
+        self._running: Dict[str, int] = {job_type: 0 for job_type in handlers}
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._listeners: List[Callable[[Job], None]] = []
+        self._failure_listeners: List[Callable[[Job], None]] = []
+
+    def on_complete(self, listener: Callable[[Job], None]) -> None:
+        """Call listener with every job that finishes successfully (e.g. to invalidate caches)"""
+        self._listeners.append(listener)
+
+    def on_failed(self, listener: Callable[[Job], None]) -> None:
+        """Call listener with every job that gives up (no attempts left)"""
+        self._failure_listeners.append(listener)
+
+    def enqueue(self, job_type: str, payload: Dict, group_key: str = '', coalesce: bool = False) -> int:
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        job_id = self.queue.enqueue(job_type, payload, group_key, coalesce=coalesce)
+        self._wakeup.set()
+        return job_id
+
+    def start(self) -> None:
+        for job in self.queue.recover():
+            self._notify(self._failure_listeners, job, 'failure')
+        self._tasks = [asyncio.ensure_future(self._worker(n)) for n in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._purge_loop()))
+        logger.info(f"Started {self.workers} job workers (limits: {self.type_limits})")
+
+    async def stop(self) -> None:
+        """Stop claiming; jobs still running go back to the queue for the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _purge_loop(self) -> None:
+        """Drop old finished rows now and every JOB_PURGE_INTERVAL"""
+        while True:
+            try:
+                self.queue.purge()
+            except sqlite3.Error as e:
+                logger.error(f"Could not purge finished jobs: {e}")
+            await asyncio.sleep(JOB_PURGE_INTERVAL)
+
+    def _open_types(self) -> List[str]:
+        return [
+            job_type for job_type in self.handlers
+            if self._running[job_type] < self.type_limits.get(job_type, self.workers)
+        ]
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            # Queue calls are sub-millisecond local transactions and stay on the
+            # loop: claiming and counting the job without an await in between is
+            # what keeps the per-type caps exact
+            try:
+                job = self.queue.claim(self._open_types())
+            except sqlite3.Error as e:
+                logger.error(f"[worker {number}] Could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._running[job.job_type] += 1
+            try:
+                await self._run(job, number)
+            finally:
+                self._running[job.job_type] -= 1
+                # A slot of this type opened up
+                self._wakeup.set()
+
+    async def _run(self, job: Job, number: int) -> None:
+        start = time.time()
+        logger.info(f"[worker {number}] Job {job.id} ({job.job_type}, {job.group_key}) attempt {job.attempts}")
+        try:
+            await self.handlers[job.job_type](job.payload)
+        except asyncio.CancelledError:
+            self.queue.release(job.id)
+            raise
+        except Exception as e:
+            retry = self.queue.fail(job, str(e))
+            logger.error(f"[worker {number}] Job {job.id} failed ({'will retry' if retry else 'giving up'}): {e}")
+            if not retry:
+                self._notify(self._failure_listeners, job, 'failure')
+            return
+
+        self.queue.complete(job.id)
+        logger.info(f"[worker {number}] Job {job.id} done in {time.time() - start:.2f}s")
+        self._notify(self._listeners, job, 'completion')
+
+    @staticmethod
+    def _notify(listeners: List[Callable[[Job], None]], job: Job, kind: str) -> None:
+        for listener in listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"{kind.capitalize()} listener failed for job {job.id}: {e}")
@@ -0,0 +1,54 @@
+# services/pagination.py
+"""
+Opaque cursors and field projection for paginated post listings.
+A cursor is the (post_timestamp, id) key of the last post on a page,
+base64url-encoded so clients treat it as a token rather than a query.
+"""
+import base64
+import json
+from typing import Dict, List, Optional, Tuple
+
+from core.database import POST_LIST_COLUMNS
+
+# Returned when the client does not ask for specific fields
+DEFAULT_POST_FIELDS = [column.strip() for column in POST_LIST_COLUMNS.split(',')]
+# Everything a client may ask for; embeddings only on request
+ALLOWED_POST_FIELDS = set(DEFAULT_POST_FIELDS) | {'embedding'}
+
+PostKey = Tuple[Optional[str], int]
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for a malformed cursor or an unknown field"""
+
+
+def encode_cursor(post: Dict) -> str:
+    raw = json.dumps([post.get('post_timestamp'), post['id']], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> PostKey:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, post_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidPageRequest("Invalid cursor") from e
+    if not isinstance(post_id, int) or not (timestamp is None or isinstance(timestamp, str)):
+        raise InvalidPageRequest("Invalid cursor")
+    return timestamp, post_id
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Comma-separated field list -> validated column names (default: everything but the embedding)"""
+    if not fields:
+        return list(DEFAULT_POST_FIELDS)
+    wanted = list(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+    unknown = [field for field in wanted if field not in ALLOWED_POST_FIELDS]
+    if unknown:
+        raise InvalidPageRequest(f"Unknown fields: {', '.join(unknown)}")
+    return wanted
+
+
+def project(rows: List[Dict], fields: List[str]) -> List[Dict]:
+    """Drop the key columns the query added but the client did not ask for"""
+    return [{field: row.get(field) for field in fields} for row in rows]
@@ -0,0 +1,275 @@
+# services/pipeline.py
+"""
+Streaming upload pipeline.
+Rows flow through parse -> dedup -> embed -> insert in chunks, connected by
+bounded queues, so OpenAI calls, database writes and CPU work overlap
+instead of running as whole-file phases. A full queue blocks the stage
+feeding it, which keeps memory flat however large the file is.
+
+A creator moves on to the finalize stage (clustering + voice profiles) as
+soon as the file has been fully parsed and every chunk containing one of
+its posts has been inserted or dropped.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import pandas as pd
+
+from core.config import PIPELINE_CHUNK_SIZE, PIPELINE_QUEUE_SIZE, EMBED_WORKERS, INSERT_WORKERS, CREATOR_CONCURRENCY
+from core.database import Repository
+from services.deduplication import PostDeduplicator
+from services.file_processor import FileProcessor
+
+logger = logging.getLogger(__name__)
+
+# End-of-stream marker passed down each queue
+_DONE = object()
+
+
+@dataclass
+class Chunk:
+    """A slice of the upload moving through the pipeline"""
+    number: int
+    # Authors whose rows were in the slice, fixed at parse time
+    creators: Set[str]
+    posts: List[Dict]
+    texts: List[str]
+    embeddings: List[Optional[List[float]]] = field(default_factory=list)
+
+
+class StageStats:
+    """Items handled and time spent by one stage"""
+
+    def __init__(self, name: str, unit: str = 'posts'):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.busy = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def record(self, items: int, seconds: float) -> None:
+        if self.started is None:
+            self.started = time.perf_counter() - seconds
+        self.items += items
+        self.busy += seconds
+        self.finished = time.perf_counter()
+
+    @property
+    def throughput(self) -> float:
+        """Items per second of wall time the stage was active"""
+        if self.started is None or self.finished is None or self.finished <= self.started:
+            return 0.0
+        return self.items / (self.finished - self.started)
+
+    def summary(self) -> str:
+        return (f"{self.name}: {self.items} {self.unit}, {self.busy:.2f}s busy, "
+                f"{self.throughput:.1f} {self.unit}/s")
+
+
+@dataclass
+class PipelineResult:
+    inserted: int = 0
+    duplicates: int = 0
+    profiles: int = 0
+    stats: List[StageStats] = field(default_factory=list)
+
+
+class UploadPipeline:
+    """Streams one uploaded file through parse, dedup, embed, insert and finalize"""
+
+    def __init__(self, repository: Repository, file_processor: FileProcessor,
+                 embed: Callable[[List[str]], Awaitable[List[Optional[List[float]]]]],
+                 finalize: Callable[[str, List[int]], Awaitable[int]],
+                 on_posts_saved: Optional[Callable[[int, int], Awaitable[None]]] = None,
+                 on_progress: Optional[Callable[['PipelineResult'], None]] = None,
+                 on_inserted: Optional[Callable[[List[Dict], List[int]], None]] = None,
+                 chunk_size: int = PIPELINE_CHUNK_SIZE, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 embed_workers: int = EMBED_WORKERS, insert_workers: int = INSERT_WORKERS,
+                 finalize_workers: int = CREATOR_CONCURRENCY):
+        self.repository = repository
+        self.file_processor = file_processor
+        self.embed = embed
+        self.finalize = finalize
+        self.on_posts_saved = on_posts_saved
+        # Called with the running totals after every deduplicated or inserted chunk
+        self.on_progress = on_progress
+        # Called with each inserted chunk's posts (embedding included) and their new ids
+        self.on_inserted = on_inserted
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.workers = {'embed': embed_workers, 'insert': insert_workers, 'finalize': finalize_workers}
+
+        self.deduplicator = PostDeduplicator(repository)
+        self.stats = {
+            'parse': StageStats('parse'),
+            'dedup': StageStats('dedup'),
+            'embed': StageStats('embed'),
+            'insert': StageStats('insert'),
+            'finalize': StageStats('finalize', unit='creators'),
+        }
+        self.result = PipelineResult(stats=list(self.stats.values()))
+
+        # Creator readiness: chunks still in flight per creator
+        self._outstanding: Dict[str, int] = defaultdict(int)
+        self._parsed = False
+        self._scheduled: Set[str] = set()
+        self._creators: Set[str] = set()
+        # New post ids (with embeddings) per creator, handed to finalize
+        self._new_ids: Dict[str, List[int]] = defaultdict(list)
+
+    async def run(self, df: pd.DataFrame, creators: Set[str]) -> PipelineResult:
+        """Process every row of df and finalize every creator in creators"""
+        self._creators = set(creators)
+        parsed, deduped, embedded, ready = (asyncio.Queue(maxsize=self.queue_size) for _ in range(4))
+
+        tasks = [
+            asyncio.ensure_future(self._parse(df, parsed, ready)),
+            asyncio.ensure_future(self._stage('dedup', parsed, deduped, self._dedup, 1, ready)),
+            asyncio.ensure_future(self._stage('embed', deduped, embedded, self._embed, self.workers['embed'], ready)),
+            asyncio.ensure_future(self._insert_stage(embedded, ready)),
+            asyncio.ensure_future(self._finalize_stage(ready)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        for stats in self.result.stats:
+            logger.info(f"  - {stats.summary()}")
+        return self.result
+
+    def _report_progress(self) -> None:
+        if self.on_progress is not None:
+            self.on_progress(self.result)
+
+    # Creator readiness
+    async def _release(self, chunk: Chunk, ready: asyncio.Queue) -> None:
+        """A chunk left the pipeline; finalize creators with nothing left in flight"""
+        for creator in chunk.creators:
+            self._outstanding[creator] -= 1
+        await self._schedule_ready(ready)
+
+    async def _schedule_ready(self, ready: asyncio.Queue) -> None:
+        if not self._parsed:
+            return
+        due = sorted(c for c in self._creators if c not in self._scheduled and not self._outstanding[c])
+        self._scheduled.update(due)
+        for creator in due:
+            await ready.put(creator)
+
+    # Stages
+    async def _parse(self, df: pd.DataFrame, outbox: asyncio.Queue, ready: asyncio.Queue) -> None:
+        stats = self.stats['parse']
+        for number, start in enumerate(range(0, len(df), self.chunk_size)):
+            begin = time.perf_counter()
+            rows = df.iloc[start:start + self.chunk_size].copy()
+            # pandas work runs off the event loop so I/O stages keep moving
+            posts, texts = await asyncio.to_thread(self.file_processor.prepare_post_data_batch, rows)
+            stats.record(len(posts), time.perf_counter() - begin)
+
+            chunk = Chunk(number, {post['author'] for post in posts}, posts, texts)
+            self._creators.update(chunk.creators)
+            for creator in chunk.creators:
+                self._outstanding[creator] += 1
+            await outbox.put(chunk)
+
+        self._parsed = True
+        await outbox.put(_DONE)
+        await self._schedule_ready(ready)
+
+    async def _stage(self, name: str, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                     handler: Callable[[Chunk], Awaitable[Optional[Chunk]]], workers: int,
+                     ready: asyncio.Queue) -> None:
+        """Run handler over every chunk with `workers` concurrent consumers"""
+        stats = self.stats[name]
+
+        async def worker():
+            while True:
+                chunk = await inbox.get()
+                if chunk is _DONE:
+                    # Leave the marker for the sibling workers
+                    await inbox.put(_DONE)
+                    return
+                begin = time.perf_counter()
+                size = len(chunk.posts)
+                chunk = await handler(chunk)
+                stats.record(size, time.perf_counter() - begin)
+                if chunk.posts:
+                    await outbox.put(chunk)
+                else:
+                    await self._release(chunk, ready)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        await outbox.put(_DONE)
+
+    async def _dedup(self, chunk: Chunk) -> Chunk:
+        chunk.posts, chunk.texts, duplicates = await self.deduplicator.filter(chunk.posts, chunk.texts)
+        self.result.duplicates += duplicates
+        if duplicates:
+            self._report_progress()
+        return chunk
+
+    async def _embed(self, chunk: Chunk) -> Chunk:
+        chunk.embeddings = await self.embed(chunk.texts)
+        for post, embedding in zip(chunk.posts, chunk.embeddings):
+            if embedding:
+                post['embedding'] = embedding
+        # Every row of one insert request needs the same keys
+        chunk.posts = self.file_processor.standardize_post_keys(chunk.posts)
+        return chunk
+
+    async def _insert_stage(self, inbox: asyncio.Queue, ready: asyncio.Queue) -> None:
+        stats = self.stats['insert']
+
+        async def worker():
+            while True:
+                chunk = await inbox.get()
+                if chunk is _DONE:
+                    await inbox.put(_DONE)
+                    return
+                begin = time.perf_counter()
+                ids = await self.repository.insert_posts(chunk.posts, chunk_size=len(chunk.posts))
+                stats.record(len(ids), time.perf_counter() - begin)
+
+                self.result.inserted += len(ids)
+                self._report_progress()
+                if self.on_inserted is not None:
+                    self.on_inserted(chunk.posts, ids)
+                for post_id, post, embedding in zip(ids, chunk.posts, chunk.embeddings):
+                    if embedding:
+                        self._new_ids[post['author']].append(post_id)
+                await self._release(chunk, ready)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers['insert'])))
+
+        if self.on_posts_saved is not None:
+            await self.on_posts_saved(self.result.inserted, self.result.duplicates)
+        # Every chunk has been released by now, so every creator is scheduled
+        await self._schedule_ready(ready)
+        await ready.put(_DONE)
+
+    async def _finalize_stage(self, inbox: asyncio.Queue) -> None:
+        stats = self.stats['finalize']
+
+        async def worker():
+            while True:
+                creator = await inbox.get()
+                if creator is _DONE:
+                    await inbox.put(_DONE)
+                    return
+                begin = time.perf_counter()
+                # Await before adding: `total += await ...` would read the total first
+                # and drop the profiles of creators finalized concurrently
+                profiles = await self.finalize(creator, self._new_ids.pop(creator, []))
+                self.result.profiles += profiles
+                stats.record(1, time.perf_counter() - begin)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers['finalize'])))
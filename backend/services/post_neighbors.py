@@ -0,0 +1,189 @@
+# services/post_neighbors.py
+"""
+Precomputed "similar posts" graph per creator.
+After a creator is clustered, every post with an embedding gets a row in
+post_neighbors holding its k most similar posts by the same creator. The
+scores are computed a block x block tile at a time, each tile's best merged
+into a running top k per row, so memory stays bounded however many posts a
+creator has. Only posts without a row, or whose row points at posts that
+are gone, are scored against the whole creator; other rows are merged with
+the new posts and rewritten only when a new post enters their top k.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from core.config import POST_NEIGHBORS_K, POST_NEIGHBORS_BLOCK
+from core.database import Repository
+from services.creator_snapshot import CreatorSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indexes and scores of each row's k best, best first"""
+    top = np.argpartition(scores, scores.shape[1] - k, axis=1)[:, -k:]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def _merge_top_k(ids: np.ndarray, scores: np.ndarray, tile: np.ndarray, tile_ids: np.ndarray,
+                 k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge a tile of scores (columns labelled tile_ids) into running top-k
+    ids / scores. Also returns where each of the k best came from: columns
+    >= k are the tile's.
+    """
+    columns, best = _top_k(tile, min(k, tile.shape[1]))
+    merged_ids = np.concatenate([ids, tile_ids[columns]], axis=1)
+    merged_scores = np.concatenate([scores, best], axis=1)
+    order, merged_scores = _top_k(merged_scores, k)
+    return np.take_along_axis(merged_ids, order, axis=1), merged_scores, order
+
+
+def blocked_neighbors(queries: np.ndarray, query_rows: np.ndarray, base: np.ndarray, k: int,
+                      block: int = POST_NEIGHBORS_BLOCK) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of base for each query (all normalized), best first.
+    query_rows[i] is the query's own row in base (or -1); it is never its own neighbor.
+    """
+    k = min(k, len(base) - 1)
+    indexes = np.empty((len(queries), max(k, 0)), dtype=np.int64)
+    scores = np.empty((len(queries), max(k, 0)), dtype=np.float32)
+    if k <= 0:
+        return indexes, scores
+
+    base_rows = np.arange(len(base), dtype=np.int64)
+    for start in range(0, len(queries), block):
+        block_queries = queries[start:start + block]
+        own = query_rows[start:start + block]
+        best_rows = np.full((len(block_queries), k), -1, dtype=np.int64)
+        best_scores = np.full((len(block_queries), k), -np.inf, dtype=np.float32)
+        for column in range(0, len(base), block):
+            tile = block_queries @ base[column:column + block].T
+            rows = np.flatnonzero((own >= column) & (own < column + block))
+            tile[rows, own[rows] - column] = -np.inf
+            best_rows, best_scores, _ = _merge_top_k(best_rows, best_scores, tile,
+                                                     base_rows[column:column + block], k)
+        indexes[start:start + block], scores[start:start + block] = best_rows, best_scores
+    return indexes, scores
+
+
+def merge_new_neighbors(stored_ids: np.ndarray, stored_scores: np.ndarray, old: np.ndarray,
+                        new: np.ndarray, new_ids: np.ndarray, k: int,
+                        block: int = POST_NEIGHBORS_BLOCK) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merge new posts into existing neighbor lists (stored_* padded with -1 / -inf).
+    Returns the merged ids and scores, and a mask of the rows that changed.
+    """
+    ids = stored_ids.copy()
+    scores = stored_scores.copy()
+    changed = np.zeros(len(old), dtype=bool)
+
+    for start in range(0, len(old), block):
+        end = start + block
+        # Which of each row's k best came from the new posts
+        entered = np.zeros((len(old[start:end]), k), dtype=bool)
+        for column in range(0, len(new), block):
+            tile = old[start:end] @ new[column:column + block].T
+            ids[start:end], scores[start:end], order = _merge_top_k(
+                ids[start:end], scores[start:end], tile, new_ids[column:column + block], k
+            )
+            # Columns kept from the running list carry their flag with them
+            flags = np.concatenate([entered, np.ones((len(entered), order.shape[1]), dtype=bool)], axis=1)
+            entered = np.take_along_axis(flags, order, axis=1)
+        changed[start:end] = entered.any(axis=1)
+    return ids, scores, changed
+
+
+async def _stored_neighbors(repository: Repository, creator: str) -> Dict[int, Dict]:
+    rows = {}
+    async for page in repository.iter_post_neighbors(creator):
+        for row in page:
+            rows[row['post_id']] = row
+    return rows
+
+
+def _stale(stored: Dict[int, Dict], snapshot_ids: List[int]) -> set:
+    """Posts whose stored row points at a post no longer in the snapshot"""
+    current = set(snapshot_ids)
+    return {post_id for post_id, row in stored.items()
+            if post_id in current and not current.issuperset(row.get('neighbor_ids') or [])}
+
+
+def _compute(snapshot_ids: List[int], vectors: np.ndarray, stored: Dict[int, Dict], k: int) -> List[Dict]:
+    """Neighbor rows to write: every post without a row or with a stale one, plus existing rows that changed"""
+    ids = np.asarray(snapshot_ids, dtype=np.int64)
+    vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+    stale = _stale(stored, snapshot_ids)
+    is_new = np.array([post_id not in stored for post_id in snapshot_ids], dtype=bool)
+    is_stale = np.array([post_id in stale for post_id in snapshot_ids], dtype=bool)
+    recompute_rows = np.flatnonzero(is_new | is_stale)
+    new_rows = np.flatnonzero(is_new)
+    old_rows = np.flatnonzero(~(is_new | is_stale))
+    rows = []
+
+    if len(recompute_rows):
+        indexes, scores = blocked_neighbors(vectors[recompute_rows], recompute_rows, vectors, k)
+        for row, neighbor_rows, neighbor_scores in zip(recompute_rows, indexes, scores):
+            rows.append(_row(ids[row], ids[neighbor_rows], neighbor_scores))
+
+    if len(new_rows) and len(old_rows):
+        # Existing rows, padded to k columns
+        stored_ids = np.full((len(old_rows), k), -1, dtype=np.int64)
+        stored_scores = np.full((len(old_rows), k), -np.inf, dtype=np.float32)
+        for i, row in enumerate(old_rows):
+            neighbor_ids = stored[int(ids[row])].get('neighbor_ids') or []
+            neighbor_scores = stored[int(ids[row])].get('scores') or []
+            count = min(k, len(neighbor_ids), len(neighbor_scores))
+            stored_ids[i, :count] = neighbor_ids[:count]
+            stored_scores[i, :count] = neighbor_scores[:count]
+
+        merged_ids, merged_scores, changed = merge_new_neighbors(
+            stored_ids, stored_scores, vectors[old_rows], vectors[new_rows], ids[new_rows], k
+        )
+        for i in np.flatnonzero(changed):
+            rows.append(_row(ids[old_rows[i]], merged_ids[i], merged_scores[i]))
+    return rows
+
+
+def _row(post_id, neighbor_ids: np.ndarray, scores: np.ndarray) -> Dict:
+    keep = neighbor_ids >= 0
+    return {
+        'post_id': int(post_id),
+        'neighbor_ids': [int(neighbor_id) for neighbor_id in neighbor_ids[keep]],
+        'scores': [round(float(score), 4) for score in scores[keep]],
+    }
+
+
+async def update_post_neighbors(repository: Repository, snapshot: CreatorSnapshot,
+                                k: int = POST_NEIGHBORS_K) -> int:
+    """Bring a creator's neighbor graph up to date with its snapshot; returns rows written"""
+    start = time.time()
+    post_ids, embeddings, _ = snapshot.embedded_posts()
+    if len(post_ids) < 2:
+        return 0
+
+    stored = await _stored_neighbors(repository, snapshot.creator)
+    new_count = sum(1 for post_id in post_ids if post_id not in stored)
+    if not new_count and not _stale(stored, post_ids):
+        return 0
+
+    rows = await asyncio.to_thread(_compute, post_ids, embeddings, stored, k)
+    updated_at = datetime.now().isoformat()
+    for row in rows:
+        row.update(author=snapshot.creator, updated_at=updated_at)
+    await repository.upsert_post_neighbors(rows)
+
+    logger.info(f"Updated similar posts for {snapshot.creator}: {len(rows)} rows "
+                f"({new_count} new posts) in {time.time() - start:.2f}s")
+    return len(rows)
@@ -0,0 +1,79 @@
+# services/profile_cache.py
+"""
+Per-creator cache of the composite creator-profile response.
+An entry is built once (creator row, stats, ranked voice profiles and the
+first page of posts, loaded concurrently) and served until that creator's
+clusters, profiles or posts change: every run that writes them holds the
+creator's lock in services/creator_runs.py, and releasing the lock drops
+the entry. Finished jobs drop entries again once the creator directory
+(the source of the stats) is invalidated, so an entry rebuilt between the
+lock release and the end of the job does not keep stale stats. The least
+recently used entries are evicted beyond max_entries.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from core.config import PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class CreatorProfileCache:
+    """Composite profile per creator, invalidated per creator (one event loop)"""
+
+    def __init__(self, max_entries: int = PROFILE_CACHE_SIZE, ttl: float = PROFILE_CACHE_TTL):
+        self.max_entries = max_entries
+        # Safety net for changes made outside this process
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, creator: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(creator)
+        if entry is not None and time.monotonic() - entry['loaded_at'] < self.ttl:
+            self._entries.move_to_end(creator)
+            self.hits += 1
+            return entry['value']
+
+        self.misses += 1
+        loading = self._loading.get(creator)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(creator, load, self._generations.get(creator, 0)))
+            self._loading[creator] = loading
+        return await asyncio.shield(loading)
+
+    async def _load(self, creator: str, load: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        try:
+            value = await load()
+        finally:
+            if self._loading.get(creator) is asyncio.current_task():
+                del self._loading[creator]
+
+        # Not cached if the creator changed while it was loading
+        if value is not None and generation == self._generations.get(creator, 0):
+            self._entries[creator] = {'value': value, 'loaded_at': time.monotonic()}
+            self._entries.move_to_end(creator)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, creator: str) -> None:
+        self._generations[creator] = self._generations.get(creator, 0) + 1
+        self._entries.pop(creator, None)
+        # A load already under way started before the change; the next read starts a fresh one
+        self._loading.pop(creator, None)
+
+    def invalidate_all(self) -> None:
+        """Drop every entry, e.g. when an upload changed creators not known here"""
+        for creator in set(self._entries) | set(self._loading):
+            self.invalidate(creator)
+
+
+# Shared by the profile endpoint and the per-creator write hook
+profile_cache = CreatorProfileCache()
@@ -0,0 +1,59 @@
+# services/progress.py
+"""
+Progress reporting for the per-creator stage of an upload.
+Counts are written to the file's uploaded_files row (columns from
+sql/uploaded_files_progress.sql), at most once per interval so a file with
+hundreds of creators does not turn into hundreds of status writes. Every
+change is pushed to status stream clients right away (services/events.py).
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from core.config import PROGRESS_UPDATE_INTERVAL
+from core.database import Repository
+from services.events import processing_events
+
+logger = logging.getLogger(__name__)
+
+
+class FileProgress:
+    """Throttled creator progress for one uploaded file"""
+
+    def __init__(self, repository: Repository, file_id: str, total: int,
+                 interval: float = PROGRESS_UPDATE_INTERVAL):
+        self.repository = repository
+        self.file_id = file_id
+        self.total = total
+        self.interval = interval
+        self.processed = 0
+        self.failed: Dict[str, str] = {}
+        self._last_write = 0.0
+        self._lock = asyncio.Lock()
+
+    async def creator_done(self, creator: str, error: Optional[str] = None) -> None:
+        """Record a finished creator (failed if error is given)"""
+        self.processed += 1
+        if error is not None:
+            self.failed[creator] = error
+        processing_events.publish(self.file_id, self.counts())
+
+        if self.processed == self.total or time.monotonic() - self._last_write >= self.interval:
+            await self.flush()
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            'creators_total': self.total,
+            'creators_processed': self.processed,
+            'creators_failed': len(self.failed)
+        }
+
+    async def flush(self) -> None:
+        """Write the current counts; a failed write never fails the upload"""
+        async with self._lock:
+            self._last_write = time.monotonic()
+            try:
+                await self.repository.update_file_record(self.file_id, self.counts())
+            except Exception as e:
+                logger.warning(f"Progress update failed for file {self.file_id}: {e}")
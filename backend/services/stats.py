@@ -0,0 +1,58 @@
+# services/stats.py
+"""
+Cached platform totals for /stats.
+The totals come from one aggregate read (get_platform_stats, backed by
+trigger-maintained counters) and are served from memory for a short TTL.
+Finished jobs invalidate the cache, so uploads show up on the next read
+instead of after the TTL. Concurrent misses share a single load.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from core.config import STATS_CACHE_TTL
+from core.database import Repository
+
+logger = logging.getLogger(__name__)
+
+
+class StatsCache:
+    """In-process cache of Repository.platform_stats (one event loop)"""
+
+    def __init__(self, ttl: float = STATS_CACHE_TTL):
+        self.ttl = ttl
+        self._value: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+        self._loading: Optional[asyncio.Future] = None
+        self._generation = 0
+
+    async def get(self, repository: Repository) -> Dict[str, int]:
+        if self._value is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return dict(self._value)
+
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load(repository, self._generation))
+        return dict(await asyncio.shield(self._loading))
+
+    async def _load(self, repository: Repository, generation: int) -> Dict[str, int]:
+        try:
+            value = await repository.platform_stats()
+        finally:
+            if generation == self._generation:
+                self._loading = None
+
+        # A load that raced an invalidation is returned but not cached
+        if generation == self._generation:
+            self._value = value
+            self._loaded_at = time.monotonic()
+        return value
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._value = None
+        self._loading = None
+
+
+# Shared by /stats and the job completion hook
+stats_cache = StatsCache()
@@ -0,0 +1,183 @@
+# services/stylometry.py
+"""
+Stylometry scanner for voice profile metrics.
+All posts of a cluster are joined into one UTF-8 buffer and every feature
+is computed with vectorized scans over that buffer (NumPy byte classes,
+bytes.count and literal-prefix regexes) instead of per-post regex splits
+and list comprehensions. Words, sentences and paragraphs split on the same
+whitespace as \\s, unicode spaces included, so those totals match the
+per-post regexes they replace.
+"""
+import re
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+# Separates posts inside the joined buffer. clean_text strips non-printable
+# characters, so it never occurs inside a post.
+POST_SEPARATOR = b'\x00'
+
+# ASCII whitespace as matched by \s
+WHITESPACE_BYTES = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
+# The rest of \s, all 2-byte (lead 0xc2) or 3-byte (lead 0xe1-0xe3) in
+# UTF-8; the byte-level scans see each as a single space
+UNICODE_WHITESPACE = '\x85\xa0\u1680' + ''.join(map(chr, range(0x2000, 0x200b))) + '\u2028\u2029\u202f\u205f\u3000'
+UNICODE_WHITESPACE_CODES = np.array([ord(char) for char in UNICODE_WHITESPACE], dtype=np.int32)
+TERMINATOR_BYTES = b'.!?'
+SENTENCE_FILLER = (WHITESPACE_BYTES + TERMINATOR_BYTES).decode() + UNICODE_WHITESPACE
+
+# UTF-8 prefix of pictographic emoji (U+1F000-U+1FFFF); the misc symbols
+# and dingbats blocks (U+2600-U+27BF) are matched by misc_emoji
+EMOJI_PREFIX = b'\xf0\x9f'
+EM_DASH = '—'.encode('utf-8')
+ELLIPSIS = '…'.encode('utf-8')
+
+# Byte classes for the vectorized scans, ordered so that "whitespace or
+# end of post" is simply class >= SPACE
+OTHER, TERMINATOR, SPACE, NEWLINE, SEPARATOR = range(5)
+_byte_classes = bytearray([OTHER] * 256)
+for _byte in WHITESPACE_BYTES:
+    _byte_classes[_byte] = SPACE
+_byte_classes[ord('\n')] = NEWLINE
+for _byte in TERMINATOR_BYTES:
+    _byte_classes[_byte] = TERMINATOR
+_byte_classes[POST_SEPARATOR[0]] = SEPARATOR
+BYTE_CLASSES = bytes(_byte_classes)
+
+
+@dataclass
+class StylometryTotals:
+    """Raw feature totals for a group of posts"""
+    post_count: int = 0
+    words: int = 0
+    sentences: int = 0
+    line_breaks: int = 0
+    em_dashes: int = 0
+    ellipses: int = 0
+    questions: int = 0
+    exclamations: int = 0
+    paragraphs: int = 0
+    emojis: int = 0
+    hashtags: int = 0
+    mentions: int = 0
+    hook_words: int = 0
+
+
+class StylometryScanner:
+    """Computes stylometric totals for many posts with whole-buffer scans"""
+
+    def __init__(self):
+        # Literal-first patterns so the regex engine can skip ahead to candidates
+        self.hashtag = re.compile(rb'#(?<!\w#)\w')
+        self.mention = re.compile(rb'@(?<!\w@)\w')
+        self.misc_emoji = re.compile(rb'\xe2[\x98-\x9e]')
+        # Code points that extend the emoji before them rather than add one:
+        # skin tones (U+1F3FB-U+1F3FF), the second regional indicator of a
+        # flag, and emoji joined to the previous one by a ZWJ (U+200D)
+        self.skin_tone = re.compile(rb'\xf0\x9f\x8f[\xbb-\xbf]')
+        self.flag = re.compile(rb'\xf0\x9f\x87[\xa6-\xbf]\xf0\x9f\x87[\xa6-\xbf]')
+        self.zwj_joined = re.compile(rb'\xe2\x80\x8d(?:\xf0\x9f|\xe2[\x98-\x9e])')
+
+    def _classify(self, buffer: bytes) -> np.ndarray:
+        """Byte class per byte, each unicode whitespace sequence collapsed to one SPACE"""
+        classes = np.frombuffer(buffer.translate(BYTE_CLASSES), dtype=np.uint8)
+        if buffer.isascii():
+            return classes
+
+        data = np.frombuffer(buffer + b'\x00\x00', dtype=np.uint8)
+        two = np.flatnonzero(data[:-2] == 0xc2)
+        three = np.flatnonzero((data[:-2] >= 0xe1) & (data[:-2] <= 0xe3))
+        # Decode just the candidates' code points
+        first, second = data[two + 1].astype(np.int32), data[three + 1].astype(np.int32)
+        codes_two = ((0xc2 & 0x1f) << 6) | (first & 0x3f)
+        codes_three = ((data[three].astype(np.int32) & 0x0f) << 12) | ((second & 0x3f) << 6) | (data[three + 2] & 0x3f)
+        two = two[np.isin(codes_two, UNICODE_WHITESPACE_CODES)]
+        three = three[np.isin(codes_three, UNICODE_WHITESPACE_CODES)]
+        if not len(two) and not len(three):
+            return classes
+
+        classes = classes.copy()
+        classes[two] = SPACE
+        classes[three] = SPACE
+        return np.delete(classes, np.concatenate([two + 1, three + 1, three + 2]))
+
+    def _count_segments(self, visible: np.ndarray, delimiter: np.ndarray) -> int:
+        """Count delimiter-separated segments that contain visible text"""
+        reduced = delimiter[visible | delimiter]
+        if not reduced.size:
+            return 0
+        return int(np.count_nonzero(reduced[:-1] & ~reduced[1:])) + int(not reduced[0])
+
+    def _count_words(self, space: np.ndarray, num_posts: int) -> int:
+        """Whitespace runs + 1 per post, matching re.split(r'\\s+') per post"""
+        run_starts = np.count_nonzero(space[1:] & ~space[:-1]) + int(space[0])
+        return int(run_starts) + num_posts
+
+    def _count_sentences(self, classes: np.ndarray, separator: np.ndarray,
+                         contents: List[str]) -> int:
+        """Non-blank segments between '[.!?]+(?:\\s+|$)' boundaries, at least one per post"""
+        # The last terminator of a run is a boundary when whitespace or the end
+        # of the post follows. Other terminators are either part of that run
+        # or followed by text, so only non-terminator text makes a segment
+        # non-blank.
+        boundary = np.empty(classes.size, dtype=bool)
+        np.logical_and(classes[:-1] == TERMINATOR, classes[1:] >= SPACE, out=boundary[:-1])
+        boundary[-1] = classes[-1] == TERMINATOR
+        sentenceless = sum(1 for content in contents if not content.strip(SENTENCE_FILLER))
+        return self._count_segments(classes == OTHER, boundary | separator) + sentenceless
+
+    def _count_paragraphs(self, classes: np.ndarray, visible: np.ndarray,
+                          separator: np.ndarray, contents: List[str]) -> int:
+        """Non-blank '\\n\\n'-separated blocks, at least one per post"""
+        # Any "\n\n" between two pieces of text starts a new block
+        newline = classes == NEWLINE
+        paragraph_break = np.empty(classes.size, dtype=bool)
+        np.logical_and(newline[:-1], newline[1:], out=paragraph_break[:-1])
+        paragraph_break[-1] = False
+        blank = sum(1 for content in contents if content.isspace())
+        return self._count_segments(visible, paragraph_break | separator) + blank
+
+    def _count_emojis(self, buffer: bytes) -> int:
+        """Emoji as displayed: modifiers, flags and ZWJ sequences count once"""
+        pictographs = buffer.count(EMOJI_PREFIX) + len(self.misc_emoji.findall(buffer))
+        extensions = (len(self.skin_tone.findall(buffer)) + len(self.flag.findall(buffer))
+                      + len(self.zwj_joined.findall(buffer)))
+        return pictographs - extensions
+
+    def _count_hook_words(self, contents: List[str]) -> int:
+        """Words in the first non-blank line of each post"""
+        hooks = ' '.join([content.lstrip().partition('\n')[0] for content in contents])
+        return len(hooks.split())
+
+    def scan(self, contents: List[str]) -> StylometryTotals:
+        """Scan post contents (empty posts are skipped) and return feature totals"""
+        contents = [c for c in contents if c]
+        if not contents:
+            return StylometryTotals()
+
+        # Joining encoded posts keeps the buffer one byte per ASCII char even
+        # when a post contains emoji (a joined str would widen to UCS-4)
+        buffer = POST_SEPARATOR.join([content.encode('utf-8') for content in contents])
+        num_posts = len(contents)
+
+        classes = self._classify(buffer)
+        separator = classes == SEPARATOR
+        space = (classes >= SPACE) & ~separator
+        visible = classes < SPACE
+
+        return StylometryTotals(
+            post_count=num_posts,
+            words=self._count_words(space, num_posts),
+            sentences=self._count_sentences(classes, separator, contents),
+            line_breaks=buffer.count(b'\n'),
+            em_dashes=buffer.count(EM_DASH) + buffer.count(b'--'),
+            ellipses=buffer.count(b'...') + buffer.count(ELLIPSIS),
+            questions=buffer.count(b'?'),
+            exclamations=buffer.count(b'!'),
+            paragraphs=self._count_paragraphs(classes, visible, separator, contents),
+            emojis=self._count_emojis(buffer),
+            hashtags=len(self.hashtag.findall(buffer)),
+            mentions=len(self.mention.findall(buffer)),
+            hook_words=self._count_hook_words(contents)
+        )
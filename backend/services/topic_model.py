@@ -0,0 +1,214 @@
+# services/topic_model.py
+"""
+Global topic model across every creator's posts.
+Embeddings are L2-normalized and randomly projected to TOPIC_DIMENSIONS,
+then fed to a MiniBatchKMeans with partial_fit as posts are inserted, so
+the model keeps learning without ever refitting on the whole corpus. Each
+batch is assigned its topics right after it is learned from, and the topic
+ids are written to creator_posts.topic_id; sql/global_topics.sql keeps the
+per-topic totals. Memory is the centroids plus the projection, however
+many posts there are; earlier assignments are not revisited as centroids move.
+
+Inserted chunks go through a bounded queue; chunks that do not fit stay
+without a topic until the topic_backfill job pages through them (the
+on_dropped listeners are told, so the app can queue that job).
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+from core.config import (
+    GLOBAL_TOPIC_COUNT, TOPIC_DIMENSIONS, TOPIC_MODEL_PATH, TOPIC_QUEUE_SIZE, TOPIC_SAVE_INTERVAL
+)
+from core.database import Repository, POST_EMBEDDING_COLUMNS
+from services.creator_snapshot import parse_embedding
+
+logger = logging.getLogger(__name__)
+
+
+class GlobalTopicModel:
+    """Projection plus MiniBatchKMeans, learning from batches of embeddings (not thread-safe)"""
+
+    def __init__(self, n_topics: int = GLOBAL_TOPIC_COUNT, dimensions: int = TOPIC_DIMENSIONS, seed: int = 42):
+        self.n_topics = n_topics
+        self.dimensions = dimensions
+        self.seed = seed
+        self.projection: Optional[np.ndarray] = None
+        self.kmeans: Optional[MiniBatchKMeans] = None
+        self.posts_seen = 0
+        # Vectors held back until there are enough to initialize the centroids
+        self._pending_ids: List[int] = []
+        self._pending: List[np.ndarray] = []
+
+    def _reduce(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.projection is None:
+            rng = np.random.default_rng(self.seed)
+            self.projection = (rng.standard_normal((vectors.shape[1], self.dimensions))
+                               / np.sqrt(self.dimensions)).astype(np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        reduced = vectors @ self.projection
+        return reduced / np.maximum(np.linalg.norm(reduced, axis=1, keepdims=True), 1e-12)
+
+    def learn(self, post_ids: Sequence[int], vectors: np.ndarray) -> Dict[int, int]:
+        """Update the centroids with a batch; returns the topic of every post that can be assigned now"""
+        if not len(post_ids):
+            return {}
+        reduced = self._reduce(vectors)
+        post_ids = list(post_ids)
+
+        if self.kmeans is None:
+            # A backfill may offer posts that are already waiting
+            waiting = set(self._pending_ids)
+            keep = [i for i, post_id in enumerate(post_ids) if post_id not in waiting]
+            self._pending_ids.extend(post_ids[i] for i in keep)
+            self._pending.append(reduced[keep])
+            # The first partial_fit needs at least one sample per topic; a few per topic seeds it better
+            if len(self._pending_ids) < 3 * self.n_topics:
+                return {}
+            post_ids, reduced = self._pending_ids, np.vstack(self._pending)
+            self._pending_ids, self._pending = [], []
+            self.kmeans = MiniBatchKMeans(n_clusters=self.n_topics, random_state=self.seed, n_init=3)
+
+        self.kmeans.partial_fit(reduced)
+        self.posts_seen += len(post_ids)
+        topics = self.kmeans.predict(reduced)
+        return {int(post_id): int(topic) for post_id, topic in zip(post_ids, topics)}
+
+    @property
+    def ready(self) -> bool:
+        return self.kmeans is not None
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        joblib.dump({'n_topics': self.n_topics, 'dimensions': self.dimensions, 'seed': self.seed,
+                     'projection': self.projection, 'kmeans': self.kmeans,
+                     'posts_seen': self.posts_seen}, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'GlobalTopicModel':
+        state = joblib.load(path)
+        model = cls(state['n_topics'], state['dimensions'], state['seed'])
+        model.projection = state['projection']
+        model.kmeans = state['kmeans']
+        model.posts_seen = state['posts_seen']
+        return model
+
+
+class GlobalTopics:
+    """Feeds inserted posts to the topic model and writes their topic ids (one event loop)"""
+
+    def __init__(self, path: str = TOPIC_MODEL_PATH, queue_size: int = TOPIC_QUEUE_SIZE,
+                 save_interval: float = TOPIC_SAVE_INTERVAL):
+        self.path = path
+        self.save_interval = save_interval
+        self.model = GlobalTopicModel()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._saved_at = time.monotonic()
+        self._dirty = False
+        self.dropped = 0
+        self._drop_listeners: List[Callable[[int], None]] = []
+
+    def on_dropped(self, listener: Callable[[int], None]) -> None:
+        """Call listener with the number of posts each time a full queue leaves them without a topic"""
+        self._drop_listeners.append(listener)
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            self.model = GlobalTopicModel.load(self.path)
+            logger.info(f"Loaded topic model ({self.model.posts_seen} posts learned)")
+        except Exception as e:
+            logger.error(f"Could not read topic model {self.path}, starting a new one: {e}")
+
+    def start(self, repository: Repository) -> None:
+        self.load()
+        self._task = asyncio.ensure_future(self._consume(repository))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.save()
+
+    def observe(self, posts: List[Dict], post_ids: List[int]) -> None:
+        """Queue freshly inserted posts (with their embedding); a full queue leaves them to the backfill"""
+        batch = [(post_id, post['embedding']) for post, post_id in zip(posts, post_ids) if post.get('embedding')]
+        if not batch:
+            return
+        try:
+            self._queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            self.dropped += len(batch)
+            for listener in self._drop_listeners:
+                try:
+                    listener(len(batch))
+                except Exception as e:
+                    logger.error(f"Drop listener failed for {len(batch)} posts: {e}")
+
+    async def _consume(self, repository: Repository) -> None:
+        while True:
+            batch = await self._queue.get()
+            try:
+                await self.assign(repository, [post_id for post_id, _ in batch],
+                                  np.asarray([vector for _, vector in batch], dtype=np.float32))
+            except Exception as e:
+                logger.error(f"Topic assignment failed for {len(batch)} posts: {e}")
+
+    async def assign(self, repository: Repository, post_ids: List[int], vectors: np.ndarray) -> int:
+        """Learn from a batch and store the topics it yields; returns posts assigned"""
+        async with self._lock:
+            assignments = await asyncio.to_thread(self.model.learn, post_ids, vectors)
+            self._dirty = True
+            if assignments:
+                await repository.update_post_topics(assignments)
+            if time.monotonic() - self._saved_at > self.save_interval:
+                await asyncio.to_thread(self.save)
+        return len(assignments)
+
+    async def backfill(self, repository: Repository) -> int:
+        """Assign topics to every post that has an embedding but no topic"""
+        start = time.time()
+        assigned = 0
+        async for page in repository.iter_untopiced_posts(POST_EMBEDDING_COLUMNS):
+            embedded = [(row['id'], parse_embedding(row.get('embedding'))) for row in page]
+            embedded = [(post_id, vector) for post_id, vector in embedded if vector]
+            if embedded:
+                assigned += await self.assign(repository, [post_id for post_id, _ in embedded],
+                                              np.asarray([vector for _, vector in embedded], dtype=np.float32))
+        logger.info(f"Topic backfill assigned {assigned} posts in {time.time() - start:.2f}s")
+        return assigned
+
+    def save(self) -> None:
+        if not self._dirty or not self.model.ready:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.model.save(self.path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        except Exception as e:
+            logger.error(f"Could not save topic model: {e}")
+
+    def metrics(self) -> Dict:
+        return {
+            'ready': self.model.ready,
+            'posts_learned': self.model.posts_seen,
+            'queued_batches': self._queue.qsize(),
+            'dropped_posts': self.dropped,
+        }
+
+
+# Shared by the upload pipeline, the backfill job and the topic endpoint
+global_topics = GlobalTopics()
@@ -0,0 +1,376 @@
+# services/vector_index.py
+"""
+Per-creator approximate nearest neighbour index over post embeddings.
+IVFIndex is an IVF-flat index in pure NumPy: vectors are L2-normalized,
+grouped under spherical k-means centroids and stored contiguously per list,
+so a query scores the centroids, then only the nprobe closest lists (one
+matmul each). Small creators skip the lists and use one exact matmul.
+Posts added later go to an unsorted tail that every query scans exactly,
+and are merged into the lists once the tail grows. An index is never
+changed in place: adding or removing posts returns a new index, so the
+work runs in a thread while queries keep using the current one.
+
+VectorIndexStore keeps recently used indexes in memory, persists them under
+VECTOR_INDEX_DIR and, when loading one from disk, fetches only the
+embeddings of posts inserted since it was saved. Inserted posts are applied
+off the event loop and the creator's index is swapped once they are in.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from core.config import (
+    VECTOR_INDEX_DIR, IVF_MIN_VECTORS, IVF_NPROBE, IVF_TRAIN_ITERATIONS,
+    IVF_TRAIN_SAMPLE, VECTOR_INDEX_MAX_CREATORS, VECTOR_INDEX_TAIL_FRACTION
+)
+from core.database import Repository, POST_EMBEDDING_COLUMNS
+from services.creator_snapshot import CreatorSnapshot, parse_embedding
+
+logger = logging.getLogger(__name__)
+
+# Rows per block when assigning vectors to centroids, bounds the score matrix
+_ASSIGN_BLOCK = 8192
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows as float32 (zero rows stay zero)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK):
+        block = vectors[start:start + _ASSIGN_BLOCK]
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def _train_centroids(vectors: np.ndarray, n_lists: int, iterations: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of the vectors"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), max(n_lists * 32, IVF_TRAIN_SAMPLE))
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = _nearest(sample, centroids)
+        counts = np.bincount(labels, minlength=n_lists)
+        order = np.argsort(labels, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        sums[~empty] = np.add.reduceat(sample[order], starts[~empty], axis=0)
+        # Re-seed empty lists with random sample points
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """IVF-flat index over one creator's normalized embeddings (treated as immutable)"""
+
+    def __init__(self, ids: np.ndarray, vectors: np.ndarray, centroids: Optional[np.ndarray] = None,
+                 offsets: Optional[np.ndarray] = None, tail_ids: Optional[np.ndarray] = None,
+                 tail_vectors: Optional[np.ndarray] = None):
+        # Rows sorted by list: list i is ids/vectors[offsets[i]:offsets[i + 1]]
+        self.ids = ids
+        self.vectors = vectors
+        self.centroids = centroids
+        self.offsets = offsets
+        dim = vectors.shape[1] if vectors.ndim == 2 else 0
+        self.tail_ids = tail_ids if tail_ids is not None else np.empty(0, dtype=np.int64)
+        self.tail_vectors = tail_vectors if tail_vectors is not None else np.empty((0, dim), dtype=np.float32)
+
+    @classmethod
+    def build(cls, ids: Sequence[int], vectors: np.ndarray, min_vectors: int = IVF_MIN_VECTORS,
+              iterations: int = IVF_TRAIN_ITERATIONS) -> 'IVFIndex':
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = normalize(vectors) if len(ids) else np.empty((0, 0), dtype=np.float32)
+        if len(ids) < min_vectors:
+            return cls(ids, vectors)
+
+        n_lists = max(1, int(2 * np.sqrt(len(ids))))
+        centroids = _train_centroids(vectors, n_lists, iterations)
+        return cls._grouped(ids, vectors, centroids)
+
+    @classmethod
+    def _grouped(cls, ids: np.ndarray, vectors: np.ndarray, centroids: np.ndarray) -> 'IVFIndex':
+        labels = _nearest(vectors, centroids)
+        order = np.argsort(labels, kind='stable')
+        offsets = np.searchsorted(labels[order], np.arange(len(centroids) + 1)).astype(np.int64)
+        return cls(ids[order], np.ascontiguousarray(vectors[order]), centroids, offsets)
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.tail_ids)
+
+    @property
+    def is_ivf(self) -> bool:
+        return self.centroids is not None
+
+    def all_ids(self) -> np.ndarray:
+        return np.concatenate([self.ids, self.tail_ids])
+
+    def added(self, ids: Sequence[int], vectors: np.ndarray) -> 'IVFIndex':
+        """This index plus vectors for ids it does not hold yet (merged into the lists once the tail grows)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        keep = ~np.isin(ids, self.all_ids())
+        if not keep.any():
+            return self
+
+        new_vectors = normalize(np.asarray(vectors)[keep])
+        tail_vectors = self.tail_vectors if self.tail_vectors.shape[1] else np.empty(
+            (0, new_vectors.shape[1]), dtype=np.float32
+        )
+        index = IVFIndex(self.ids, self.vectors, self.centroids, self.offsets,
+                         np.concatenate([self.tail_ids, ids[keep]]), np.concatenate([tail_vectors, new_vectors]))
+        if len(index.tail_ids) > max(1024, VECTOR_INDEX_TAIL_FRACTION * len(index.ids)):
+            return index.compacted()
+        return index
+
+    def removed(self, ids: Sequence[int]) -> 'IVFIndex':
+        """This index without the given ids; the lists keep their centroids"""
+        ids = np.asarray(ids, dtype=np.int64)
+        keep = ~np.isin(self.ids, ids)
+        keep_tail = ~np.isin(self.tail_ids, ids)
+        if keep.all() and keep_tail.all():
+            return self
+
+        offsets = self.offsets
+        if self.is_ivf:
+            # A list now ends where its old end falls among the kept rows
+            offsets = np.searchsorted(np.flatnonzero(keep), self.offsets).astype(np.int64)
+        return IVFIndex(self.ids[keep], self.vectors[keep], self.centroids, offsets,
+                        self.tail_ids[keep_tail], self.tail_vectors[keep_tail])
+
+    def synced(self, ids: Sequence[int], vectors: np.ndarray) -> 'IVFIndex':
+        """This index holding exactly the given ids: others are removed, missing ones added"""
+        ids = np.asarray(ids, dtype=np.int64)
+        current = self.all_ids()
+        index = self.removed(current[~np.isin(current, ids)])
+        missing = ~np.isin(ids, current)
+        return index.added(ids[missing], np.asarray(vectors)[missing]) if missing.any() else index
+
+    def compacted(self) -> 'IVFIndex':
+        """The tail merged into the lists (or lists trained once the index is large enough)"""
+        if not len(self.tail_ids):
+            return self
+        ids = np.concatenate([self.ids, self.tail_ids]) if len(self.ids) else self.tail_ids
+        vectors = np.concatenate([self.vectors, self.tail_vectors]) if len(self.ids) else self.tail_vectors
+
+        if self.is_ivf and len(ids) < 4 * len(self.ids):
+            return IVFIndex._grouped(ids, vectors, self.centroids)
+        # First lists, or the index outgrew its centroids
+        return IVFIndex.build(ids, vectors)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = IVF_NPROBE) -> List[Tuple[int, float]]:
+        """Top-k (post id, cosine similarity), best first"""
+        query = normalize(query)
+        candidate_ids = [self.tail_ids]
+        candidate_scores = [self.tail_vectors @ query] if len(self.tail_ids) else [np.empty(0, dtype=np.float32)]
+
+        if self.is_ivf:
+            centroid_scores = self.centroids @ query
+            probe = np.argpartition(-centroid_scores, min(nprobe, len(centroid_scores)) - 1)[:nprobe]
+            for list_id in probe:
+                start, end = self.offsets[list_id], self.offsets[list_id + 1]
+                if end > start:
+                    candidate_ids.append(self.ids[start:end])
+                    candidate_scores.append(self.vectors[start:end] @ query)
+        elif len(self.ids):
+            candidate_ids.append(self.ids)
+            candidate_scores.append(self.vectors @ query)
+
+        ids = np.concatenate(candidate_ids)
+        scores = np.concatenate(candidate_scores)
+        if not len(ids):
+            return []
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def save(self, path: str) -> None:
+        """Write the index atomically (tail merged first)"""
+        index = self.compacted()
+        arrays = {'ids': index.ids, 'vectors': index.vectors}
+        if index.is_ivf:
+            arrays.update(centroids=index.centroids, offsets=index.offsets)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'IVFIndex':
+        with np.load(path) as data:
+            return cls(data['ids'], data['vectors'],
+                       data['centroids'] if 'centroids' in data else None,
+                       data['offsets'] if 'offsets' in data else None)
+
+
+class VectorIndexStore:
+    """Creator -> IVFIndex, loaded on first use and kept current as posts are inserted (one event loop)"""
+
+    def __init__(self, directory: str = VECTOR_INDEX_DIR, max_creators: int = VECTOR_INDEX_MAX_CREATORS):
+        self.directory = directory
+        self.max_creators = max_creators
+        self._indexes: 'OrderedDict[str, IVFIndex]' = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        # Inserted posts not applied yet, per creator (loading or in memory)
+        self._pending: Dict[str, List[Tuple[List[int], np.ndarray]]] = {}
+        # One index update at a time per creator, each swapping in the index it built
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._draining: Set[str] = set()
+
+    def path(self, creator: str) -> str:
+        name = hashlib.sha1(creator.encode()).hexdigest()
+        return os.path.join(self.directory, f"{name}.npz")
+
+    async def get(self, repository: Repository, creator: str) -> IVFIndex:
+        index = self._indexes.get(creator)
+        if index is not None:
+            self._indexes.move_to_end(creator)
+            return index
+
+        loading = self._loading.get(creator)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(repository, creator))
+            self._loading[creator] = loading
+        return await asyncio.shield(loading)
+
+    async def _load(self, repository: Repository, creator: str) -> IVFIndex:
+        start = time.time()
+        try:
+            index = await self._from_disk(repository, creator)
+            if index is None:
+                snapshot = await CreatorSnapshot.load(repository, creator)
+                index = await asyncio.to_thread(IVFIndex.build, snapshot.embedded_ids, snapshot.embeddings)
+                if len(index):
+                    await self._save(creator, index)
+            # Posts inserted while loading; new ones may arrive during each pass
+            while self._pending.get(creator):
+                index = await asyncio.to_thread(index.added, *_stacked(self._pending.pop(creator)))
+        except BaseException:
+            self._pending.pop(creator, None)
+            raise
+        finally:
+            self._loading.pop(creator, None)
+
+        self._indexes[creator] = index
+        while len(self._indexes) > self.max_creators:
+            evicted, _ = self._indexes.popitem(last=False)
+            self._pending.pop(evicted, None)
+        logger.info(f"Vector index for {creator} ready: {len(index)} vectors "
+                    f"({'ivf' if index.is_ivf else 'flat'}) in {time.time() - start:.2f}s")
+        return index
+
+    async def _from_disk(self, repository: Repository, creator: str) -> Optional[IVFIndex]:
+        """Saved index, without posts deleted since and plus the posts inserted since"""
+        path = self.path(creator)
+        if not os.path.exists(path):
+            return None
+        try:
+            index = await asyncio.to_thread(IVFIndex.load, path)
+        except Exception as e:
+            logger.warning(f"Could not read vector index {path}, rebuilding: {e}")
+            return None
+
+        post_ids = [row['id'] async for page in repository.iter_posts_by_author(creator, 'id') for row in page]
+        known = set(index.ids.tolist())
+        current = set(post_ids)
+        stale = [post_id for post_id in known if post_id not in current]
+        missing = [post_id for post_id in post_ids if post_id not in known]
+        embedded = []
+        if missing:
+            rows = await repository.fetch_posts_by_ids(missing, POST_EMBEDDING_COLUMNS)
+            embedded = [(row['id'], parse_embedding(row.get('embedding'))) for row in rows]
+            embedded = [(post_id, vector) for post_id, vector in embedded if vector]
+
+        if stale or embedded:
+            def catch_up(index: IVFIndex) -> IVFIndex:
+                index = index.removed(stale)
+                if embedded:
+                    index = index.added([post_id for post_id, _ in embedded],
+                                        np.asarray([vector for _, vector in embedded], dtype=np.float32))
+                return index
+            index = await asyncio.to_thread(catch_up, index)
+            await self._save(creator, index)
+        return index
+
+    async def _save(self, creator: str, index: IVFIndex) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            await asyncio.to_thread(index.save, self.path(creator))
+        except Exception as e:
+            # The index still works from memory; it is rebuilt next time
+            logger.warning(f"Could not save vector index for {creator}: {e}")
+
+    async def _swap(self, creator: str, change: Callable[[IVFIndex], IVFIndex]) -> None:
+        """Build a changed copy of a creator's index in a thread and swap it in"""
+        lock = self._locks.setdefault(creator, asyncio.Lock())
+        try:
+            async with lock:
+                index = self._indexes.get(creator)
+                if index is None:
+                    # Evicted: the next load catches up from the database
+                    return
+                updated = await asyncio.to_thread(change, index)
+                if self._indexes.get(creator) is index:
+                    self._indexes[creator] = updated
+        finally:
+            if not lock.locked() and self._locks.get(creator) is lock:
+                del self._locks[creator]
+
+    def add_posts(self, posts: List[Dict], post_ids: List[int]) -> None:
+        """Queue freshly inserted posts (with their embedding) for the indexes in memory"""
+        by_creator: Dict[str, Tuple[List[int], List[List[float]]]] = {}
+        for post, post_id in zip(posts, post_ids):
+            creator = post.get('author')
+            if post.get('embedding') and (creator in self._indexes or creator in self._loading):
+                ids, vectors = by_creator.setdefault(creator, ([], []))
+                ids.append(post_id)
+                vectors.append(post['embedding'])
+
+        # Creators not in memory catch up from the database when next loaded;
+        # loading ones take their pending posts before they are ready
+        for creator, (ids, vectors) in by_creator.items():
+            self._pending.setdefault(creator, []).append((ids, np.asarray(vectors, dtype=np.float32)))
+            if creator in self._indexes and creator not in self._draining:
+                self._draining.add(creator)
+                asyncio.ensure_future(self._drain(creator))
+
+    async def _drain(self, creator: str) -> None:
+        try:
+            while self._pending.get(creator):
+                batches = self._pending.pop(creator)
+                await self._swap(creator, lambda index: index.added(*_stacked(batches)))
+        except Exception as e:
+            logger.error(f"Could not add posts to the vector index of {creator}: {e}")
+        finally:
+            self._draining.discard(creator)
+
+    async def sync(self, snapshot: CreatorSnapshot) -> None:
+        """Make a creator's index in memory hold exactly the snapshot's embedded posts (deleted ones leave)"""
+        if snapshot.creator not in self._indexes:
+            return
+        try:
+            await self._swap(snapshot.creator,
+                             lambda index: index.synced(snapshot.embedded_ids, snapshot.embeddings))
+        except Exception as e:
+            # Search keeps the current index; the next load catches up from the database
+            logger.error(f"Could not sync the vector index of {snapshot.creator}: {e}")
+
+
+def _stacked(batches: List[Tuple[List[int], np.ndarray]]) -> Tuple[List[int], np.ndarray]:
+    return [post_id for ids, _ in batches for post_id in ids], np.vstack([vectors for _, vectors in batches])
+
+
+# Shared by the search endpoint and the upload pipeline
+vector_indexes = VectorIndexStore()
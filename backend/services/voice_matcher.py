@@ -0,0 +1,152 @@
+# services/voice_matcher.py
+"""
+Matches draft text to voice clusters by their stored centroid embeddings.
+Every cluster's centroid_embedding is kept in one L2-normalized float32
+matrix, rows grouped by creator, so scoring a batch of drafts against all
+clusters (or one creator's contiguous rows) is a single matmul. A creator's
+rows are reloaded when a run that writes its profiles releases the
+creator's lock; the matrix is rebuilt once on the next lookup.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import VOICE_CENTROIDS_TTL
+from core.database import Repository
+from services.creator_snapshot import parse_embedding
+
+logger = logging.getLogger(__name__)
+
+CENTROID_COLUMNS = "creator, cluster_id, cluster_name, voice_schema, centroid_embedding"
+
+
+class _CreatorCentroids:
+    """One creator's clusters, in matrix row order"""
+
+    def __init__(self, rows: List[Dict]):
+        self.clusters = []
+        vectors = []
+        for row in rows:
+            centroid = parse_embedding(row.get('centroid_embedding'))
+            if centroid:
+                self.clusters.append({
+                    'creator': row['creator'],
+                    'cluster_id': row['cluster_id'],
+                    'cluster_name': row.get('cluster_name'),
+                    'voice_schema': row.get('voice_schema'),
+                })
+                vectors.append(centroid)
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+
+
+class VoiceMatcher:
+    """Centroid matrix over every creator's voice clusters (one event loop)"""
+
+    def __init__(self, ttl: float = VOICE_CENTROIDS_TTL):
+        self.ttl = ttl
+        self._creators: Dict[str, _CreatorCentroids] = {}
+        self._loaded_at: Optional[float] = None
+        self._stale: set = set()
+        self._refresh_lock = asyncio.Lock()
+        # Built from _creators on demand
+        self._matrix: Optional[np.ndarray] = None
+        self._clusters: List[Dict] = []
+        self._ranges: Dict[str, Tuple[int, int]] = {}
+
+    def invalidate(self, creator: str) -> None:
+        """Reload this creator's centroids before the next lookup"""
+        self._stale.add(creator)
+
+    async def _ensure_current(self, repository: Repository) -> None:
+        async with self._refresh_lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+                await self._load_all(repository)
+            elif self._stale:
+                await self._load_stale(repository)
+            if self._matrix is None:
+                self._build()
+
+    async def _load_all(self, repository: Repository) -> None:
+        start = time.time()
+        self._stale.clear()
+        rows_by_creator: Dict[str, List[Dict]] = {}
+        async for page in repository.iter_voice_profiles(CENTROID_COLUMNS):
+            for row in page:
+                rows_by_creator.setdefault(row['creator'], []).append(row)
+
+        self._creators = {creator: _CreatorCentroids(rows) for creator, rows in rows_by_creator.items()}
+        self._loaded_at = time.monotonic()
+        self._matrix = None
+        logger.info(f"Loaded voice centroids for {len(self._creators)} creators in {time.time() - start:.2f}s")
+
+    async def _load_stale(self, repository: Repository) -> None:
+        # Creators invalidated while this runs stay stale for the next lookup
+        creators = list(self._stale)
+        self._stale.clear()
+        try:
+            results = await asyncio.gather(*[
+                repository.list_voice_profiles(creator, CENTROID_COLUMNS) for creator in creators
+            ])
+        except Exception:
+            self._stale.update(creators)
+            raise
+
+        for creator, rows in zip(creators, results):
+            if rows:
+                self._creators[creator] = _CreatorCentroids(rows)
+            else:
+                self._creators.pop(creator, None)
+        self._matrix = None
+
+    def _build(self) -> None:
+        blocks = []
+        self._clusters = []
+        self._ranges = {}
+        for creator, centroids in self._creators.items():
+            if not centroids.clusters:
+                continue
+            start = len(self._clusters)
+            self._clusters.extend(centroids.clusters)
+            self._ranges[creator] = (start, len(self._clusters))
+            blocks.append(centroids.vectors)
+
+        if blocks:
+            matrix = np.concatenate(blocks)
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        self._matrix = matrix
+
+    async def match(self, repository: Repository, drafts: np.ndarray, top_k: int,
+                    creator: Optional[str] = None) -> List[List[Dict]]:
+        """
+        Best matching clusters for each row of drafts (normalized embeddings),
+        across every creator or only one. Each match is the cluster's creator,
+        cluster_id, cluster_name, voice_schema and cosine similarity as score.
+        """
+        await self._ensure_current(repository)
+
+        start, end = self._ranges.get(creator, (0, 0)) if creator is not None else (0, len(self._clusters))
+        if end == start:
+            return [[] for _ in range(len(drafts))]
+
+        scores = drafts @ self._matrix[start:end].T
+        k = min(top_k, end - start)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+
+        matches = []
+        for rows, row_scores, row_order in zip(top, top_scores, order):
+            matches.append([
+                {**self._clusters[start + rows[i]], 'score': round(float(row_scores[i]), 4)}
+                for i in row_order
+            ])
+        return matches
+
+
+# Shared by the voice match endpoint and the per-creator write hook
+voice_matcher = VoiceMatcher()
@@ -0,0 +1,29 @@
+-- assign_post_clusters
+-- Writes many cluster assignments in one statement instead of one UPDATE
+-- per post. p_ids and p_cluster_ids are parallel arrays: post p_ids[i]
+-- moves to cluster p_cluster_ids[i].
+--
+-- Returns the number of posts updated; ids that no longer exist are
+-- simply skipped. Called from Repository.update_post_clusters.
+
+create or replace function assign_post_clusters(p_ids bigint[], p_cluster_ids integer[])
+returns integer
+language plpgsql
+as $$
+declare
+    updated_count integer;
+begin
+    if coalesce(array_length(p_ids, 1), 0) <> coalesce(array_length(p_cluster_ids, 1), 0) then
+        raise exception 'p_ids and p_cluster_ids must have the same length';
+    end if;
+
+    update creator_posts p
+    set cluster_id = a.cluster_id
+    from unnest(p_ids, p_cluster_ids) as a(id, cluster_id)
+    where p.id = a.id
+      and p.cluster_id is distinct from a.cluster_id;
+
+    get diagnostics updated_count = row_count;
+    return updated_count;
+end;
+$$;
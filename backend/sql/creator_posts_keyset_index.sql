@@ -0,0 +1,11 @@
+-- creator_posts_keyset_index
+-- Serves /api/creators/{author}/posts pages straight from the index.
+-- Repository.page_posts_by_author bounds each query with
+-- post_timestamp <= T (or post_timestamp is null for the undated tail), which
+-- seeks to the previous page's last row; the (post_timestamp < T or id < X)
+-- tie-break only filters the rows sharing timestamp T. Deep pages therefore
+-- cost the same as the first one. Matches the order used by
+-- Repository.page_posts_by_author.
+
+create index if not exists creator_posts_author_timestamp_idx
+    on creator_posts (author, post_timestamp desc nulls last, id desc);
@@ -0,0 +1,18 @@
+-- creator_similarity
+-- "Creators who write like X": each creator's most similar creators by a
+-- combined topic (cluster centroids) and style (voice_schema) feature,
+-- best first; similar_creators[i] has score scores[i]. feature is the
+-- creator's feature vector the list was computed from and feature_hash its
+-- hash, so the creator_similarity job rereads the voice profiles of only
+-- the creators that changed and rewrites only the lists they affect.
+-- Written by services/creator_similarity.py.
+
+create table if not exists creator_similarity (
+    creator text primary key,
+    similar_creators text[] not null default '{}',
+    scores real[] not null default '{}',
+    feature_hash text,
+    updated_at timestamptz not null default now()
+);
+
+alter table creator_similarity add column if not exists feature real[];
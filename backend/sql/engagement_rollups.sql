@@ -0,0 +1,169 @@
+-- engagement_rollups
+-- Weekly and monthly engagement per creator and per cluster, kept current by
+-- statement-level triggers on creator_posts so time series never scan posts:
+--   * inserts add the new posts to their week/month buckets
+--   * updates (cluster assignments from a recluster, edited counts) move
+--     the old values out and the new values in
+--   * deletes take the posts out
+-- cluster_id -1 is the creator total (it also counts unclustered posts).
+-- Posts without a post_timestamp are not in any bucket.
+--
+-- get_engagement_series() returns one creator's buckets. Called from
+-- Repository.engagement_series.
+
+create table if not exists engagement_rollups (
+    author text not null,
+    cluster_id integer not null,
+    period text not null check (period in ('week', 'month')),
+    period_start date not null,
+    post_count bigint not null default 0,
+    likes bigint not null default 0,
+    comments bigint not null default 0,
+    reposts bigint not null default 0,
+    primary key (author, period, cluster_id, period_start)
+);
+
+-- Adds signed per-post values (sign -1 takes posts out) to their buckets
+create or replace function engagement_rollups_add(p_rows jsonb)
+returns void
+language sql
+as $$
+    insert into engagement_rollups as e (author, cluster_id, period, period_start, post_count, likes, comments, reposts)
+    select
+        r.author, c.cluster_id, p.period, date_trunc(p.period, r.post_timestamp)::date,
+        sum(r.sign), sum(r.sign * r.likes), sum(r.sign * r.comments), sum(r.sign * r.reposts)
+    from jsonb_to_recordset(p_rows) as r(
+        author text, cluster_id integer, post_timestamp timestamptz,
+        likes bigint, comments bigint, reposts bigint, sign integer
+    )
+    cross join (values ('week'), ('month')) as p(period)
+    cross join lateral (values (-1), (r.cluster_id)) as c(cluster_id)
+    where r.author is not null and r.post_timestamp is not null and c.cluster_id is not null
+    group by 1, 2, 3, 4
+    -- Same lock order in every statement, so concurrent inserts of one creator cannot deadlock
+    order by 1, 2, 3, 4
+    on conflict (author, period, cluster_id, period_start) do update set
+        post_count = e.post_count + excluded.post_count,
+        likes = e.likes + excluded.likes,
+        comments = e.comments + excluded.comments,
+        reposts = e.reposts + excluded.reposts;
+$$;
+
+create or replace function engagement_rollup_rows(p_sign integer, p_author text, p_cluster_id integer,
+                                                  p_post_timestamp timestamptz, p_likes bigint,
+                                                  p_comments bigint, p_reposts bigint)
+returns jsonb
+language sql
+immutable
+as $$
+    select jsonb_build_object(
+        'author', p_author, 'cluster_id', p_cluster_id, 'post_timestamp', p_post_timestamp,
+        'likes', coalesce(p_likes, 0), 'comments', coalesce(p_comments, 0),
+        'reposts', coalesce(p_reposts, 0), 'sign', p_sign
+    );
+$$;
+
+create or replace function engagement_rollups_posts_inserted()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform engagement_rollups_add(coalesce((
+        select jsonb_agg(engagement_rollup_rows(1, author, cluster_id, post_timestamp,
+                                                like_count, comment_count, repost_count))
+        from new_rows
+    ), '[]'));
+    return null;
+end;
+$$;
+
+create or replace function engagement_rollups_posts_updated()
+returns trigger
+language plpgsql
+as $$
+begin
+    -- Only rows whose bucket or values changed (embedding writes leave rollups alone)
+    perform engagement_rollups_add(coalesce((
+        select jsonb_agg(change)
+        from old_rows o
+        join new_rows n using (id)
+        cross join lateral (values
+            (engagement_rollup_rows(-1, o.author, o.cluster_id, o.post_timestamp,
+                                    o.like_count, o.comment_count, o.repost_count)),
+            (engagement_rollup_rows(1, n.author, n.cluster_id, n.post_timestamp,
+                                    n.like_count, n.comment_count, n.repost_count))
+        ) as c(change)
+        where (o.author, o.cluster_id, o.post_timestamp, o.like_count, o.comment_count, o.repost_count)
+            is distinct from
+              (n.author, n.cluster_id, n.post_timestamp, n.like_count, n.comment_count, n.repost_count)
+    ), '[]'));
+    return null;
+end;
+$$;
+
+create or replace function engagement_rollups_posts_deleted()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform engagement_rollups_add(coalesce((
+        select jsonb_agg(engagement_rollup_rows(-1, author, cluster_id, post_timestamp,
+                                                like_count, comment_count, repost_count))
+        from old_rows
+    ), '[]'));
+    return null;
+end;
+$$;
+
+drop trigger if exists engagement_rollups_posts_insert on creator_posts;
+create trigger engagement_rollups_posts_insert
+    after insert on creator_posts
+    referencing new table as new_rows
+    for each statement execute function engagement_rollups_posts_inserted();
+
+drop trigger if exists engagement_rollups_posts_update on creator_posts;
+create trigger engagement_rollups_posts_update
+    after update on creator_posts
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function engagement_rollups_posts_updated();
+
+drop trigger if exists engagement_rollups_posts_delete on creator_posts;
+create trigger engagement_rollups_posts_delete
+    after delete on creator_posts
+    referencing old table as old_rows
+    for each statement execute function engagement_rollups_posts_deleted();
+
+-- Backfill from the current data (safe to re-run: rebuilds every bucket)
+delete from engagement_rollups;
+insert into engagement_rollups (author, cluster_id, period, period_start, post_count, likes, comments, reposts)
+select
+    r.author, c.cluster_id, p.period, date_trunc(p.period, r.post_timestamp)::date,
+    count(*), sum(coalesce(r.like_count, 0)), sum(coalesce(r.comment_count, 0)), sum(coalesce(r.repost_count, 0))
+from creator_posts r
+cross join (values ('week'), ('month')) as p(period)
+cross join lateral (values (-1), (r.cluster_id)) as c(cluster_id)
+where r.author is not null and r.post_timestamp is not null and c.cluster_id is not null
+group by 1, 2, 3, 4;
+
+create or replace function get_engagement_series(p_author text, p_period text, p_cluster_id integer default -1,
+                                                 p_since date default null, p_until date default null)
+returns table (
+    period_start date,
+    post_count bigint,
+    likes bigint,
+    comments bigint,
+    reposts bigint
+)
+language sql
+stable
+as $$
+    select period_start, post_count, likes, comments, reposts
+    from engagement_rollups
+    where author = p_author
+      and period = p_period
+      and cluster_id = p_cluster_id
+      and post_count > 0
+      and (p_since is null or period_start >= p_since)
+      and (p_until is null or period_start <= p_until)
+    order by period_start;
+$$;
@@ -0,0 +1,29 @@
+-- get_creator_stats
+-- Post and profile stats for one creator, the single-creator counterpart of
+-- get_creators_with_stats. Reads only that creator's rows (through the
+-- author index), so its cost does not grow with the number of creators.
+--
+-- Returns no row for an unknown creator. Called from
+-- Repository.get_creator_stats.
+
+create index if not exists creator_posts_author_idx on creator_posts (author);
+create index if not exists creator_voice_profiles_creator_idx on creator_voice_profiles (creator);
+
+create or replace function get_creator_stats(p_author text)
+returns table (
+    total_posts bigint,
+    average_likes bigint,
+    average_engagement bigint,
+    total_voice_profiles bigint
+)
+language sql
+stable
+as $$
+    select
+        count(*),
+        coalesce(round(avg(coalesce(p.like_count, 0))), 0)::bigint,
+        coalesce(round(avg(coalesce(p.like_count, 0) + coalesce(p.comment_count, 0) + coalesce(p.repost_count, 0))), 0)::bigint,
+        (select count(*) from creator_voice_profiles v where v.creator = p_author)
+    from creator_posts p
+    where p.author = p_author;
+$$;
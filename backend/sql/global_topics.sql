@@ -0,0 +1,167 @@
+-- global_topics
+-- Cross-creator topic of every post (creator_posts.topic_id), assigned by the
+-- incremental topic model in services/topic_model.py, and per-topic totals
+-- kept current by statement-level triggers so reading them never scans
+-- creator_posts:
+--   * global_topic_stats holds post count and summed likes / comments /
+--     reposts per topic
+--   * a post counts towards its topic from the moment topic_id is set;
+--     moving or deleting it moves or removes its engagement
+--
+-- get_topic_stats() returns every topic, largest first. Called from
+-- Repository.topic_stats.
+--
+-- assign_post_topics(p_ids, p_topic_ids) writes a batch of topic ids in one
+-- statement (post p_ids[i] gets topic p_topic_ids[i]) and returns the
+-- number of posts updated. Called from Repository.update_post_topics.
+
+alter table creator_posts add column if not exists topic_id integer;
+
+-- The backfill job pages through posts that have no topic yet
+create index if not exists creator_posts_untopiced_idx
+    on creator_posts (id) where topic_id is null;
+
+create table if not exists global_topic_stats (
+    topic_id integer primary key,
+    post_count bigint not null default 0,
+    likes bigint not null default 0,
+    comments bigint not null default 0,
+    reposts bigint not null default 0
+);
+
+-- Backfill from the current data (safe to re-run)
+delete from global_topic_stats;
+insert into global_topic_stats (topic_id, post_count, likes, comments, reposts)
+select topic_id, count(*), sum(coalesce(like_count, 0)), sum(coalesce(comment_count, 0)), sum(coalesce(repost_count, 0))
+from creator_posts
+where topic_id is not null
+group by topic_id;
+
+create or replace function assign_post_topics(p_ids bigint[], p_topic_ids integer[])
+returns integer
+language plpgsql
+as $$
+declare
+    updated_count integer;
+begin
+    if coalesce(array_length(p_ids, 1), 0) <> coalesce(array_length(p_topic_ids, 1), 0) then
+        raise exception 'p_ids and p_topic_ids must have the same length';
+    end if;
+
+    update creator_posts p
+    set topic_id = a.topic_id
+    from unnest(p_ids, p_topic_ids) as a(id, topic_id)
+    where p.id = a.id
+      and p.topic_id is distinct from a.topic_id;
+
+    get diagnostics updated_count = row_count;
+    return updated_count;
+end;
+$$;
+
+-- Adds signed per-post values (sign -1 takes posts out) to their topics
+create or replace function global_topics_add(p_rows jsonb)
+returns void
+language sql
+as $$
+    insert into global_topic_stats as s (topic_id, post_count, likes, comments, reposts)
+    select r.topic_id, sum(r.sign), sum(r.sign * r.likes), sum(r.sign * r.comments), sum(r.sign * r.reposts)
+    from jsonb_to_recordset(p_rows) as r(topic_id integer, likes bigint, comments bigint, reposts bigint, sign integer)
+    where r.topic_id is not null
+    group by r.topic_id
+    -- Same lock order in every statement, so concurrent writers cannot deadlock
+    order by r.topic_id
+    on conflict (topic_id) do update set
+        post_count = s.post_count + excluded.post_count,
+        likes = s.likes + excluded.likes,
+        comments = s.comments + excluded.comments,
+        reposts = s.reposts + excluded.reposts;
+$$;
+
+create or replace function global_topic_row(p_sign integer, p_topic_id integer, p_likes bigint,
+                                            p_comments bigint, p_reposts bigint)
+returns jsonb
+language sql
+immutable
+as $$
+    select jsonb_build_object(
+        'topic_id', p_topic_id, 'likes', coalesce(p_likes, 0), 'comments', coalesce(p_comments, 0),
+        'reposts', coalesce(p_reposts, 0), 'sign', p_sign
+    );
+$$;
+
+create or replace function global_topics_posts_inserted()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform global_topics_add(coalesce((
+        select jsonb_agg(global_topic_row(1, topic_id, like_count, comment_count, repost_count))
+        from new_rows where topic_id is not null
+    ), '[]'));
+    return null;
+end;
+$$;
+
+create or replace function global_topics_posts_updated()
+returns trigger
+language plpgsql
+as $$
+begin
+    -- Only rows whose topic or engagement changed
+    perform global_topics_add(coalesce((
+        select jsonb_agg(change)
+        from old_rows o
+        join new_rows n using (id)
+        cross join lateral (values
+            (global_topic_row(-1, o.topic_id, o.like_count, o.comment_count, o.repost_count)),
+            (global_topic_row(1, n.topic_id, n.like_count, n.comment_count, n.repost_count))
+        ) as c(change)
+        where (o.topic_id, o.like_count, o.comment_count, o.repost_count)
+            is distinct from (n.topic_id, n.like_count, n.comment_count, n.repost_count)
+    ), '[]'));
+    return null;
+end;
+$$;
+
+create or replace function global_topics_posts_deleted()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform global_topics_add(coalesce((
+        select jsonb_agg(global_topic_row(-1, topic_id, like_count, comment_count, repost_count))
+        from old_rows where topic_id is not null
+    ), '[]'));
+    return null;
+end;
+$$;
+
+drop trigger if exists global_topics_posts_insert on creator_posts;
+create trigger global_topics_posts_insert
+    after insert on creator_posts
+    referencing new table as new_rows
+    for each statement execute function global_topics_posts_inserted();
+
+drop trigger if exists global_topics_posts_update on creator_posts;
+create trigger global_topics_posts_update
+    after update on creator_posts
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function global_topics_posts_updated();
+
+drop trigger if exists global_topics_posts_delete on creator_posts;
+create trigger global_topics_posts_delete
+    after delete on creator_posts
+    referencing old table as old_rows
+    for each statement execute function global_topics_posts_deleted();
+
+create or replace function get_topic_stats()
+returns table (topic_id integer, post_count bigint, likes bigint, comments bigint, reposts bigint)
+language sql
+stable
+as $$
+    select topic_id, post_count, likes, comments, reposts
+    from global_topic_stats
+    where post_count > 0
+    order by post_count desc, topic_id;
+$$;
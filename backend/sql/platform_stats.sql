@@ -0,0 +1,198 @@
+-- platform_stats
+-- Totals behind /stats, kept current by statement-level triggers so reading
+-- them never scans creator_posts or uploaded_files:
+--   * author_post_counts holds the number of posts per author; an author
+--     counts as unique while it has at least one post, so a statement only
+--     moves unique_authors by the authors whose count crossed zero; a post
+--     whose author changes leaves the old author's count and joins the new one
+--   * the totals are spread over PLATFORM_STATS_SHARDS rows of
+--     platform_stats_shards, each statement adding its deltas to the row of
+--     its backend, so concurrent uploads do not queue on one row
+--
+-- get_platform_stats() returns the summed totals. Called from
+-- Repository.platform_stats.
+
+create table if not exists author_post_counts (
+    author text primary key,
+    post_count bigint not null default 0
+);
+
+create table if not exists platform_stats_shards (
+    shard smallint primary key,
+    total_posts bigint not null default 0,
+    unique_authors bigint not null default 0,
+    files_processed bigint not null default 0
+);
+
+-- Replaced by platform_stats_shards
+drop table if exists platform_stats;
+
+-- The row a statement adds its deltas to (PLATFORM_STATS_SHARDS = 16)
+create or replace function platform_stats_shard()
+returns smallint
+language sql
+stable
+as $$
+    select (pg_backend_pid() % 16)::smallint;
+$$;
+
+-- Backfill from the current data (safe to re-run)
+insert into author_post_counts (author, post_count)
+select author, count(*) from creator_posts where author is not null group by author
+on conflict (author) do update set post_count = excluded.post_count;
+
+delete from platform_stats_shards;
+insert into platform_stats_shards (shard, total_posts, unique_authors, files_processed)
+select
+    shard,
+    case when shard = 0 then (select count(*) from creator_posts) else 0 end,
+    case when shard = 0 then (select count(*) from author_post_counts where post_count > 0) else 0 end,
+    case when shard = 0 then (select count(*) from uploaded_files) else 0 end
+from generate_series(0, 15) as shard;
+
+create or replace function platform_stats_posts_inserted()
+returns trigger
+language plpgsql
+as $$
+begin
+    with added as (
+        select author, count(*) as n from new_rows where author is not null group by author
+    ), counted as (
+        insert into author_post_counts as c (author, post_count)
+        -- Same lock order in every statement, so concurrent inserts cannot deadlock
+        select author, n from added order by author
+        on conflict (author) do update set post_count = c.post_count + excluded.post_count
+        returning c.author, c.post_count
+    )
+    update platform_stats_shards set
+        total_posts = total_posts + (select count(*) from new_rows),
+        -- Authors whose count went from 0 to exactly what this statement added
+        unique_authors = unique_authors + (
+            select count(*) from counted join added using (author) where counted.post_count = added.n
+        )
+    where shard = platform_stats_shard();
+    return null;
+end;
+$$;
+
+create or replace function platform_stats_posts_deleted()
+returns trigger
+language plpgsql
+as $$
+begin
+    with removed as (
+        select author, count(*) as n from old_rows where author is not null group by author
+    ), counted as (
+        update author_post_counts c set post_count = greatest(c.post_count - removed.n, 0)
+        from removed
+        where c.author = removed.author and c.post_count > 0
+        returning c.author, c.post_count
+    )
+    update platform_stats_shards set
+        total_posts = total_posts - (select count(*) from old_rows),
+        -- Authors whose last posts this statement removed
+        unique_authors = unique_authors - (select count(*) from counted where post_count = 0)
+    where shard = platform_stats_shard();
+    return null;
+end;
+$$;
+
+create or replace function platform_stats_posts_updated()
+returns trigger
+language plpgsql
+as $$
+declare
+    lost bigint;
+    gained bigint;
+begin
+    -- Posts whose author changed leave the old author first...
+    with removed as (
+        select o.author, count(*) as n
+        from old_rows o join new_rows n using (id)
+        where o.author is distinct from n.author and o.author is not null
+        group by o.author
+    ), counted as (
+        update author_post_counts c set post_count = greatest(c.post_count - removed.n, 0)
+        from removed
+        where c.author = removed.author and c.post_count > 0
+        returning c.author, c.post_count
+    )
+    select count(*) into lost from counted where post_count = 0;
+
+    -- ...then join the new one (a separate statement, so it sees the decrements)
+    with added as (
+        select n.author, count(*) as n
+        from old_rows o join new_rows n using (id)
+        where o.author is distinct from n.author and n.author is not null
+        group by n.author
+    ), counted as (
+        insert into author_post_counts as c (author, post_count)
+        select author, n from added order by author
+        on conflict (author) do update set post_count = c.post_count + excluded.post_count
+        returning c.author, c.post_count
+    )
+    select count(*) into gained from counted join added using (author) where counted.post_count = added.n;
+
+    -- Embedding, cluster and engagement writes move no author and skip the shard row
+    if gained <> lost then
+        update platform_stats_shards set unique_authors = unique_authors + gained - lost
+        where shard = platform_stats_shard();
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function platform_stats_files_changed()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'INSERT' then
+        update platform_stats_shards set files_processed = files_processed + (select count(*) from new_rows)
+        where shard = platform_stats_shard();
+    else
+        update platform_stats_shards set files_processed = files_processed - (select count(*) from old_rows)
+        where shard = platform_stats_shard();
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists platform_stats_posts_insert on creator_posts;
+create trigger platform_stats_posts_insert
+    after insert on creator_posts
+    referencing new table as new_rows
+    for each statement execute function platform_stats_posts_inserted();
+
+drop trigger if exists platform_stats_posts_update on creator_posts;
+create trigger platform_stats_posts_update
+    after update on creator_posts
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function platform_stats_posts_updated();
+
+drop trigger if exists platform_stats_posts_delete on creator_posts;
+create trigger platform_stats_posts_delete
+    after delete on creator_posts
+    referencing old table as old_rows
+    for each statement execute function platform_stats_posts_deleted();
+
+drop trigger if exists platform_stats_files_insert on uploaded_files;
+create trigger platform_stats_files_insert
+    after insert on uploaded_files
+    referencing new table as new_rows
+    for each statement execute function platform_stats_files_changed();
+
+drop trigger if exists platform_stats_files_delete on uploaded_files;
+create trigger platform_stats_files_delete
+    after delete on uploaded_files
+    referencing old table as old_rows
+    for each statement execute function platform_stats_files_changed();
+
+create or replace function get_platform_stats()
+returns table (total_posts bigint, unique_authors bigint, files_processed bigint)
+language sql
+stable
+as $$
+    select sum(total_posts)::bigint, sum(unique_authors)::bigint, sum(files_processed)::bigint
+    from platform_stats_shards;
+$$;
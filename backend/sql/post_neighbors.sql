@@ -0,0 +1,19 @@
+-- post_neighbors
+-- Precomputed "similar posts" graph: for every post with an embedding, its
+-- k nearest posts by the same author (cosine similarity, best first).
+-- neighbor_ids[i] has similarity scores[i]. Built after clustering by
+-- services/post_neighbors.py; new posts get their own row and may enter
+-- existing rows, so only changed rows are rewritten.
+-- /api/posts/{post_id}/similar reads one row by primary key.
+
+create table if not exists post_neighbors (
+    post_id bigint primary key references creator_posts (id) on delete cascade,
+    author text not null,
+    neighbor_ids bigint[] not null default '{}',
+    scores real[] not null default '{}',
+    updated_at timestamptz not null default now()
+);
+
+-- Incremental updates read one author's rows in post_id order
+create index if not exists post_neighbors_author_post_id_idx
+    on post_neighbors (author, post_id);
@@ -0,0 +1,51 @@
+-- replace_creator_voice_profiles
+-- Writes a creator's voice profiles in one transaction:
+--   * upserts the regenerated profiles on (creator, cluster_id)
+--   * deletes clusters that are not in p_ranks (e.g. when k shrinks or a
+--     changed cluster lost all of its posts)
+--   * sets performance_rank for every remaining cluster from p_ranks
+--
+-- p_ranks is a JSON object of cluster_id -> rank, e.g. {"0": 2, "1": 1}.
+-- Called from FastVoiceProfileGenerator.batch_save_profiles.
+
+create or replace function replace_creator_voice_profiles(p_creator text, p_profiles jsonb, p_ranks jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+    saved_count integer;
+begin
+    delete from creator_voice_profiles
+    where creator = p_creator
+      and cluster_id not in (select key::integer from jsonb_object_keys(p_ranks) as key);
+
+    insert into creator_voice_profiles (
+        creator, cluster_id, cluster_name, cluster_description, voice_schema,
+        engagement, post_characteristics, top_post_ids, performance_rank,
+        created_at, updated_at, centroid_embedding
+    )
+    select
+        p_creator, r.cluster_id, r.cluster_name, r.cluster_description, r.voice_schema,
+        r.engagement, r.post_characteristics, r.top_post_ids, r.performance_rank,
+        r.created_at, r.updated_at, r.centroid_embedding
+    from jsonb_populate_recordset(null::creator_voice_profiles, p_profiles) as r
+    on conflict (creator, cluster_id) do update set
+        cluster_name = excluded.cluster_name,
+        cluster_description = excluded.cluster_description,
+        voice_schema = excluded.voice_schema,
+        engagement = excluded.engagement,
+        post_characteristics = excluded.post_characteristics,
+        top_post_ids = excluded.top_post_ids,
+        updated_at = excluded.updated_at,
+        centroid_embedding = excluded.centroid_embedding;
+
+    get diagnostics saved_count = row_count;
+
+    update creator_voice_profiles v
+    set performance_rank = (p_ranks->>v.cluster_id::text)::integer
+    where v.creator = p_creator
+      and v.performance_rank is distinct from (p_ranks->>v.cluster_id::text)::integer;
+
+    return saved_count;
+end;
+$$;
@@ -0,0 +1,19 @@
+-- upload_creators
+-- Manifest of the creators each upload touched, with a checkpoint of how
+-- far each creator got through the pipeline:
+--   parsed    -> creator seen in the file
+--   inserted  -> all of its new posts are stored (new_post_ids)
+--   clustered -> cluster assignments committed (dirty_clusters still need profiles)
+--   profiled  -> voice profiles regenerated, nothing left to do
+-- /fix-all-stuck-files resumes only creators that are not 'profiled'.
+-- Written by services/checkpoints.py.
+
+create table if not exists upload_creators (
+    file_id text not null,
+    creator text not null,
+    stage text not null default 'parsed',
+    new_post_ids bigint[] not null default '{}',
+    dirty_clusters integer[] not null default '{}',
+    updated_at timestamptz not null default now(),
+    primary key (file_id, creator)
+);
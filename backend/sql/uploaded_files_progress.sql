@@ -0,0 +1,7 @@
+-- uploaded_files_progress
+-- Per-creator progress of an upload, written by services/progress.py while
+-- process_file_optimized runs its per-creator stage.
+
+alter table uploaded_files add column if not exists creators_total integer;
+alter table uploaded_files add column if not exists creators_processed integer default 0;
+alter table uploaded_files add column if not exists creators_failed integer default 0;
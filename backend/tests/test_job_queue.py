@@ -0,0 +1,106 @@
+"""
+JobQueue claim / fail / recover / purge on an in-memory SQLite database.
+"""
+import time
+
+from services.job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED
+
+
+def make_queue():
+    return JobQueue(':memory:')
+
+
+def test_claim_is_fifo_across_groups_and_respects_types():
+    queue = make_queue()
+    first = queue.enqueue('process_file', {'file_id': 1}, 'file:1')
+    recluster = queue.enqueue('recluster', {'creator': 'Ada'}, 'creator:Ada')
+    second = queue.enqueue('process_file', {'file_id': 2}, 'file:2')
+
+    assert queue.claim(['process_file']).id == first
+    job = queue.claim(['process_file', 'recluster'])
+    assert (job.id, job.attempts) == (recluster, 1)
+    assert queue.claim(['process_file']).id == second
+    assert queue.claim(['process_file', 'recluster']) is None
+    assert queue.claim([]) is None
+
+
+def test_group_with_a_running_job_waits_behind_idle_groups():
+    queue = make_queue()
+    queue.enqueue('recluster', {'creator': 'Ada'}, 'creator:Ada')
+    queue.claim(['recluster'])
+    again = queue.enqueue('recluster', {'creator': 'Ada'}, 'creator:Ada')
+    other = queue.enqueue('recluster', {'creator': 'Bob'}, 'creator:Bob')
+
+    assert queue.claim(['recluster']).id == other
+    assert queue.claim(['recluster']).id == again
+
+
+def test_coalesce_joins_a_queued_job_only():
+    queue = make_queue()
+    job_id = queue.enqueue('topic_backfill', {}, 'topics', coalesce=True)
+    assert queue.enqueue('topic_backfill', {}, 'topics', coalesce=True) == job_id
+
+    queue.claim(['topic_backfill'])
+    assert queue.enqueue('topic_backfill', {}, 'topics', coalesce=True) != job_id
+
+
+def test_fail_retries_with_backoff_then_gives_up():
+    queue = make_queue()
+    job_id = queue.enqueue('process_file', {'file_id': 1}, 'file:1', max_attempts=2)
+
+    job = queue.claim(['process_file'])
+    assert queue.fail(job, 'boom') is True
+    row = queue.get(job_id)
+    assert (row['status'], row['error']) == (QUEUED, 'boom')
+    # Not runnable until the backoff has passed
+    assert row['available_at'] > time.time()
+    assert queue.claim(['process_file']) is None
+
+    queue._execute("update jobs set available_at = 0 where id = ?", (job_id,))
+    job = queue.claim(['process_file'])
+    assert job.attempts == 2
+    assert queue.fail(job, 'boom again') is False
+    assert queue.get(job_id)['status'] == FAILED
+
+
+def test_release_does_not_count_the_attempt():
+    queue = make_queue()
+    job_id = queue.enqueue('recluster', {'creator': 'Ada'}, 'creator:Ada')
+    queue.claim(['recluster'])
+    queue.release(job_id)
+
+    row = queue.get(job_id)
+    assert (row['status'], row['attempts']) == (QUEUED, 0)
+
+
+def test_recover_requeues_running_jobs_and_gives_up_on_exhausted_ones():
+    queue = make_queue()
+    retried = queue.enqueue('process_file', {'file_id': 1}, 'file:1', max_attempts=3)
+    exhausted = queue.enqueue('process_file', {'file_id': 2}, 'file:2', max_attempts=1)
+    queue.claim(['process_file'])
+    queue.claim(['process_file'])
+
+    given_up = queue.recover()
+    assert [(job.id, job.payload) for job in given_up] == [(exhausted, {'file_id': 2})]
+    assert queue.get(retried)['status'] == QUEUED
+    assert queue.get(exhausted)['status'] == FAILED
+    assert queue.depth() == {'process_file': {QUEUED: 1, RUNNING: 0}}
+    assert queue.active_groups(['process_file']) == {'file:1'}
+
+
+def test_purge_deletes_only_old_finished_jobs():
+    queue = make_queue()
+    old_done = queue.enqueue('recluster', {'creator': 'a'}, 'creator:a')
+    old_failed = queue.enqueue('recluster', {'creator': 'b'}, 'creator:b', max_attempts=1)
+    recent = queue.enqueue('recluster', {'creator': 'c'}, 'creator:c')
+    waiting = queue.enqueue('recluster', {'creator': 'd'}, 'creator:d')
+
+    queue.complete(queue.claim(['recluster']).id)
+    queue.fail(queue.claim(['recluster']), 'boom')
+    queue.complete(queue.claim(['recluster']).id)
+    queue._execute("update jobs set finished_at = 0 where id in (?, ?)", (old_done, old_failed))
+
+    assert queue.purge(older_than=3600) == 2
+    assert queue.get(old_done) is None and queue.get(old_failed) is None
+    assert queue.get(recent)['status'] == DONE
+    assert queue.get(waiting)['status'] == QUEUED
@@ -0,0 +1,105 @@
+"""
+UploadPipeline end to end against the in-memory repository, with a fake
+embedder and finalize step.
+"""
+import asyncio
+
+import pandas as pd
+import pytest
+
+from core.memory_database import InMemoryRepository
+from services.file_processor import FileProcessor
+from services.pipeline import UploadPipeline
+
+
+def make_df(rows):
+    return pd.DataFrame([
+        {'postContent': content, 'author': author, 'likeCount': '1,200', 'commentCount': 3,
+         'repostCount': 0, 'postDate': '2024-01-02', 'postTimestamp': '2024-01-02T10:00:00',
+         'postUrl': f'https://example.com/{author}/{content}'}
+        for author, content in rows
+    ])
+
+
+async def fake_embed(texts):
+    # Texts containing "skip" get no embedding, like a failed OpenAI batch
+    return [None if 'skip' in text else [float(len(text)), 1.0] for text in texts]
+
+
+class Recorder:
+    """finalize stand-in that remembers what it saw and how many ran at once"""
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.calls = {}
+        self.stored_at_finalize = {}
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, creator, new_ids):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.calls[creator] = sorted(new_ids)
+        posts = await self.repository.fetch_posts_by_author(creator, 'id')
+        self.stored_at_finalize[creator] = len(posts)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return 1
+
+
+def run_pipeline(repository, rows, **options):
+    finalize = Recorder(repository)
+    pipeline = UploadPipeline(repository, FileProcessor(), fake_embed, finalize, **options)
+    df = make_df(rows)
+    result = asyncio.run(pipeline.run(df, set(df['author'])))
+    return result, finalize
+
+
+def test_duplicates_are_dropped_and_every_creator_is_finalized_once():
+    repository = InMemoryRepository({'creator_posts': [
+        {'id': 1, 'author': 'Ada', 'post_content': 'already stored', 'post_url': None},
+    ]})
+    rows = [('Ada', 'already stored'), ('Ada', 'first'), ('Ada', 'first'), ('Ada', 'skip me'),
+            ('Bob', 'hello'), ('Bob', 'world'), ('Cy', 'only')]
+    result, finalize = run_pipeline(repository, rows, chunk_size=2)
+
+    assert (result.inserted, result.duplicates, result.profiles) == (5, 2, 3)
+    stored = {post['post_content']: post for post in repository.tables['creator_posts']}
+    assert stored['first']['like_count'] == 1200
+    assert stored['first']['embedding'] == [5.0, 1.0]
+    assert 'embedding' not in stored['skip me'] or stored['skip me']['embedding'] is None
+
+    # Only posts that got an embedding are handed to finalize
+    assert finalize.calls == {
+        'Ada': [stored['first']['id']],
+        'Bob': sorted([stored['hello']['id'], stored['world']['id']]),
+        'Cy': [stored['only']['id']],
+    }
+
+
+def test_creator_is_finalized_after_all_its_chunks_are_inserted():
+    repository = InMemoryRepository()
+    rows = [('Ada', f'post {i}') for i in range(7)] + [('Bob', 'one')] + [('Ada', 'last')]
+    result, finalize = run_pipeline(repository, rows, chunk_size=2, insert_workers=3)
+
+    assert result.inserted == 9
+    assert finalize.stored_at_finalize == {'Ada': 8, 'Bob': 1}
+
+
+def test_finalize_concurrency_is_bounded():
+    repository = InMemoryRepository()
+    rows = [(f'creator {i}', 'post') for i in range(6)]
+    _, finalize = run_pipeline(repository, rows, chunk_size=1, finalize_workers=2)
+
+    assert len(finalize.calls) == 6
+    assert finalize.peak == 2
+
+
+def test_embed_failure_fails_the_run():
+    async def broken_embed(texts):
+        raise RuntimeError("embedding service down")
+
+    pipeline = UploadPipeline(InMemoryRepository(), FileProcessor(), broken_embed, Recorder(None), chunk_size=1)
+    df = make_df([('Ada', 'one'), ('Ada', 'two')])
+    with pytest.raises(RuntimeError, match="embedding service down"):
+        asyncio.run(pipeline.run(df, {'Ada'}))
@@ -0,0 +1,68 @@
+"""
+Tiled neighbor scoring against a full similarity matrix.
+"""
+import numpy as np
+
+from services.post_neighbors import blocked_neighbors, merge_new_neighbors
+
+
+def make_vectors(count: int, dim: int = 8, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def brute_force(queries, own_rows, base, k):
+    scores = queries @ base.T
+    for i, own in enumerate(own_rows):
+        if own >= 0:
+            scores[i, own] = -np.inf
+    return np.argsort(-scores, axis=1, kind='stable')[:, :k]
+
+
+def test_blocked_neighbors_matches_full_matrix():
+    base = make_vectors(23)
+    own = np.arange(23)
+    for block in (4, 7, 100):
+        indexes, scores = blocked_neighbors(base, own, base, k=5, block=block)
+        assert (indexes == brute_force(base, own, base, 5)).all()
+        assert (np.diff(scores, axis=1) <= 0).all()
+        assert not (indexes == own[:, None]).any()
+
+    # Queries that are not in base exclude nothing
+    queries = make_vectors(3, seed=1)
+    indexes, _ = blocked_neighbors(queries, np.full(3, -1), base, k=4, block=5)
+    assert (indexes == brute_force(queries, [-1] * 3, base, 4)).all()
+
+
+def test_blocked_neighbors_with_fewer_posts_than_k():
+    base = make_vectors(3)
+    indexes, scores = blocked_neighbors(base, np.arange(3), base, k=10)
+    assert indexes.shape == (3, 2)
+    assert blocked_neighbors(base[:1], np.arange(1), base[:1], k=10)[0].shape == (1, 0)
+
+
+def test_merge_new_neighbors_matches_scoring_everything():
+    k = 4
+    old = make_vectors(9, seed=2)
+    new = make_vectors(6, seed=3)
+    old_ids = np.arange(100, 109)
+    new_ids = np.arange(200, 206)
+
+    # Stored lists from the old posts only; two rows padded as if written when there were fewer posts
+    rows, scores = blocked_neighbors(old, np.arange(9), old, k)
+    stored_ids, stored_scores = old_ids[rows], scores
+    stored_ids[:2, 2:] = -1
+    stored_scores[:2, 2:] = -np.inf
+
+    ids, merged_scores, changed = merge_new_neighbors(stored_ids, stored_scores, old, new, new_ids, k, block=4)
+
+    everything = np.concatenate([old, new])
+    all_ids = np.concatenate([old_ids, new_ids])
+    expected = all_ids[brute_force(old, np.arange(9), everything, k)]
+    assert (ids[2:] == expected[2:]).all()
+    assert np.allclose(merged_scores[2:], np.sort((old @ everything.T)[2:], axis=1)[:, ::-1][:, 1:k + 1])
+
+    # A row changed exactly when a new post entered its top k
+    assert (changed == np.isin(ids, new_ids).any(axis=1)).all()
+    # Padded rows fill their free slots from the new posts
+    assert changed[:2].all() and (ids[:2] >= 0).all()
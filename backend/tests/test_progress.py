@@ -0,0 +1,61 @@
+"""
+Per-creator stage of an upload: throttled progress writes and the
+process-pool KMeans helper.
+"""
+import asyncio
+
+import numpy as np
+
+from core.database import DatabaseError
+from core.memory_database import InMemoryRepository
+from services.clustering import fit_cluster_labels
+from services.progress import FileProgress
+
+
+def make_progress(total: int, interval: float):
+    repo = InMemoryRepository({'uploaded_files': [{'id': 1, 'status': 'processing'}]})
+    return repo, FileProgress(repo, 1, total, interval=interval)
+
+
+def test_progress_writes_are_throttled_but_the_last_creator_is_always_written():
+    repo, progress = make_progress(3, interval=3600)
+
+    async def finish_all():
+        # The first write goes through; the next is inside the interval
+        await progress.creator_done('Ada')
+        await progress.creator_done('Bob', error='boom')
+        writes = repo.request_count
+        await progress.creator_done('Cy')
+        return writes
+
+    writes_before_last = asyncio.run(finish_all())
+    assert writes_before_last == 1
+    assert repo.request_count == 2
+    assert repo.tables['uploaded_files'][0] == {
+        'id': 1, 'status': 'processing', 'creators_total': 3, 'creators_processed': 3, 'creators_failed': 1
+    }
+    assert progress.failed == {'Bob': 'boom'}
+
+
+def test_failed_progress_write_does_not_fail_the_upload():
+    repo, progress = make_progress(1, interval=0)
+
+    async def failing_update(*args, **kwargs):
+        raise DatabaseError("unavailable", status_code=503)
+    repo.update_file_record = failing_update
+
+    asyncio.run(progress.creator_done('Ada'))
+    assert progress.counts()['creators_processed'] == 1
+
+
+def test_fit_cluster_labels():
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((4, 8)) * 10
+    embeddings = np.vstack([center + rng.standard_normal((10, 8)) for center in centers])
+    labels = fit_cluster_labels(embeddings, 4)
+    # Each group of ten lands in its own cluster
+    assert sorted(len(set(labels[i:i + 10])) for i in range(0, 40, 10)) == [1, 1, 1, 1]
+    assert len(set(labels)) == 4
+
+    assert list(fit_cluster_labels(embeddings[:1], 4)) == [0]
+    assert len(set(fit_cluster_labels(embeddings[:3], 4))) <= 3
@@ -0,0 +1,299 @@
+"""
+Repository contract, run against InMemoryRepository both with its RPC
+stand-ins and without them (every typed query then takes its fallback
+path), so the two paths are held to the same results.
+"""
+import asyncio
+from datetime import date
+
+import pytest
+
+from core.database import (
+    Repository, DatabaseError, eq, in_, or_, and_, is_null, gt, lt, not_in
+)
+from core.memory_database import InMemoryRepository
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def collect(iterator) -> list:
+    async def drain():
+        return [page async for page in iterator]
+    return run(drain())
+
+
+def make_posts():
+    posts = []
+    for i in range(1, 26):
+        posts.append({
+            'id': i,
+            'author': 'Ada' if i % 5 else 'Bob',
+            'post_content': f"post {i}",
+            'post_timestamp': None if i in (3, 4) else f"2024-01-{i:02d}T09:00:00+00:00",
+            'like_count': i,
+            'comment_count': 1,
+            'repost_count': i % 2,
+            'cluster_id': None if i > 20 else i % 3,
+            'topic_id': i % 2 if i <= 10 else None,
+            'embedding': [float(i), 1.0],
+        })
+    return posts
+
+
+@pytest.fixture(params=['rpc', 'fallback'])
+def repository(request) -> InMemoryRepository:
+    repo = InMemoryRepository({
+        'creator_posts': make_posts(),
+        'creator_voice_profiles': [
+            {'creator': 'Ada', 'cluster_id': 0, 'performance_rank': 2, 'engagement': {'total_engagement': 10}},
+            {'creator': 'Ada', 'cluster_id': 1, 'performance_rank': 1, 'engagement': {'total_engagement': 30}},
+            {'creator': 'Ada', 'cluster_id': 2, 'performance_rank': None, 'engagement': None},
+            {'creator': 'Bob', 'cluster_id': 0, 'performance_rank': 1, 'engagement': {'total_engagement': 5}},
+        ],
+    })
+    if request.param == 'fallback':
+        repo.rpcs.clear()
+    return repo
+
+
+def ada_ids(repo: InMemoryRepository, **match) -> list:
+    return sorted(row['id'] for row in repo.tables['creator_posts']
+                  if row['author'] == 'Ada' and all(row.get(k) == v for k, v in match.items()))
+
+
+# Primitives
+def test_select_filters_order_and_projection(repository):
+    rows = run(repository.select('creator_posts', 'id, like_count',
+                                 [eq('author', 'Ada'), gt('id', 5), lt('id', 12)], order='like_count.desc', limit=3))
+    assert rows == [{'id': 11, 'like_count': 11}, {'id': 9, 'like_count': 9}, {'id': 8, 'like_count': 8}]
+
+    rows = run(repository.select('creator_posts', 'id', [or_(eq('id', 1), and_(gt('id', 23), not_in('id', [25])))],
+                                 order='id'))
+    assert [row['id'] for row in rows] == [1, 24]
+
+    rows = run(repository.select('creator_posts', 'id', [is_null('post_timestamp')], order='id'))
+    assert [row['id'] for row in rows] == [3, 4]
+
+
+def test_select_returns_copies(repository):
+    row = run(repository.select('creator_posts', '*', [eq('id', 1)]))[0]
+    row['like_count'] = -1
+    assert run(repository.select('creator_posts', 'like_count', [eq('id', 1)]))[0]['like_count'] == 1
+
+
+def test_insert_upsert_update_delete(repository):
+    inserted = run(repository.insert('uploaded_files', [{'filename': 'a.csv'}, {'filename': 'b.csv'}]))
+    assert len({row['id'] for row in inserted}) == 2
+
+    run(repository.upsert('upload_creators', [{'file_id': 1, 'creator': 'Ada', 'stage': 'inserted'}],
+                          on_conflict='file_id,creator'))
+    run(repository.upsert('upload_creators', [{'file_id': 1, 'creator': 'Ada', 'stage': 'profiled'}],
+                          on_conflict='file_id,creator'))
+    assert run(repository.count('upload_creators')) == 1
+
+    updated = run(repository.update('creator_posts', {'cluster_id': 9}, [in_('id', [1, 2])]))
+    assert sorted(row['id'] for row in updated) == [1, 2]
+
+    run(repository.delete('creator_posts', [eq('author', 'Bob')]))
+    assert run(repository.count('creator_posts', [eq('author', 'Bob')])) == 0
+
+
+def test_unknown_rpc_is_a_404(repository):
+    with pytest.raises(DatabaseError) as error:
+        run(repository.rpc('no_such_function'))
+    assert error.value.status_code == 404
+
+
+# Posts
+def test_iter_posts_by_author_keyset_pages(repository):
+    pages = collect(repository.iter_posts_by_author('Ada', 'post_content', page_size=7))
+    assert [len(page) for page in pages] == [7, 7, 6]
+    ids = [row['id'] for page in pages for row in page]
+    assert ids == ada_ids(repository)
+    assert set(pages[0][0]) == {'id', 'post_content'}
+
+    clustered = run(repository.fetch_posts_by_author('Ada', 'cluster_id', cluster_id=1))
+    assert [row['id'] for row in clustered] == ada_ids(repository, cluster_id=1)
+
+
+def test_page_posts_by_author_newest_first_with_cursor(repository):
+    # Two posts sharing a timestamp must not be skipped or repeated
+    repository.tables['creator_posts'][6]['post_timestamp'] = repository.tables['creator_posts'][5]['post_timestamp']
+
+    for limit in (4, 6, 30):
+        seen = []
+        after = None
+        while True:
+            page = run(repository.page_posts_by_author('Ada', 'like_count', limit=limit, after=after))
+            if not page:
+                break
+            assert len(page) <= limit
+            seen.extend(page)
+            after = (page[-1]['post_timestamp'], page[-1]['id'])
+
+        ids = [row['id'] for row in seen]
+        dated = sorted((row for row in repository.tables['creator_posts']
+                        if row['author'] == 'Ada' and row['post_timestamp']),
+                       key=lambda row: (row['post_timestamp'], row['id']), reverse=True)
+        assert ids == [row['id'] for row in dated] + [4, 3]
+        assert set(seen[0]) == {'id', 'post_timestamp', 'like_count'}
+
+
+def test_post_lookups(repository):
+    rows = run(repository.fetch_posts_by_ids([2, 7, 99], 'id, author'))
+    assert sorted(row['id'] for row in rows) == [2, 7]
+
+    assert run(repository.count_posts()) == 25
+    assert run(repository.count_posts('Bob')) == 5
+    assert run(repository.has_posts('Bob'))
+    assert run(repository.has_posts('Ada', clustered=False))
+    assert not run(repository.has_posts('Nobody'))
+    assert run(repository.list_authors()) == ['Ada', 'Bob']
+
+
+def test_insert_posts_returns_ids_in_order(repository):
+    ids = run(repository.insert_posts([{'author': 'Cy', 'post_content': str(i)} for i in range(5)], chunk_size=2))
+    rows = run(repository.fetch_posts_by_ids(ids, 'id, post_content'))
+    assert [row['post_content'] for row in sorted(rows, key=lambda row: ids.index(row['id']))] == list('01234')
+
+
+def test_update_post_clusters(repository):
+    assignments = {post_id: post_id % 4 for post_id in range(1, 26)}
+    result = run(repository.update_post_clusters(assignments, chunk_size=10))
+    assert result.written == 25 and not result.failed_ids
+    assert {row['id']: row['cluster_id'] for row in repository.tables['creator_posts']} == assignments
+
+
+def test_update_post_clusters_reports_failed_chunks():
+    repo = InMemoryRepository({'creator_posts': make_posts()})
+
+    def failing(repo, p_ids, p_cluster_ids):
+        if 1 in p_ids:
+            raise DatabaseError("boom", status_code=500)
+        return len(p_ids)
+    repo.register_rpc('assign_post_clusters', failing)
+
+    result = run(repo.update_post_clusters({1: 0, 2: 0, 3: 1}, chunk_size=2, attempts=1))
+    assert sorted(result.failed_ids) == [1, 2]
+    assert result.written == 1
+
+
+def test_update_post_clusters_falls_back_without_the_rpc():
+    repo = InMemoryRepository({'creator_posts': make_posts()})
+    repo.rpcs.clear()
+    result = run(repo.update_post_clusters({1: 3, 2: 3, 3: 2}, chunk_size=2))
+    assert result.written == 3 and not result.failed_ids
+    assert not repo._assign_rpc_available
+    assert [row['cluster_id'] for row in repo.tables['creator_posts'][:3]] == [3, 3, 2]
+
+
+# Uploads
+def test_file_records_and_manifest(repository):
+    record = run(repository.create_file_record('a.csv'))
+    run(repository.update_file_record(record['id'], {'status': 'completed'}))
+    assert run(repository.get_file_record(record['id']))['status'] == 'completed'
+    assert [row['id'] for row in run(repository.list_file_records('completed'))] == [record['id']]
+    assert run(repository.count_file_records()) == 1
+
+    run(repository.upsert_upload_creators([
+        {'file_id': record['id'], 'creator': creator, 'stage': 'inserted'} for creator in ('Bob', 'Ada')
+    ]))
+    assert [row['creator'] for row in run(repository.list_upload_creators(record['id']))] == ['Ada', 'Bob']
+    assert run(repository.get_upload_creator(record['id'], 'Bob'))['stage'] == 'inserted'
+    assert run(repository.get_upload_creator(record['id'], 'Cy')) is None
+
+
+# Aggregates: the RPC stand-ins and the fallbacks must agree
+def test_platform_stats(repository):
+    run(repository.create_file_record('a.csv'))
+    assert run(repository.platform_stats()) == {'total_posts': 25, 'unique_authors': 2, 'files_processed': 1}
+
+    # Moving Bob's posts to Ada leaves one author
+    run(repository.update('creator_posts', {'author': 'Ada'}, [eq('author', 'Bob')]))
+    assert run(repository.platform_stats())['unique_authors'] == 1
+
+
+def test_get_creator_stats(repository):
+    stats = run(repository.get_creator_stats('Bob'))
+    # Bob has posts 5, 10, 15, 20, 25
+    assert stats == {'post_count': 5, 'avg_likes': 15, 'avg_engagement': 17, 'voice_profiles_count': 1}
+    assert run(repository.get_creator_stats('Nobody'))['post_count'] == 0
+
+
+def test_engagement_series(repository):
+    series = run(repository.engagement_series('Bob', 'month'))
+    assert series == [{'period_start': '2024-01-01', 'post_count': 5, 'likes': 75, 'comments': 5, 'reposts': 3}]
+
+    weeks = run(repository.engagement_series('Ada', 'week', cluster_id=0, since=date(2024, 1, 8)))
+    expected_ids = [i for i in ada_ids(repository, cluster_id=0) if i >= 8]
+    assert sum(week['post_count'] for week in weeks) == len(expected_ids)
+    assert all(week['period_start'] >= '2024-01-08' for week in weeks)
+
+
+def test_topic_stats(repository):
+    stats = run(repository.topic_stats())
+    assert [(row['topic_id'], row['post_count'], row['likes']) for row in stats] == [(0, 5, 30), (1, 5, 25)]
+
+
+def test_update_post_topics(repository):
+    assignments = {post_id: post_id % 3 for post_id in range(11, 26)}
+    requests = run(repository.update_post_topics(assignments, chunk_size=4))
+    assert requests == (4 if repository.rpcs else 12)
+    assert {row['id']: row['topic_id'] for row in repository.tables['creator_posts'] if row['id'] > 10} == assignments
+
+
+def test_iter_untopiced_posts(repository):
+    pages = collect(repository.iter_untopiced_posts('id, embedding', page_size=4))
+    assert [row['id'] for page in pages for row in page] == list(range(11, 26))
+
+
+# Voice profiles
+def test_voice_profiles(repository):
+    assert run(repository.count_voice_profiles('Ada')) == 3
+    assert run(repository.fetch_profile_engagement('Ada')) == {0: 10, 1: 30, 2: 0}
+    profiles = run(repository.list_voice_profiles('Ada', 'cluster_id, performance_rank'))
+    assert [row['cluster_id'] for row in profiles] == [1, 0, 2]
+
+    pages = collect(repository.iter_voice_profiles('creator, cluster_id', page_size=3))
+    assert [(row['creator'], row['cluster_id']) for page in pages for row in page] == [
+        ('Ada', 0), ('Ada', 1), ('Ada', 2), ('Bob', 0)
+    ]
+    pages = collect(repository.iter_voice_profiles('creator, cluster_id', page_size=2, creators=['Bob', 'Cy']))
+    assert [(row['creator'], row['cluster_id']) for page in pages for row in page] == [('Bob', 0)]
+    assert collect(repository.iter_voice_profiles('creator', creators=[])) == []
+
+
+# Precomputed neighbor lists
+def test_post_neighbors(repository):
+    run(repository.upsert_post_neighbors([
+        {'post_id': post_id, 'author': 'Ada', 'neighbor_ids': [post_id + 1], 'scores': [0.5]}
+        for post_id in (3, 1, 2)
+    ], chunk_size=2))
+    run(repository.upsert_post_neighbors([{'post_id': 2, 'author': 'Ada', 'neighbor_ids': [1], 'scores': [0.9]}]))
+
+    pages = collect(repository.iter_post_neighbors('Ada', page_size=2))
+    assert [row['post_id'] for page in pages for row in page] == [1, 2, 3]
+    assert run(repository.get_post_neighbors(2))['neighbor_ids'] == [1]
+    assert run(repository.get_post_neighbors(99)) is None
+
+
+def test_creator_similarity(repository):
+    run(repository.upsert_creator_similarity([
+        {'creator': creator, 'similar_creators': ['x'], 'scores': [0.1], 'feature_hash': creator}
+        for creator in ('Cy', 'Ada', 'Bob')
+    ], chunk_size=2))
+    assert sorted(run(repository.fetch_creator_similarity(page_size=2))) == ['Ada', 'Bob', 'Cy']
+
+    run(repository.delete_creator_similarity(['Ada', 'Cy']))
+    assert list(run(repository.fetch_creator_similarity())) == ['Bob']
+    assert run(repository.get_creator_similarity('Bob'))['similar_creators'] == ['x']
+    assert run(repository.get_creator_similarity('Ada')) is None
+
+
+def test_in_memory_repository_is_a_repository():
+    assert isinstance(InMemoryRepository(), Repository)
+    # The primitives are abstract
+    with pytest.raises(TypeError):
+        Repository()
@@ -0,0 +1,49 @@
+"""
+StylometryScanner against the per-post loop it replaced
+(benchmarks/benchmark_stylometry.py keeps that loop for timing).
+"""
+import random
+
+from benchmarks.benchmark_stylometry import legacy_totals, make_post
+from services.stylometry import StylometryScanner, UNICODE_WHITESPACE
+
+EDGE_CASES = [
+    "", " ", "\n\n", "...", "Wait... what?!", "No terminator", "Ends with space. ",
+    "a b　c. d", "line two\x85three", "　　", "?! ",
+    "para one\n\n\n\npara two\n\n", "\n\nleading blank\nhook", "-- dash — dash…",
+]
+
+
+def scramble(post: str, rng: random.Random) -> str:
+    """Swap some ASCII spaces for other whitespace \\s matches"""
+    return ''.join(
+        rng.choice(UNICODE_WHITESPACE + '\t\r\x0b\x0c') if char == ' ' and rng.random() < 0.2 else char
+        for char in post
+    )
+
+
+def test_totals_match_the_per_post_loop():
+    rng = random.Random(7)
+    contents = EDGE_CASES + [scramble(make_post(rng), rng) for _ in range(300)]
+    totals = StylometryScanner().scan(contents)
+    for name, value in legacy_totals(contents).items():
+        assert getattr(totals, name) == value, name
+
+
+def test_each_edge_case_alone():
+    scanner = StylometryScanner()
+    for content in EDGE_CASES[1:]:
+        totals = scanner.scan([content])
+        for name, value in legacy_totals([content]).items():
+            assert getattr(totals, name) == value, (content, name)
+
+
+def test_extended_features():
+    totals = StylometryScanner().scan([
+        "Big news 🚀\nWe shipped #launch with @Jane and @Bob 👍🏽 🇺🇸 👨‍👩‍👧 ❤️",
+        "email me at a@b.com or see issue#4",
+    ])
+    assert totals.emojis == 5
+    assert totals.hashtags == 1
+    assert totals.mentions == 2
+    assert totals.hook_words == 3 + 7
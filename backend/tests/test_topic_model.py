@@ -0,0 +1,81 @@
+"""
+GlobalTopicModel learning in batches, and GlobalTopics feeding it from the
+repository.
+"""
+import asyncio
+
+import numpy as np
+
+from core.memory_database import InMemoryRepository
+from services.topic_model import GlobalTopicModel, GlobalTopics
+
+
+def make_vectors(count: int, topics: int = 3, dim: int = 32, seed: int = 0):
+    """Vectors around `topics` well separated centers, and the center of each"""
+    rng = np.random.default_rng(seed)
+    centers = np.eye(dim)[:topics] * 10
+    labels = rng.integers(0, topics, count)
+    return (centers[labels] + 0.5 * rng.standard_normal((count, dim))).astype(np.float32), labels
+
+
+def test_learn_holds_posts_back_until_it_can_seed_every_topic():
+    model = GlobalTopicModel(n_topics=3, dimensions=8)
+    vectors, labels = make_vectors(12)
+
+    assert model.learn([1, 2, 3, 4], vectors[:4]) == {}
+    # Posts already waiting are not counted twice
+    assert model.learn([3, 4, 5, 6], vectors[2:6]) == {}
+    assert not model.ready
+
+    assignments = model.learn(list(range(7, 13)), vectors[6:12])
+    assert model.ready
+    assert sorted(assignments) == list(range(1, 13))
+    assert model.posts_seen == 12
+
+    # Once seeded, every batch is assigned right away
+    more, more_labels = make_vectors(30, seed=1)
+    topics = model.learn(list(range(100, 130)), more)
+    assert sorted(topics) == list(range(100, 130))
+    # Posts from the same center share a topic
+    for label in range(3):
+        assert len({topics[100 + i] for i in np.flatnonzero(more_labels == label)}) == 1
+    assert model.learn([], np.empty((0, 32))) == {}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    model = GlobalTopicModel(n_topics=3, dimensions=8)
+    vectors, _ = make_vectors(20)
+    model.learn(list(range(20)), vectors)
+    path = str(tmp_path / 'topics.joblib')
+    model.save(path)
+
+    loaded = GlobalTopicModel.load(path)
+    probe, _ = make_vectors(5, seed=2)
+    assert loaded.posts_seen == 20
+    assert loaded.learn([1, 2, 3, 4, 5], probe) == model.learn([1, 2, 3, 4, 5], probe)
+
+
+def test_backfill_assigns_every_embedded_post_without_a_topic(tmp_path):
+    vectors, _ = make_vectors(20)
+    posts = [{'id': i + 1, 'author': 'Ada', 'topic_id': None, 'embedding': vector.tolist()}
+             for i, vector in enumerate(vectors)]
+    posts.append({'id': 21, 'author': 'Ada', 'topic_id': None, 'embedding': None})
+    repository = InMemoryRepository({'creator_posts': posts})
+
+    topics = GlobalTopics(path=str(tmp_path / 'topics.joblib'))
+    topics.model = GlobalTopicModel(n_topics=3, dimensions=8)
+    assert asyncio.run(topics.backfill(repository)) == 20
+    assert [row['topic_id'] is not None for row in repository.tables['creator_posts']] == [True] * 20 + [False]
+
+
+def test_full_queue_tells_the_drop_listeners(tmp_path):
+    topics = GlobalTopics(path=str(tmp_path / 'topics.joblib'), queue_size=1)
+    dropped = []
+    topics.on_dropped(dropped.append)
+
+    posts = [{'embedding': [1.0, 0.0]}, {'embedding': None}, {'embedding': [0.0, 1.0]}]
+    topics.observe(posts, [1, 2, 3])
+    topics.observe(posts, [4, 5, 6])
+    topics.observe([{'embedding': None}], [7])
+    assert dropped == [2]
+    assert topics.metrics()['dropped_posts'] == 2
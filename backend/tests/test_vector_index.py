@@ -0,0 +1,121 @@
+"""
+IVFIndex against brute-force cosine search: with every list probed it must
+return the exact top-k, through adds, removals, syncs and compaction.
+"""
+import numpy as np
+
+from services.vector_index import IVFIndex, normalize
+
+
+def make_vectors(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, dim))
+    return (centers[rng.integers(0, 8, count)] + 0.3 * rng.standard_normal((count, dim))).astype(np.float32)
+
+
+def brute_force(ids, vectors, query, k):
+    scores = normalize(vectors) @ normalize(query)
+    top = np.argsort(-scores, kind='stable')[:k]
+    return [int(ids[i]) for i in top]
+
+
+def exact_search(index: IVFIndex, query, k):
+    nprobe = len(index.centroids) if index.is_ivf else 1
+    return [post_id for post_id, _ in index.search(query, k, nprobe=nprobe)]
+
+
+def assert_lists_consistent(index: IVFIndex):
+    """Every row sits in the list of its nearest centroid"""
+    assert index.offsets[0] == 0 and index.offsets[-1] == len(index.ids)
+    for list_id in range(len(index.centroids)):
+        rows = index.vectors[index.offsets[list_id]:index.offsets[list_id + 1]]
+        if len(rows):
+            assert (np.argmax(rows @ index.centroids.T, axis=1) == list_id).all()
+
+
+def test_small_index_is_exact():
+    vectors = make_vectors(50)
+    ids = np.arange(1, 51)
+    index = IVFIndex.build(ids, vectors, min_vectors=100)
+    assert not index.is_ivf
+    query = make_vectors(1, seed=1)[0]
+    assert exact_search(index, query, 5) == brute_force(ids, vectors, query, 5)
+
+
+def test_ivf_search_with_every_list_probed_is_exact():
+    vectors = make_vectors(600)
+    ids = np.arange(1000, 1600)
+    index = IVFIndex.build(ids, vectors, min_vectors=100)
+    assert index.is_ivf
+    assert_lists_consistent(index)
+
+    for seed in range(5):
+        query = make_vectors(1, seed=seed + 10)[0]
+        assert exact_search(index, query, 10) == brute_force(ids, vectors, query, 10)
+    # Probing fewer lists still returns the closest vector to an indexed one
+    assert index.search(vectors[7], 1, nprobe=2)[0][0] == 1007
+
+
+def test_added_goes_to_the_tail_and_is_searchable():
+    vectors = make_vectors(700)
+    index = IVFIndex.build(np.arange(600), vectors[:600], min_vectors=100)
+
+    grown = index.added(np.arange(595, 700), vectors[595:])
+    # Ids already held are skipped; the original index is unchanged
+    assert len(grown) == 700 and len(grown.tail_ids) == 100
+    assert len(index) == 600
+    assert grown.added([1, 2], vectors[1:3]) is grown
+
+    query = vectors[650]
+    assert exact_search(grown, query, 10) == brute_force(np.arange(700), vectors, query, 10)
+
+
+def test_large_tail_is_compacted_into_the_lists():
+    vectors = make_vectors(1700)
+    index = IVFIndex.build(np.arange(500), vectors[:500], min_vectors=100)
+
+    # Over 1024 new posts, but under 4x the lists: regrouped under the same centroids
+    grown = index.added(np.arange(500, 1700), vectors[500:])
+    assert len(grown.tail_ids) == 0
+    assert grown.centroids is index.centroids
+    assert sorted(grown.ids) == list(range(1700))
+    assert_lists_consistent(grown)
+
+
+def test_removed_keeps_the_lists_consistent():
+    vectors = make_vectors(600)
+    ids = np.arange(600)
+    index = IVFIndex.build(ids, vectors, min_vectors=100).added([600, 601], make_vectors(2, seed=3))
+    gone = np.arange(0, 600, 3).tolist() + [601]
+
+    shrunk = index.removed(gone)
+    assert len(shrunk) == 600 + 2 - len(gone)
+    assert not set(shrunk.all_ids().tolist()) & set(gone)
+    assert_lists_consistent(shrunk)
+    assert shrunk.removed([9999]) is shrunk
+
+    kept = ~np.isin(ids, gone)
+    query = make_vectors(1, seed=4)[0]
+    assert exact_search(shrunk, query, 10) == brute_force(ids[kept], vectors[kept], query, 10)
+
+
+def test_synced_holds_exactly_the_given_ids():
+    vectors = make_vectors(400)
+    index = IVFIndex.build(np.arange(300), vectors[:300], min_vectors=100)
+
+    wanted = np.arange(100, 400)
+    synced = index.synced(wanted, vectors[100:])
+    assert sorted(synced.all_ids().tolist()) == wanted.tolist()
+    assert exact_search(synced, vectors[350], 1) == [350]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    vectors = make_vectors(300)
+    index = IVFIndex.build(np.arange(300), vectors, min_vectors=100).added([300], make_vectors(1, seed=5))
+    path = str(tmp_path / 'index.npz')
+    index.save(path)
+
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == 301 and len(loaded.tail_ids) == 0
+    query = make_vectors(1, seed=6)[0]
+    assert exact_search(loaded, query, 5) == exact_search(index, query, 5)
@@ -56,70 +56,81 @@ function AdminPage({ onNavigate }) {
       console.log('Upload result:', result);
 
       if (result.status === 'processing' && result.file_id) {
-        // Poll for status updates
-        const checkStatus = async () => {
-          try {
-            const statusResponse = await fetch(`https://kaive-ai-production-7be5.up.railway.app/processing-status/${result.file_id}`);
-            const statusData = await statusResponse.json();
-            
-            switch(statusData.status) {
-              case 'posts_saved':
-                setUploadStatus({
-                  stage: 'posts_saved',
-                  message: `✅ Stage 1 Complete: ${statusData.total_posts || 0} posts uploaded to database\n⏳ Stage 2: Generating voice profiles...`,
-                  posts: statusData.total_posts || 0,
-                  newPosts: statusData.new_posts || 0,
-                  duplicates: statusData.duplicate_posts || 0
-                });
-                return false; // Keep polling
-                
-              case 'completed':
-                setUploadStatus({
-                  stage: 'completed',
-                  message: `✅ Stage 1 Complete: ${statusData.total_posts || 0} posts uploaded to database\n✅ Stage 2 Complete: Voice profiles created\n🎉 File processing complete!`,
-                  posts: statusData.total_posts || 0,
-                  newPosts: statusData.new_posts || 0,
-                  duplicates: statusData.duplicate_posts || 0,
-                  voiceProfiles: statusData.voice_profiles_count || 0
-                });
-                fetchStats(); // Refresh stats
-                return true; // Stop polling
-                
-              case 'voice_profile_failed':
-                setUploadStatus({
-                  stage: 'partial_success',
-                  message: `✅ Stage 1 Complete: ${statusData.total_posts || 0} posts uploaded to database\n❌ Stage 2 Failed: Voice profile generation error`,
-                  posts: statusData.total_posts || 0,
-                  newPosts: statusData.new_posts || 0,
-                  duplicates: statusData.duplicate_posts || 0
-                });
-                return true; // Stop polling
-                
-              case 'failed':
+        // Apply a status event; returns true once processing is finished
+        const applyStatus = (statusData) => {
+          switch(statusData.status) {
+            case 'posts_saved': {
+              const creatorsProgress = statusData.creators_total
+                ? ` (${statusData.creators_processed || 0}/${statusData.creators_total} creators)`
+                : '';
+              setUploadStatus({
+                stage: 'posts_saved',
+                message: `✅ Stage 1 Complete: ${statusData.total_posts || 0} posts uploaded to database\n⏳ Stage 2: Generating voice profiles...${creatorsProgress}`,
+                posts: statusData.total_posts || 0,
+                newPosts: statusData.new_posts || 0,
+                duplicates: statusData.duplicate_posts || 0
+              });
+              return false; // Keep listening
+            }
+              
+            case 'completed':
+              setUploadStatus({
+                stage: 'completed',
+                message: `✅ Stage 1 Complete: ${statusData.total_posts || 0} posts uploaded to database\n✅ Stage 2 Complete: Voice profiles created\n🎉 File processing complete!`,
+                posts: statusData.total_posts || 0,
+                newPosts: statusData.new_posts || 0,
+                duplicates: statusData.duplicate_posts || 0,
+                voiceProfiles: statusData.voice_profiles_count || 0
+              });
+              fetchStats(); // Refresh stats
+              return true; // Stop listening
+              
+            case 'voice_profile_failed':
+              setUploadStatus({
+                stage: 'partial_success',
+                message: `✅ Stage 1 Complete: ${statusData.total_posts || 0} posts uploaded to database\n❌ Stage 2 Failed: Voice profile generation error`,
+                posts: statusData.total_posts || 0,
+                newPosts: statusData.new_posts || 0,
+                duplicates: statusData.duplicate_posts || 0
+              });
+              return true; // Stop listening
+              
+            case 'failed':
+              setUploadStatus({
+                stage: 'failed',
+                message: `❌ Processing failed for ${file.name}`,
+                error: statusData.error_message || 'Unknown error'
+              });
+              return true; // Stop listening
+              
+            default:
+              if (statusData.stage === 'inserting') {
                 setUploadStatus({
-                  stage: 'failed',
-                  message: `❌ Processing failed for ${file.name}`,
-                  error: statusData.error_message || 'Unknown error'
+                  stage: 'uploading',
+                  message: `📤 Saving posts: ${statusData.new_posts || 0} new, ${statusData.duplicate_posts || 0} duplicates skipped`
                 });
-                return true; // Stop polling
-                
-              default:
-                return false; // Keep polling
-            }
-          } catch (error) {
-            console.error('Status check error:', error);
-            return false;
+              }
+              return false; // Keep listening
           }
         };
 
-        // Check status immediately
-        await checkStatus();
+        // Status is pushed by the server; EventSource reconnects on its own
+        // and the first event after a reconnect is the current status
+        const source = new EventSource(`https://kaive-ai-production-7be5.up.railway.app/processing-status/${result.file_id}/stream`);
+        let timeout;
         
-        // Then check every 2 seconds
-        const interval = setInterval(async () => {
-          const isDone = await checkStatus();
-          if (isDone) {
-            clearInterval(interval);
+        source.addEventListener('status', (event) => {
+          let statusData;
+          try {
+            statusData = JSON.parse(event.data);
+          } catch (error) {
+            console.error('Status event error:', error);
+            return;
+          }
+          
+          if (applyStatus(statusData)) {
+            source.close();
+            clearTimeout(timeout);
             setIsUploading(false);
             
             // Keep success message visible for 10 seconds
@@ -127,18 +138,20 @@ function AdminPage({ onNavigate }) {
               setUploadStatus(null);
             }, 10000);
           }
-        }, 2000);
+        });
+        
+        source.onerror = (error) => {
+          console.error('Status stream error:', error);
+        };
 
         // Timeout after 2 minutes
-        setTimeout(() => {
-          clearInterval(interval);
+        timeout = setTimeout(() => {
+          source.close();
           setIsUploading(false);
-          if (uploadStatus) {
-            setUploadStatus(prev => ({
-              ...prev,
-              message: (prev?.message || '') + '\n⚠️ Processing is taking longer than expected. Check back later.'
-            }));
-          }
+          setUploadStatus(prev => prev && ({
+            ...prev,
+            message: (prev.message || '') + '\n⚠️ Processing is taking longer than expected. Check back later.'
+          }));
         }, 120000);
         
       } else {
@@ -6,6 +6,7 @@ function CreatorProfilePage({ onNavigate }) {
   const { creatorName } = useParams();
   const [creator, setCreator] = useState(null);
   const [posts, setPosts] = useState([]);
+  const [voiceProfiles, setVoiceProfiles] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [expandedPosts, setExpandedPosts] = useState({});
@@ -15,31 +16,20 @@ function CreatorProfilePage({ onNavigate }) {
       try {
         setLoading(true);
         
-        // Fetch creator details
-        const creatorResponse = await fetch(
-          `https://kaive-ai-production-7be5.up.railway.app/api/creators/${encodeURIComponent(creatorName)}`
+        // Creator details, voice profiles and the first page of posts in one request
+        const profileResponse = await fetch(
+          `https://kaive-ai-production-7be5.up.railway.app/api/creators/${encodeURIComponent(creatorName)}/profile`
         );
         
-        if (!creatorResponse.ok) {
+        if (!profileResponse.ok) {
           throw new Error('Creator not found');
         }
         
-        const creatorData = await creatorResponse.json();
-        setCreator(creatorData.data);
-        
-        // Fetch creator posts
-        const postsResponse = await fetch(
-          `https://kaive-ai-production-7be5.up.railway.app/api/creators/${encodeURIComponent(creatorName)}/posts`
-        );
-        
-        if (postsResponse.ok) {
-          const postsData = await postsResponse.json();
-          // Sort posts by date - latest first
-          const sortedPosts = (postsData.data || []).sort((a, b) => {
-            return new Date(b.post_date) - new Date(a.post_date);
-          });
-          setPosts(sortedPosts);
-        }
+        const profileData = await profileResponse.json();
+        setCreator(profileData.data.creator);
+        setVoiceProfiles(profileData.data.voice_profiles || []);
+        // Posts arrive newest first
+        setPosts(profileData.data.posts.data || []);
         
       } catch (error) {
         console.error('Error fetching creator data:', error);
@@ -185,6 +175,25 @@ function CreatorProfilePage({ onNavigate }) {
               </div>
             </div>
 
+            {voiceProfiles.length > 0 && (
+              <div className={styles.voiceProfiles}>
+                <h3 className={styles.voiceProfilesTitle}>Voice Profiles</h3>
+                {voiceProfiles.map((profile) => (
+                  <div key={profile.cluster_id} className={styles.voiceProfile}>
+                    <div className={styles.voiceProfileHeader}>
+                      <span className={styles.voiceProfileName}>{profile.cluster_name}</span>
+                      {profile.performance_rank > 0 && (
+                        <span className={styles.voiceProfileRank}>#{profile.performance_rank}</span>
+                      )}
+                    </div>
+                    {profile.cluster_description && (
+                      <p className={styles.voiceProfileDescription}>{profile.cluster_description}</p>
+                    )}
+                  </div>
+                ))}
+              </div>
+            )}
+
             {creator.linkedin_url && (
               <button className={styles.linkedinButton} onClick={handleLinkedInClick}>
                 <svg fill="currentColor" viewBox="0 0 24 24">